@@ -0,0 +1,136 @@
+"""Benchmarks the parse, map, filter and state stages of every Oura sensor.
+
+Sensors run on payloads generated from recorded fixtures, from 1 day to 1 year
+of documents and from 10 to 100k heart rate samples, or on the pages recorded
+in a cassette by the `record` transport. No Home-Assistant instance is started
+and Oura API is never called.
+
+Usage (from the repository root):
+  python benchmarks/bench_pipeline.py [--sensors heart_rate sleep] [--days 1 7]
+      [--samples 10 1000] [--repeat 3] [--cassette oura_cassette.jsonl.gz]
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness  # noqa: E402
+import payloads  # noqa: E402
+from custom_components.oura import sensor_heart_rate  # noqa: E402
+
+_DEFAULT_DAYS = [1, 7, 30, 90, 365]
+_DEFAULT_SAMPLES = [10, 1000, 10000, 100000]
+_DEFAULT_REPEAT = 3
+
+# Sensor configuration used for all runs: several kinds of dates, backfill and
+# some variables on demand.
+_SENSOR_CONFIG = {
+    'monitored_dates': ['yesterday', '3days_ago', 'monday', 'friday'],
+    'max_backfill': 7,
+}
+
+
+def _get_payload_sizes(sensor_name, days_sizes, samples_sizes):
+  """Gets the payload sizes to benchmark for a sensor.
+
+  Args:
+    sensor_name: Name of the sensor.
+    days_sizes: Numbers of days of documents.
+    samples_sizes: Numbers of heart rate samples.
+
+  Returns:
+    List of (label, days, samples). Samples is None for daily documents.
+  """
+  if sensor_name == sensor_heart_rate.CONF_KEY_NAME:
+    return [
+        (f'{samples} samples', payloads.get_heart_rate_days(samples), samples)
+        for samples in samples_sizes
+    ]
+  return [(f'{days} days', days, None) for days in days_sizes]
+
+
+def _generate_pages(sensor, days, samples):
+  """Generates the API pages for a sensor.
+
+  Args:
+    sensor: Oura sensor.
+    days: Number of days of documents.
+    samples: Number of heart rate samples. None for daily documents.
+
+  Returns:
+    Map of the sensor endpoint to its pages.
+  """
+  endpoint = sensor.api_endpoint
+  yesterday = datetime.date.today() - datetime.timedelta(days=1)
+
+  if samples is not None:
+    documents = payloads.generate_heart_rate_samples(yesterday, samples)
+  else:
+    documents = payloads.generate_documents(endpoint, yesterday, days)
+
+  return {endpoint: payloads.paginate(endpoint, documents)}
+
+
+def _print_row(sensor_name, size_label, pages, times, peaks):
+  """Prints the results of a run."""
+  stages = '  '.join(
+      f'{times[stage] * 1000:9.2f} ms {peaks[stage] / 1024:9.1f} KiB'
+      for stage in harness.STAGES)
+  print(f'{sensor_name:<14} {size_label:<16} {len(pages):>5}  {stages}')
+
+
+def main():
+  """Runs the benchmarks and prints the results."""
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument(
+      '--sensors', nargs='+', choices=sorted(harness.SENSORS),
+      default=sorted(harness.SENSORS))
+  parser.add_argument('--days', nargs='+', type=int, default=_DEFAULT_DAYS)
+  parser.add_argument(
+      '--samples', nargs='+', type=int, default=_DEFAULT_SAMPLES)
+  parser.add_argument('--repeat', type=int, default=_DEFAULT_REPEAT)
+  parser.add_argument('--cassette')
+  args = parser.parse_args()
+
+  # Small payloads miss some monitored dates on purpose, which is logged on
+  # every run.
+  logging.basicConfig(level=logging.ERROR)
+
+  stage_headers = '  '.join(
+      f'{stage + " time":>12} {stage + " peak":>13}'
+      for stage in harness.STAGES)
+  print(f'{"sensor":<14} {"size":<16} {"pages":>5}  {stage_headers}')
+
+  cassette_pages = (
+      payloads.load_cassette_pages(args.cassette) if args.cassette else None)
+
+  for sensor_name in args.sensors:
+    payload_sizes = (
+        [('cassette', None, None)] if cassette_pages is not None else
+        _get_payload_sizes(sensor_name, args.days, args.samples))
+
+    for (size_label, days, samples) in payload_sizes:
+      if cassette_pages is None:
+        sensor = harness.create_sensor(sensor_name, dict(_SENSOR_CONFIG), {})
+        pages = _generate_pages(sensor, days, samples)
+      else:
+        pages = cassette_pages
+
+      # Pages go through the sensor API, as they would in production.
+      sensor = harness.create_sensor(sensor_name, dict(_SENSOR_CONFIG), pages)
+      fetched_pages = asyncio.run(harness.async_fetch_pages(sensor))
+
+      times = harness.measure_time(sensor, fetched_pages, args.repeat)
+      peaks = harness.measure_peak_memory(sensor, fetched_pages)
+      _print_row(sensor_name, size_label, fetched_pages, times, peaks)
+
+
+if __name__ == '__main__':
+  main()
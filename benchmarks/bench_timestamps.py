@@ -0,0 +1,134 @@
+"""Compares Oura timestamp parsing against the previous dateutil path.
+
+Parses a year of sleep documents (bedtime start and end) and a year of heart
+rate samples (one every 5 minutes) with both implementations.
+
+Usage (from the repository root):
+  python benchmarks/bench_timestamps.py
+"""
+
+import datetime
+import os
+import sys
+import timeit
+
+from dateutil import parser
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from custom_components.oura.helpers import timestamp_helper  # noqa: E402
+
+_DAYS = 365
+_HEART_RATE_INTERVAL = datetime.timedelta(minutes=5)
+_REPEAT = 3
+
+
+def _get_sleep_timestamps():
+  """Gets the bedtime start and end timestamps of a year of sleep documents.
+
+  Returns:
+    List of timestamps in Oura format.
+  """
+  timezone = datetime.timezone(datetime.timedelta(hours=2))
+  first_day = datetime.datetime(2023, 1, 1, 23, 14, 37, tzinfo=timezone)
+
+  timestamps = []
+  for day in range(_DAYS):
+    bedtime_start = first_day + datetime.timedelta(days=day)
+    bedtime_end = bedtime_start + datetime.timedelta(hours=8, minutes=3)
+    timestamps.extend([bedtime_start.isoformat(), bedtime_end.isoformat()])
+  return timestamps
+
+
+def _get_heart_rate_timestamps():
+  """Gets the timestamps of a year of heart rate samples.
+
+  Returns:
+    List of timestamps in Oura format.
+  """
+  timestamp = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+  last_timestamp = timestamp + datetime.timedelta(days=_DAYS)
+
+  timestamps = []
+  while timestamp < last_timestamp:
+    timestamps.append(timestamp.isoformat())
+    timestamp += _HEART_RATE_INTERVAL
+  return timestamps
+
+
+def _get_hour_dateutil(timestamp):
+  """Previous sleep path: dateutil parsing and strftime."""
+  return parser.parse(timestamp).strftime('%H:%M')
+
+
+def _get_epoch_and_timezone_fromisoformat(timestamp):
+  """Previous heart rate path: fromisoformat and timestamp()."""
+  parsed_timestamp = datetime.datetime.fromisoformat(timestamp)
+  return (int(parsed_timestamp.timestamp()), parsed_timestamp.tzinfo)
+
+
+def _benchmark(name, function, timestamps, baseline=None):
+  """Times a parsing function over a list of timestamps.
+
+  Args:
+    name: Name to report.
+    function: Function parsing a single timestamp.
+    timestamps: List of timestamps to parse.
+    baseline: Seconds taken by the baseline, to report the speed-up.
+
+  Returns:
+    Best time in seconds.
+  """
+  seconds = min(timeit.repeat(
+      lambda: [function(timestamp) for timestamp in timestamps],
+      number=1,
+      repeat=_REPEAT))
+
+  speed_up = f'  {baseline / seconds:6.1f}x' if baseline else ''
+  print(
+      f'{name:<40} {seconds * 1000:9.2f} ms '
+      f'{seconds / len(timestamps) * 1e6:7.3f} us/timestamp{speed_up}')
+  return seconds
+
+
+def main():
+  """Runs the benchmarks and prints the results."""
+  sleep_timestamps = _get_sleep_timestamps()
+  for timestamp in sleep_timestamps:
+    assert (timestamp_helper.get_hour(timestamp)
+            == _get_hour_dateutil(timestamp))
+
+  print(f'Sleep: {len(sleep_timestamps)} timestamps')
+  baseline = _benchmark(
+      'dateutil.parser.parse + strftime', _get_hour_dateutil, sleep_timestamps)
+  _benchmark(
+      'timestamp_helper.get_hour',
+      timestamp_helper.get_hour,
+      sleep_timestamps,
+      baseline)
+
+  heart_rate_timestamps = _get_heart_rate_timestamps()
+  for timestamp in heart_rate_timestamps[:1000]:
+    assert (timestamp_helper.get_epoch_and_timezone(timestamp)
+            == _get_epoch_and_timezone_fromisoformat(timestamp))
+
+  print(f'\nHeart rate: {len(heart_rate_timestamps)} timestamps')
+  baseline = _benchmark(
+      'dateutil.parser.parse + timestamp',
+      lambda timestamp: int(parser.parse(timestamp).timestamp()),
+      heart_rate_timestamps)
+  _benchmark(
+      'datetime.fromisoformat + timestamp',
+      _get_epoch_and_timezone_fromisoformat,
+      heart_rate_timestamps,
+      baseline)
+  _benchmark(
+      'timestamp_helper.get_epoch_and_timezone',
+      timestamp_helper.get_epoch_and_timezone,
+      heart_rate_timestamps,
+      baseline)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,694 @@
+"""Runs a local fake Oura API server, for load and fault-injection testing.
+
+Every OuraEndpoint is served, including the v1 bedtime endpoint, with
+synthetic documents generated from the recorded fixtures for the requested
+dates. API v2 responses are paginated with `next_token`. Latency, rate limited
+responses and truncated or malformed bodies can be injected.
+
+Webhook subscriptions are served as well. Documents can be changed with
+post_event, which notifies every subscribed callback URL like Oura does.
+
+Point the integration to it with the `base_url` option:
+
+  sensor:
+    - platform: oura
+      access_token: fake
+      base_url: http://127.0.0.1:8765
+
+Usage (from the repository root):
+  python benchmarks/fake_oura_server.py [--port 8765] [--latency 0.2]
+      [--rate-limit-ratio 0.1] [--truncated-ratio 0.05]
+      [--client-secret secret] [--event-interval 60]
+"""
+
+import argparse
+import asyncio
+import collections
+import datetime
+import functools
+import json
+import logging
+import os
+import random
+import sys
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payloads  # noqa: E402
+from custom_components.oura import api  # noqa: E402
+from custom_components.oura import webhook  # noqa: E402
+
+_DEFAULT_HOST = '127.0.0.1'
+_DEFAULT_PORT = 0
+_DEFAULT_CLI_PORT = 8765
+_DEFAULT_RETRY_AFTER = 1
+_DEFAULT_SUBSCRIPTION_DAYS = 30
+
+_HTTP_BAD_REQUEST = 400
+_HTTP_UNAUTHORIZED = 401
+_HTTP_NOT_FOUND = 404
+_HTTP_TOO_MANY_REQUESTS = 429
+
+_HEART_RATE_SAMPLES_PER_DAY = 24 * 12
+
+_WEBHOOK_TIMEOUT = 10
+
+# Complete body which is not valid JSON, as returned by some proxies.
+_MALFORMED_BODY = b'<html><body>502 Bad Gateway</body></html>'
+
+
+@functools.lru_cache(maxsize=64)
+def _get_documents(endpoint, start_date, end_date):
+  """Gets the synthetic documents of an endpoint for a range of days.
+
+  Args:
+    endpoint: OuraEndpoint.
+    start_date: First day (datetime.date).
+    end_date: Last day (datetime.date).
+
+  Returns:
+    List of Oura documents, oldest first. It must not be modified.
+  """
+  days = (end_date - start_date).days + 1
+  if days <= 0:
+    return []
+
+  if endpoint == api.OuraEndpoints.HEART_RATE:
+    return payloads.generate_heart_rate_samples(
+        end_date, days * _HEART_RATE_SAMPLES_PER_DAY)
+  return payloads.generate_documents(endpoint, end_date, days)
+
+
+def _get_date_param(query, names, default):
+  """Gets a day from the first query parameter present.
+
+  Args:
+    query: Query parameters of the request.
+    names: Names of the parameters holding the day, by preference.
+    default: Day to use when no parameter is present.
+
+  Returns:
+    Day (datetime.date).
+
+  Raises:
+    ValueError: If the parameter is not a valid day or timestamp.
+  """
+  for name in names:
+    if query.get(name):
+      return datetime.date.fromisoformat(query[name][:10])
+  return default
+
+
+def _get_document_id_day(document_id):
+  """Gets the day of a synthetic document from its id.
+
+  Args:
+    document_id: Oura id generated by payloads.generate_documents.
+
+  Returns:
+    Day (datetime.date). None if the id was not generated.
+  """
+  try:
+    return datetime.date.fromordinal(int(document_id[-8:]))
+  except ValueError:
+    return None
+
+
+class FakeOuraServer(object):
+  """Local stand-in for Oura API.
+
+  Properties:
+    base_url: URL to use as `base_url` of the integration.
+    stats: counters of the requests served.
+    subscriptions: webhook subscriptions, by id.
+
+  Methods:
+    async_post_event: changes a document and notifies the subscriptions.
+    async_start: starts serving requests.
+    async_stop: stops serving requests.
+    get_document: gets the current document of an endpoint for a day.
+  """
+
+  def __init__(
+          self,
+          host=_DEFAULT_HOST,
+          port=_DEFAULT_PORT,
+          access_token=None,
+          page_size=payloads.DEFAULT_PAGE_SIZE,
+          latency=0,
+          latency_jitter=0,
+          rate_limit_ratio=0,
+          retry_after=_DEFAULT_RETRY_AFTER,
+          truncated_ratio=0,
+          malformed_ratio=0,
+          seed=None,
+          client_secret=None,
+          subscription_days=_DEFAULT_SUBSCRIPTION_DAYS):
+    """Instantiates a new FakeOuraServer class.
+
+    Args:
+      host: Host to listen on.
+      port: Port to listen on. A free port is picked if 0.
+      access_token: Only token accepted. Any token is accepted if empty.
+      page_size: Maximum number of documents per API v2 page.
+      latency: Seconds to wait before answering any request.
+      latency_jitter: Maximum random seconds added to the latency.
+      rate_limit_ratio: Ratio of requests answered with 429 Too Many Requests.
+      retry_after: Seconds requested by the Retry-After header of 429s.
+      truncated_ratio: Ratio of responses whose connection is closed half way
+        through the body.
+      malformed_ratio: Ratio of responses whose body is not valid JSON.
+      seed: Seed of the random faults and latencies, for repeatable runs.
+      client_secret: Only client secret accepted by the webhook subscription
+        API, also used to sign events. Any secret is accepted and events are
+        not signed if empty, so the integration rejects them.
+      subscription_days: Days until webhook subscriptions expire.
+    """
+    self._host = host
+    self._port = port
+    self._access_token = access_token
+    self._page_size = page_size
+    self._latency = latency
+    self._latency_jitter = latency_jitter
+    self._rate_limit_ratio = rate_limit_ratio
+    self._retry_after = retry_after
+    self._truncated_ratio = truncated_ratio
+    self._malformed_ratio = malformed_ratio
+    self._random = random.Random(seed)
+    self._client_secret = client_secret
+    self._subscription_lifetime = datetime.timedelta(days=subscription_days)
+
+    # Webhook subscriptions by id, and documents changed by events by endpoint
+    # and id. Deleted documents are None.
+    self._subscriptions = {}
+    self._changed_documents = collections.defaultdict(dict)
+
+    self._runner = None
+    self._base_url = None
+    self._stats = collections.Counter()
+
+  @property
+  def base_url(self):
+    """Returns the URL to use as `base_url` of the integration."""
+    return self._base_url
+
+  @property
+  def stats(self):
+    """Returns the counters of the requests served.
+
+    Keys are `requests`, `documents`, `bytes` and one per injected fault or
+    error status (e.g. `429`, `truncated`).
+    """
+    return self._stats
+
+  @property
+  def subscriptions(self):
+    """Returns the webhook subscriptions, by id."""
+    return self._subscriptions
+
+  def _create_app(self):
+    """Creates the web application serving every OuraEndpoint."""
+    app = web.Application()
+    for endpoint in api.OuraEndpoints:
+      app.router.add_get(
+          api.get_endpoint_path(endpoint),
+          functools.partial(self._async_handle_request, endpoint))
+      if not api.is_legacy_endpoint(endpoint):
+        app.router.add_get(
+            api.get_endpoint_path(endpoint) + '/{document_id}',
+            functools.partial(self._async_handle_document_request, endpoint))
+
+    app.router.add_get(
+        webhook.SUBSCRIPTION_PATH, self._async_handle_list_subscriptions)
+    app.router.add_post(
+        webhook.SUBSCRIPTION_PATH, self._async_handle_create_subscription)
+    app.router.add_put(
+        webhook.SUBSCRIPTION_PATH + '/renew/{subscription_id}',
+        self._async_handle_renew_subscription)
+    app.router.add_delete(
+        webhook.SUBSCRIPTION_PATH + '/{subscription_id}',
+        self._async_handle_delete_subscription)
+    return app
+
+  async def async_start(self):
+    """Starts serving requests.
+
+    Returns:
+      Base URL of the server.
+    """
+    self._runner = web.AppRunner(self._create_app())
+    await self._runner.setup()
+    site = web.TCPSite(self._runner, self._host, self._port)
+    await site.start()
+
+    (host, port) = self._runner.addresses[0][:2]
+    self._base_url = f'http://{host}:{port}'
+    return self._base_url
+
+  async def async_stop(self):
+    """Stops serving requests."""
+    if self._runner:
+      await self._runner.cleanup()
+      self._runner = None
+
+  async def __aenter__(self):
+    await self.async_start()
+    return self
+
+  async def __aexit__(self, *args):
+    await self.async_stop()
+
+  def _is_authorized(self, endpoint, request):
+    """Checks the token of a request, as sent for its API version."""
+    if api.is_legacy_endpoint(endpoint):
+      token = request.query.get('access_token')
+    else:
+      (_, _, token) = request.headers.get('Authorization', '').partition(
+          'Bearer ')
+
+    if not token:
+      return False
+    return not self._access_token or token == self._access_token
+
+  def _is_client_authorized(self, request):
+    """Checks the client credentials of a webhook subscription request."""
+    client_secret = request.headers.get('x-client-secret')
+    if not request.headers.get('x-client-id') or not client_secret:
+      return False
+    return not self._client_secret or client_secret == self._client_secret
+
+  def _get_error_response(self, status, detail, headers=None):
+    """Creates a JSON error response, shaped like Oura's."""
+    self._stats[str(status)] += 1
+    return web.json_response(
+        {'status': status, 'detail': detail}, status=status, headers=headers)
+
+  def _get_page(self, endpoint, request):
+    """Gets the page of documents requested.
+
+    Args:
+      endpoint: OuraEndpoint.
+      request: Web request.
+
+    Returns:
+      Oura API response.
+
+    Raises:
+      ValueError: If a query parameter is not valid.
+    """
+    end_date = _get_date_param(
+        request.query, ('end_date', 'end_datetime', 'end'),
+        datetime.date.today())
+    start_date = _get_date_param(
+        request.query, ('start_date', 'start_datetime', 'start'),
+        end_date - datetime.timedelta(days=1))
+    documents = self._get_current_documents(endpoint, start_date, end_date)
+
+    data_param = api.get_data_param(endpoint)
+    if api.is_legacy_endpoint(endpoint):
+      return {data_param: documents}
+
+    offset = int(request.query.get('next_token') or 0)
+    next_offset = offset + self._page_size
+    return {
+        data_param: documents[offset:next_offset],
+        'next_token': (
+            str(next_offset) if next_offset < len(documents) else None),
+    }
+
+  def _get_current_documents(self, endpoint, start_date, end_date):
+    """Gets the documents of a range of days, with the changes of events.
+
+    Args:
+      endpoint: OuraEndpoint.
+      start_date: First day (datetime.date).
+      end_date: Last day (datetime.date).
+
+    Returns:
+      List of Oura documents, oldest first. It must not be modified.
+    """
+    documents = _get_documents(endpoint, start_date, end_date)
+    changed_documents = self._changed_documents.get(endpoint)
+    if not changed_documents:
+      return documents
+
+    current_documents = []
+    for document in documents:
+      document_id = document.get('id')
+      if document_id not in changed_documents:
+        current_documents.append(document)
+      elif changed_documents[document_id]:
+        current_documents.append(changed_documents[document_id])
+
+    # Documents created by events.
+    generated_ids = {document.get('id') for document in documents}
+    for document_id, document in changed_documents.items():
+      if (document and document_id not in generated_ids
+              and str(start_date) <= document.get('day', '') <= str(end_date)):
+        current_documents.append(document)
+    return current_documents
+
+  def get_document(self, endpoint, day):
+    """Gets the current document of an endpoint for a day.
+
+    Args:
+      endpoint: OuraEndpoint of API v2, except heart rate.
+      day: Day (datetime.date).
+
+    Returns:
+      Copy of the first document of the day. None if there is none.
+    """
+    documents = self._get_current_documents(endpoint, day, day)
+    return json.loads(json.dumps(documents[0])) if documents else None
+
+  def _find_document(self, endpoint, document_id):
+    """Finds a document by its id.
+
+    Args:
+      endpoint: OuraEndpoint.
+      document_id: Oura id of the document.
+
+    Returns:
+      Oura document. None if it does not exist.
+    """
+    changed_documents = self._changed_documents.get(endpoint, {})
+    if document_id in changed_documents:
+      return changed_documents[document_id]
+
+    day = _get_document_id_day(document_id)
+    if not day:
+      return None
+    for document in _get_documents(endpoint, day, day):
+      if document.get('id') == document_id:
+        return document
+    return None
+
+  async def async_post_event(self, endpoint, event_type, document):
+    """Changes a document and notifies the subscriptions, like Oura does.
+
+    Args:
+      endpoint: OuraEndpoint of the document.
+      event_type: create, update or delete.
+      document: New document, or the deleted one. It must have an id.
+
+    Returns:
+      Number of subscriptions which accepted the event.
+    """
+    document_id = document['id']
+    self._changed_documents[endpoint][document_id] = (
+        None if event_type == webhook.EVENT_DELETE else document)
+
+    data_type = webhook.ENDPOINT_DATA_TYPES[endpoint]
+    body = json.dumps({
+        'event_type': event_type,
+        'data_type': data_type,
+        'object_id': document_id,
+        'event_time': datetime.datetime.now(
+            datetime.timezone.utc).isoformat(),
+        'user_id': 'fake-user',
+    }).encode()
+
+    headers = {'Content-Type': 'application/json'}
+    if self._client_secret:
+      timestamp = str(int(datetime.datetime.now().timestamp()))
+      headers[webhook.TIMESTAMP_HEADER] = timestamp
+      headers[webhook.SIGNATURE_HEADER] = webhook.get_signature(
+          self._client_secret, timestamp, body)
+
+    accepted_events = 0
+    async with aiohttp.ClientSession() as session:
+      for subscription in list(self._subscriptions.values()):
+        if (subscription['event_type'] != event_type
+                or subscription['data_type'] != data_type):
+          continue
+
+        self._stats['events'] += 1
+        try:
+          async with session.post(
+                  subscription['callback_url'],
+                  data=body,
+                  headers=headers,
+                  timeout=aiohttp.ClientTimeout(
+                      total=_WEBHOOK_TIMEOUT)) as response:
+            if response.status < _HTTP_BAD_REQUEST:
+              accepted_events += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+          logging.warning(f'Unable to deliver event: {error!r}')
+    return accepted_events
+
+  async def _async_verify_callback(self, callback_url, verification_token):
+    """Checks that a callback URL answers the challenge of a subscription."""
+    challenge = uuid.uuid4().hex
+    try:
+      async with aiohttp.ClientSession() as session:
+        async with session.get(
+                callback_url,
+                params={
+                    'verification_token': verification_token,
+                    'challenge': challenge,
+                },
+                timeout=aiohttp.ClientTimeout(
+                    total=_WEBHOOK_TIMEOUT)) as response:
+          response_data = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+      return False
+    return (isinstance(response_data, dict)
+            and response_data.get('challenge') == challenge)
+
+  async def _async_handle_document_request(self, endpoint, request):
+    """Answers a request for a single document."""
+    self._stats['requests'] += 1
+    if not self._is_authorized(endpoint, request):
+      return self._get_error_response(
+          _HTTP_UNAUTHORIZED, 'Invalid or missing access token.')
+
+    document = self._find_document(
+        endpoint, request.match_info['document_id'])
+    if not document:
+      return self._get_error_response(_HTTP_NOT_FOUND, 'Document not found.')
+
+    self._stats['documents'] += 1
+    return web.json_response(document)
+
+  async def _async_handle_list_subscriptions(self, request):
+    """Answers a request for the webhook subscriptions."""
+    self._stats['requests'] += 1
+    if not self._is_client_authorized(request):
+      return self._get_error_response(
+          _HTTP_UNAUTHORIZED, 'Invalid client credentials.')
+    return web.json_response(list(self._subscriptions.values()))
+
+  async def _async_handle_create_subscription(self, request):
+    """Creates a webhook subscription, once its callback URL is verified."""
+    self._stats['requests'] += 1
+    if not self._is_client_authorized(request):
+      return self._get_error_response(
+          _HTTP_UNAUTHORIZED, 'Invalid client credentials.')
+
+    try:
+      subscription_data = await request.json()
+      callback_url = subscription_data['callback_url']
+      event_type = subscription_data['event_type']
+      data_type = subscription_data['data_type']
+      verification_token = subscription_data['verification_token']
+    except (KeyError, TypeError, ValueError) as error:
+      return self._get_error_response(_HTTP_BAD_REQUEST, repr(error))
+
+    if not await self._async_verify_callback(
+            callback_url, verification_token):
+      return self._get_error_response(
+          _HTTP_BAD_REQUEST, 'Callback URL verification failed.')
+
+    subscription = {
+        'id': uuid.uuid4().hex,
+        'callback_url': callback_url,
+        'event_type': event_type,
+        'data_type': data_type,
+        'expiration_time': (
+            datetime.datetime.now(datetime.timezone.utc)
+            + self._subscription_lifetime).isoformat(),
+    }
+    self._subscriptions[subscription['id']] = subscription
+    self._stats['subscriptions'] += 1
+    return web.json_response(subscription, status=201)
+
+  async def _async_handle_renew_subscription(self, request):
+    """Moves the expiration time of a webhook subscription forward."""
+    self._stats['requests'] += 1
+    if not self._is_client_authorized(request):
+      return self._get_error_response(
+          _HTTP_UNAUTHORIZED, 'Invalid client credentials.')
+
+    subscription = self._subscriptions.get(
+        request.match_info['subscription_id'])
+    if not subscription:
+      return self._get_error_response(
+          _HTTP_NOT_FOUND, 'Subscription not found.')
+
+    subscription['expiration_time'] = (
+        datetime.datetime.now(datetime.timezone.utc)
+        + self._subscription_lifetime).isoformat()
+    self._stats['renewals'] += 1
+    return web.json_response(subscription)
+
+  async def _async_handle_delete_subscription(self, request):
+    """Deletes a webhook subscription."""
+    self._stats['requests'] += 1
+    if not self._is_client_authorized(request):
+      return self._get_error_response(
+          _HTTP_UNAUTHORIZED, 'Invalid client credentials.')
+
+    if not self._subscriptions.pop(
+            request.match_info['subscription_id'], None):
+      return self._get_error_response(
+          _HTTP_NOT_FOUND, 'Subscription not found.')
+    return web.Response(status=204)
+
+  async def _async_handle_request(self, endpoint, request):
+    """Answers a request to an endpoint, injecting the configured faults."""
+    self._stats['requests'] += 1
+
+    latency = self._latency + self._random.uniform(0, self._latency_jitter)
+    if latency:
+      await asyncio.sleep(latency)
+
+    if not self._is_authorized(endpoint, request):
+      return self._get_error_response(
+          _HTTP_UNAUTHORIZED, 'Invalid or missing access token.')
+
+    if self._random.random() < self._rate_limit_ratio:
+      return self._get_error_response(
+          _HTTP_TOO_MANY_REQUESTS, 'Too many requests.',
+          {'Retry-After': str(self._retry_after)})
+
+    try:
+      page = self._get_page(endpoint, request)
+    except ValueError as error:
+      return self._get_error_response(_HTTP_BAD_REQUEST, str(error))
+
+    self._stats['documents'] += len(page[api.get_data_param(endpoint)])
+    body = json.dumps(page).encode()
+
+    if self._random.random() < self._malformed_ratio:
+      self._stats['malformed'] += 1
+      body = _MALFORMED_BODY
+
+    elif self._random.random() < self._truncated_ratio:
+      # Announces the whole body, but drops the connection half way through.
+      self._stats['truncated'] += 1
+      response = web.StreamResponse(
+          headers={'Content-Type': 'application/json'})
+      response.content_length = len(body)
+      await response.prepare(request)
+      await response.write(body[:len(body) // 2])
+      request.transport.close()
+      return response
+
+    self._stats['bytes'] += len(body)
+    return web.Response(body=body, content_type='application/json')
+
+
+async def _async_post_update_events(server, interval, seed):
+  """Updates yesterday's document of a subscribed endpoint at every interval.
+
+  Args:
+    server: Running FakeOuraServer.
+    interval: Seconds between events.
+    seed: Seed of the endpoints picked, for repeatable runs.
+  """
+  event_random = random.Random(seed)
+  data_type_endpoints = {
+      data_type: endpoint
+      for endpoint, data_type in webhook.ENDPOINT_DATA_TYPES.items()
+  }
+
+  while True:
+    await asyncio.sleep(interval)
+
+    data_types = sorted({
+        subscription['data_type']
+        for subscription in server.subscriptions.values()
+        if subscription['event_type'] == webhook.EVENT_UPDATE
+    })
+    if not data_types:
+      continue
+
+    endpoint = data_type_endpoints[event_random.choice(data_types)]
+    document = server.get_document(
+        endpoint, datetime.date.today() - datetime.timedelta(days=1))
+    if not document:
+      continue
+
+    if isinstance(document.get('score'), int):
+      document['score'] = (document['score'] + 1) % 100
+    accepted_events = await server.async_post_event(
+        endpoint, webhook.EVENT_UPDATE, document)
+    print(f'Updated {endpoint.name} {document["id"]} '
+          f'({accepted_events} events accepted)')
+
+
+async def _async_main(args):
+  """Runs the server until interrupted."""
+  server = FakeOuraServer(
+      args.host,
+      args.port,
+      args.access_token,
+      args.page_size,
+      args.latency,
+      args.latency_jitter,
+      args.rate_limit_ratio,
+      args.retry_after,
+      args.truncated_ratio,
+      args.malformed_ratio,
+      args.seed,
+      args.client_secret,
+      args.subscription_days)
+
+  async with server:
+    print(f'Fake Oura API listening on {server.base_url}')
+    try:
+      if args.event_interval:
+        await _async_post_update_events(
+            server, args.event_interval, args.seed)
+      else:
+        await asyncio.Event().wait()
+    finally:
+      print(dict(server.stats))
+
+
+def main():
+  """Parses the arguments and runs the server."""
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--host', default=_DEFAULT_HOST)
+  parser.add_argument('--port', type=int, default=_DEFAULT_CLI_PORT)
+  parser.add_argument('--access-token')
+  parser.add_argument(
+      '--page-size', type=int, default=payloads.DEFAULT_PAGE_SIZE)
+  parser.add_argument('--latency', type=float, default=0)
+  parser.add_argument('--latency-jitter', type=float, default=0)
+  parser.add_argument('--rate-limit-ratio', type=float, default=0)
+  parser.add_argument('--retry-after', type=int, default=_DEFAULT_RETRY_AFTER)
+  parser.add_argument('--truncated-ratio', type=float, default=0)
+  parser.add_argument('--malformed-ratio', type=float, default=0)
+  parser.add_argument('--seed', type=int)
+  parser.add_argument('--client-secret')
+  parser.add_argument(
+      '--subscription-days', type=int, default=_DEFAULT_SUBSCRIPTION_DAYS)
+  parser.add_argument('--event-interval', type=float, default=0)
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  try:
+    asyncio.run(_async_main(args))
+  except KeyboardInterrupt:
+    pass
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,238 @@
+"""Runs Oura sensors without a running Home-Assistant instance.
+
+Sensors are built with a minimal fake hass object and a stub coordinator,
+whose API serves pre-generated pages instead of calling Oura. Home-Assistant
+must still be installed, as the sensor modules import it.
+"""
+
+import time
+import tracemalloc
+
+import voluptuous as vol
+from homeassistant import const
+from custom_components.oura import const as oura_const
+from custom_components.oura import profiler
+from custom_components.oura import sensor_activity
+from custom_components.oura import sensor_bedtime
+from custom_components.oura import sensor_heart_rate
+from custom_components.oura import sensor_readiness
+from custom_components.oura import sensor_sessions
+from custom_components.oura import sensor_sleep
+from custom_components.oura import sensor_sleep_periods
+from custom_components.oura import sensor_sleep_score
+from custom_components.oura import sensor_workouts
+
+_ACCESS_TOKEN = 'benchmark'
+
+# Map of sensor names to their module and class.
+SENSORS = {
+    sensor_activity.CONF_KEY_NAME: (
+        sensor_activity, sensor_activity.OuraActivitySensor),
+    sensor_bedtime.CONF_KEY_NAME: (
+        sensor_bedtime, sensor_bedtime.OuraBedtimeSensor),
+    sensor_heart_rate.CONF_KEY_NAME: (
+        sensor_heart_rate, sensor_heart_rate.OuraHeartRateSensor),
+    sensor_readiness.CONF_KEY_NAME: (
+        sensor_readiness, sensor_readiness.OuraReadinessSensor),
+    sensor_sessions.CONF_KEY_NAME: (
+        sensor_sessions, sensor_sessions.OuraSessionsSensor),
+    sensor_sleep.CONF_KEY_NAME: (
+        sensor_sleep, sensor_sleep.OuraSleepSensor),
+    sensor_sleep_periods.CONF_KEY_NAME: (
+        sensor_sleep_periods, sensor_sleep_periods.OuraSleepPeriodsSensor),
+    sensor_sleep_score.CONF_KEY_NAME: (
+        sensor_sleep_score, sensor_sleep_score.OuraSleepScoreSensor),
+    sensor_workouts.CONF_KEY_NAME: (
+        sensor_workouts, sensor_workouts.OuraWorkoutsSensor),
+}
+
+# Pipeline stages, in order.
+STAGES = ('parse', 'map', 'filter', 'state')
+
+
+class FakeHass(object):
+  """Minimal stand-in for the Home-Assistant object used by sensors."""
+
+  def __init__(self):
+    """Instantiates a new FakeHass class."""
+    self.data = {}
+
+
+class StubApi(object):
+  """Serves pre-generated pages instead of calling Oura API."""
+
+  def __init__(self, pages):
+    """Instantiates a new StubApi class.
+
+    Args:
+      pages: Map of OuraEndpoints to the list of pages to serve.
+    """
+    self._pages = pages
+
+  async def async_get_oura_data_pages(
+          self, endpoint, start_date, end_date=None):
+    """Yields the pages of an endpoint, ignoring the dates."""
+    for page in self._pages.get(endpoint, []):
+      yield page
+
+
+class StubCoordinator(object):
+  """Coordinator which only provides the stub API to sensors."""
+
+  def __init__(self, stub_api):
+    """Instantiates a new StubCoordinator class.
+
+    Args:
+      stub_api: StubApi to provide to sensors.
+    """
+    self._api = stub_api
+    self._profiler = profiler.OuraProfiler()
+
+  @property
+  def api(self):
+    """Returns the StubApi."""
+    return self._api
+
+  @property
+  def profiler(self):
+    """Returns a disabled OuraProfiler."""
+    return self._profiler
+
+  def register_sensor(self, sensor):
+    """Does nothing, as sensors are driven by the harness."""
+
+  def unregister_sensor(self, sensor):
+    """Does nothing, as sensors are driven by the harness."""
+
+
+def create_sensor(sensor_name, sensor_config, pages):
+  """Creates a sensor with a fake hass and a stub API.
+
+  Args:
+    sensor_name: Name of the sensor (key of SENSORS).
+    sensor_config: Configuration of the sensor, before validation.
+    pages: Map of OuraEndpoints to the list of pages to serve.
+
+  Returns:
+    Oura sensor.
+  """
+  (sensor_module, sensor_class) = SENSORS[sensor_name]
+
+  hass = FakeHass()
+  hass.data[oura_const.DOMAIN] = {_ACCESS_TOKEN: StubCoordinator(StubApi(pages))}
+
+  config = {
+      const.CONF_ACCESS_TOKEN: _ACCESS_TOKEN,
+      const.CONF_SENSORS: {
+          sensor_name: vol.Schema(sensor_module.CONF_SCHEMA)(sensor_config),
+      },
+  }
+  return sensor_class(config, hass)
+
+
+async def async_fetch_pages(sensor):
+  """Fetches all the pages of a sensor from its API.
+
+  Args:
+    sensor: Oura sensor.
+
+  Returns:
+    List of pages.
+  """
+  (start_date, end_date) = sensor.monitored_date_range
+  return [
+      page async for page in sensor.get_sensor_data_pages_from_api(
+          start_date, end_date)
+  ]
+
+
+def _run_pipeline(sensor, pages, stage_callback):
+  """Runs the sensor pipeline on some pages, one stage at a time.
+
+  Args:
+    sensor: Oura sensor.
+    pages: List of Oura API pages.
+    stage_callback: Function called with the name of each stage and a
+      function running it. Returns the result of that function.
+  """
+
+  def _parse():
+    sensor_data = {}
+    for page in pages:
+      sensor_data = sensor.merge_sensor_data(
+          sensor_data, sensor.parse_sensor_data(page))
+    return sensor_data
+
+  def _map():
+    return sensor._map_data_to_monitored_days(
+        sensor_data, sensor._empty_sensor)
+
+  def _filter():
+    sensor._on_demand_attributes = sensor._filter_variables(
+        dated_attributes, sensor._on_demand_variables)
+    return sensor._filter_monitored_variables(dated_attributes)
+
+  def _state():
+    sensor._update_state(dated_attributes)
+    sensor._attributes = filtered_attributes
+    return sensor._get_fingerprint()
+
+  sensor_data = stage_callback('parse', _parse)
+  dated_attributes = stage_callback('map', _map)
+  filtered_attributes = stage_callback('filter', _filter)
+  stage_callback('state', _state)
+
+
+def measure_time(sensor, pages, repeat=3):
+  """Measures the best time of each stage of the sensor pipeline.
+
+  Args:
+    sensor: Oura sensor.
+    pages: List of Oura API pages.
+    repeat: Number of runs.
+
+  Returns:
+    Map of stages to their best time in seconds.
+  """
+  times = {}
+
+  def _time_stage(stage, run_stage):
+    start_time = time.perf_counter()
+    result = run_stage()
+    elapsed_time = time.perf_counter() - start_time
+    times[stage] = min(times.get(stage, elapsed_time), elapsed_time)
+    return result
+
+  for _ in range(repeat):
+    _run_pipeline(sensor, pages, _time_stage)
+  return times
+
+
+def measure_peak_memory(sensor, pages):
+  """Measures the peak memory allocated by each stage of the sensor pipeline.
+
+  Memory is traced in a separate run, as tracing slows down the code.
+
+  Args:
+    sensor: Oura sensor.
+    pages: List of Oura API pages.
+
+  Returns:
+    Map of stages to their peak allocated memory in bytes.
+  """
+  peaks = {}
+
+  def _trace_stage(stage, run_stage):
+    tracemalloc.reset_peak()
+    (start_memory, _) = tracemalloc.get_traced_memory()
+    result = run_stage()
+    (_, peak_memory) = tracemalloc.get_traced_memory()
+    peaks[stage] = peak_memory - start_memory
+    return result
+
+  tracemalloc.start()
+  try:
+    _run_pipeline(sensor, pages, _trace_stage)
+  finally:
+    tracemalloc.stop()
+  return peaks
@@ -0,0 +1,198 @@
+"""Generates Oura API payloads of any size from recorded fixtures.
+
+Each file in fixtures/ holds one document recorded from an Oura endpoint
+(anonymised). Payloads are built by copying that document for every day
+requested, moving its days and timestamps, so their shape and size match real
+Oura responses.
+"""
+
+import datetime
+import json
+import os
+
+from custom_components.oura import api
+from custom_components.oura import transport
+
+_FIXTURES_PATH = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Fields holding a day (YYYY-MM-DD).
+_DAY_FIELDS = ('date', 'day')
+
+# Fields holding a timestamp, at any nesting level.
+_TIMESTAMP_FIELDS = (
+    'bedtime_end',
+    'bedtime_start',
+    'end_datetime',
+    'start_datetime',
+    'timestamp',
+)
+
+_HEART_RATE_INTERVAL = datetime.timedelta(minutes=5)
+_HEART_RATE_SOURCES = ('awake', 'awake', 'awake', 'rest', 'session', 'workout')
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def get_endpoint_name(endpoint):
+  """Gets the name of the fixture of an endpoint.
+
+  Args:
+    endpoint: OuraEndpoint.
+
+  Returns:
+    Last part of the endpoint URL (e.g. daily_sleep).
+  """
+  return endpoint.value.rsplit('/', 1)[-1]
+
+
+def load_fixture(endpoint):
+  """Loads the recorded document of an endpoint.
+
+  Args:
+    endpoint: OuraEndpoint.
+
+  Returns:
+    Oura document.
+  """
+  fixture_path = os.path.join(
+      _FIXTURES_PATH, f'{get_endpoint_name(endpoint)}.json')
+  with open(fixture_path) as fixture_file:
+    return json.load(fixture_file)
+
+
+def _move_document(document, delta, day):
+  """Copies a document, moving it to another day.
+
+  Args:
+    document: Oura document or nested object.
+    delta: Time to move its timestamps (timedelta).
+    day: New day of the document (YYYY-MM-DD).
+
+  Returns:
+    Moved copy of the document.
+  """
+  moved_document = {}
+  for field, value in document.items():
+    if field in _DAY_FIELDS and isinstance(value, str):
+      value = day
+    elif field in _TIMESTAMP_FIELDS and isinstance(value, str):
+      value = (datetime.datetime.fromisoformat(value) + delta).isoformat()
+    elif isinstance(value, dict):
+      value = _move_document(value, delta, day)
+    moved_document[field] = value
+  return moved_document
+
+
+def generate_documents(endpoint, end_date, days):
+  """Generates one document per day for an endpoint.
+
+  Args:
+    endpoint: OuraEndpoint. Heart rate is not supported, see
+      generate_heart_rate_samples.
+    end_date: Last day to generate (datetime.date).
+    days: Number of days to generate.
+
+  Returns:
+    List of Oura documents, oldest first.
+  """
+  fixture = load_fixture(endpoint)
+  fixture_day = datetime.date.fromisoformat(
+      fixture.get('day') or fixture.get('date'))
+
+  documents = []
+  for days_ago in range(days - 1, -1, -1):
+    day = end_date - datetime.timedelta(days=days_ago)
+    document = _move_document(fixture, day - fixture_day, str(day))
+    if 'id' in document:
+      document['id'] = f'{fixture["id"][:-8]}{day.toordinal():08d}'
+    documents.append(document)
+  return documents
+
+
+def generate_heart_rate_samples(end_date, samples):
+  """Generates heart rate samples every 5 minutes until the end of a day.
+
+  Args:
+    end_date: Day of the last sample (datetime.date).
+    samples: Number of samples to generate.
+
+  Returns:
+    List of heart rate samples, oldest first.
+  """
+  fixture = load_fixture(api.OuraEndpoints.HEART_RATE)
+  timezone = datetime.datetime.fromisoformat(fixture['timestamp']).tzinfo
+  last_timestamp = datetime.datetime.combine(
+      end_date, datetime.time(23, 55), timezone)
+
+  heart_rate_samples = []
+  for sample in range(samples - 1, -1, -1):
+    heart_rate_samples.append({
+        'bpm': 50 + (sample * 7) % 60,
+        'source': _HEART_RATE_SOURCES[sample % len(_HEART_RATE_SOURCES)],
+        'timestamp': (
+            last_timestamp - sample * _HEART_RATE_INTERVAL).isoformat(),
+    })
+  return heart_rate_samples
+
+
+def get_heart_rate_days(samples):
+  """Gets the number of days covered by heart rate samples.
+
+  Args:
+    samples: Number of samples, 5 minutes apart.
+
+  Returns:
+    Number of days.
+  """
+  samples_per_day = datetime.timedelta(days=1) // _HEART_RATE_INTERVAL
+  return -(-samples // samples_per_day)
+
+
+def paginate(endpoint, documents, page_size=DEFAULT_PAGE_SIZE):
+  """Splits documents into Oura API pages.
+
+  Args:
+    endpoint: OuraEndpoint.
+    documents: List of Oura documents.
+    page_size: Maximum number of documents per page. API v1 endpoints are not
+      paginated.
+
+  Returns:
+    List of Oura API responses, linked by their next_token.
+  """
+  data_param = api.get_data_param(endpoint)
+  if data_param != 'data':
+    return [{data_param: documents}]
+
+  pages = []
+  for offset in range(0, max(len(documents), 1), page_size):
+    next_offset = offset + page_size
+    pages.append({
+        'data': documents[offset:next_offset],
+        'next_token': (
+            str(next_offset) if next_offset < len(documents) else None),
+    })
+  return pages
+
+
+def load_cassette_pages(cassette_path):
+  """Loads the successful API pages recorded in a cassette.
+
+  Args:
+    cassette_path: Path of a cassette recorded by the `record` transport.
+
+  Returns:
+    Map of OuraEndpoints to their recorded pages, in the order they were
+    recorded.
+  """
+  endpoints = {
+      api.get_endpoint_path(endpoint): endpoint
+      for endpoint in api.OuraEndpoints
+  }
+
+  pages = {}
+  for interaction in transport.load_cassette(cassette_path):
+    endpoint = endpoints.get(interaction['path'])
+    if endpoint and interaction.get('status') == 200:
+      pages.setdefault(endpoint, []).append(json.loads(interaction['body']))
+  return pages
@@ -1,12 +1,62 @@
 """Provides an OuraApi class to handle interactions with Oura API."""
 
+import asyncio
 import enum
-import requests
+import logging
+import random
+import time
+import aiohttp
+from . import api_stats
+from . import circuit_breaker
+from . import const as oura_const
+from . import rate_limiter
+from . import transport as oura_transport
 from .helpers import hass_helper
 
 # Oura API config.
-_OURA_API_V1 = 'https://api.ouraring.com/v1'
-_OURA_API_V2 = 'https://api.ouraring.com/v2'
+_OURA_API_BASE = oura_const.DEFAULT_BASE_URL
+_OURA_API_V1 = '{}/v1'.format(_OURA_API_BASE)
+_OURA_API_V2 = '{}/v2'.format(_OURA_API_BASE)
+
+# Rate limiting config.
+_HTTP_TOO_MANY_REQUESTS = 429
+_DEFAULT_RETRY_AFTER = 60
+_MAX_RATE_LIMITED_ATTEMPTS = 3
+
+# Retries config.
+_BACKOFF_BASE = 1
+_BACKOFF_MAX = 30
+_HTTP_SERVER_ERROR = 500
+
+
+def _is_retryable_error(error):
+  """Checks whether a failed request can be retried.
+
+  Args:
+    error: Exception raised by the request.
+
+  Returns:
+    True for timeouts, connection and server errors. False, otherwise.
+  """
+  if isinstance(error, aiohttp.ClientResponseError):
+    return error.status >= _HTTP_SERVER_ERROR
+  return True
+
+
+def _get_backoff_delay(attempt):
+  """Gets the seconds to wait before retrying a failed request.
+
+  Uses exponential backoff with full jitter, so retries of several requests
+  do not happen at the same time.
+
+  Args:
+    attempt: Number of the attempt which failed, starting at 1.
+
+  Returns:
+    Seconds to wait.
+  """
+  return random.uniform(
+      0, min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (attempt - 1)))
 
 
 class OuraEndpoints(enum.Enum):
@@ -21,28 +71,215 @@ class OuraEndpoints(enum.Enum):
   WORKOUTS = '{}/usercollection/workout'.format(_OURA_API_V2)
 
 
+def get_data_param(endpoint):
+  """Gets the parameter of an endpoint response which holds the documents.
+
+  Args:
+    endpoint: OuraEndpoint.
+
+  Returns:
+    Name of the parameter holding the list of documents.
+  """
+  if endpoint == OuraEndpoints.BEDTIME:
+    return 'ideal_bedtimes'
+  return 'data'
+
+
+def get_endpoint_path(endpoint):
+  """Gets the path of an endpoint, relative to the Oura API base URL.
+
+  Args:
+    endpoint: OuraEndpoint.
+
+  Returns:
+    Path of the endpoint (e.g. /v2/usercollection/daily_activity).
+  """
+  return endpoint.value[len(_OURA_API_BASE):]
+
+
+def is_legacy_endpoint(endpoint):
+  """Checks whether an endpoint belongs to Oura API v1.
+
+  Args:
+    endpoint: OuraEndpoint.
+
+  Returns:
+    True for API v1 endpoints, which are not paginated. False, otherwise.
+  """
+  return endpoint.value.startswith(_OURA_API_V1)
+
+
 class OuraApi(object):
   """Handles Oura API interactions.
 
   Properties:
-    token_file_name: Name of the file that contains the sensor credentials.
+    circuit_breaker: OuraCircuitBreaker shared by all requests of the token.
+    rate_limiter: OuraRateLimiter shared by all requests of the token.
+    stats: OuraApiStats of all requests of the token.
 
   Methods:
-    get_oura_data: fetches data from Oura API for given endpoint.
+    async_get_oura_data_pages: fetches data pages from Oura API for given
+      endpoint.
+    async_get_oura_document: fetches a single document of an endpoint.
   """
 
-  def __init__(self, sensor, access_token):
+  def __init__(
+          self,
+          hass,
+          access_token,
+          connect_timeout=oura_const.DEFAULT_CONNECT_TIMEOUT,
+          read_timeout=oura_const.DEFAULT_READ_TIMEOUT,
+          max_retries=oura_const.DEFAULT_MAX_RETRIES,
+          base_url=oura_const.DEFAULT_BASE_URL,
+          transport=None):
     """Instantiates a new OuraApi class.
 
     Args:
-      sensor: Oura sensor to which this api is linked.
+      hass: Home-Assistant object.
       access_token: Personal access token.
+      connect_timeout: Seconds to wait for a connection to Oura.
+      read_timeout: Seconds to wait for Oura to send data.
+      max_retries: Times a failed request is retried.
+      base_url: Base URL of Oura API, e.g. to target a local fake server.
+      transport: Transport sending the requests, e.g. to record or replay
+        them. Requests are sent over HTTP if empty.
     """
-    self._sensor = sensor
+    self._hass = hass
     self._access_token = access_token
-    self._hass_url = hass_helper.get_url(self._sensor._hass)
+    self._hass_url = hass_helper.get_url(self._hass)
+    self._base_url = base_url.rstrip('/')
+    self._transport = transport or oura_transport.OuraHttpTransport(hass)
+
+    self._timeout = aiohttp.ClientTimeout(
+        sock_connect=connect_timeout, sock_read=read_timeout)
+    self._max_retries = max_retries
+
+    self._circuit_breaker = circuit_breaker.OuraCircuitBreaker()
+    self._rate_limiter = rate_limiter.OuraRateLimiter()
+    self._stats = api_stats.OuraApiStats()
+
+  @property
+  def circuit_breaker(self):
+    """Returns the OuraCircuitBreaker shared by all requests of the token."""
+    return self._circuit_breaker
+
+  @property
+  def rate_limiter(self):
+    """Returns the OuraRateLimiter shared by all requests of the token."""
+    return self._rate_limiter
+
+  @property
+  def stats(self):
+    """Returns the OuraApiStats of all requests of the token."""
+    return self._stats
+
+  def _get_api_url(self, endpoint):
+    """Gets the URL of an endpoint on the configured base URL.
+
+    Args:
+      endpoint: OuraEndpoint.
+
+    Returns:
+      URL to request.
+    """
+    return self._base_url + get_endpoint_path(endpoint)
 
-  def _get_oura_data_legacy(self, endpoint, start_date, end_date=None):
+  def _get_headers(self):
+    """Gets the headers authorizing requests to Oura API v2."""
+    return {
+        'Authorization': 'Bearer {}'.format(self._access_token)
+    }
+
+  def _get_retry_after(self, response):
+    """Gets the seconds to wait before retrying a rate limited request.
+
+    Args:
+      response: Rate limited response.
+
+    Returns:
+      Seconds to wait, as requested by the Retry-After header if present.
+    """
+    try:
+      return int(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+      return _DEFAULT_RETRY_AFTER
+
+  async def _async_request(self, endpoint, api_url, params, headers=None):
+    """Sends a GET request to Oura API.
+
+    Requests wait for the rate limiter. Rate limited responses pause the rate
+    limiter for the time requested by Oura and are sent again. Timeouts,
+    connection and server errors, as well as responses which are not valid
+    JSON, are retried with exponential backoff. No request is sent while the
+    circuit breaker is open.
+
+    Args:
+      endpoint: OuraEndpoint requested.
+      api_url: URL to request.
+      params: Query parameters.
+      headers: Request headers.
+
+    Returns:
+      Decoded JSON response.
+
+    Raises:
+      aiohttp.ClientError: If the request failed after all its attempts.
+      asyncio.TimeoutError: If the request timed out after all its attempts.
+      circuit_breaker.CircuitOpenError: If calls are stopped.
+    """
+    self._circuit_breaker.raise_if_open()
+
+    attempt = 1
+    rate_limited_attempt = 1
+    while True:
+      await self._rate_limiter.async_acquire()
+
+      start_time = time.monotonic()
+      response = None
+      try:
+        response = await self._transport.async_get(
+            api_url, params, headers, self._timeout)
+        self._stats.record_response(
+            endpoint, response.status, time.monotonic() - start_time,
+            len(response.body))
+        if (response.status != _HTTP_TOO_MANY_REQUESTS
+                or rate_limited_attempt >= _MAX_RATE_LIMITED_ATTEMPTS):
+          response.raise_for_status()
+          try:
+            response_data = response.json()
+          except ValueError as error:
+            # Truncated or malformed bodies are retried as any other transient
+            # error.
+            raise aiohttp.ClientPayloadError(
+                f'Invalid JSON response: {error}') from error
+          self._circuit_breaker.record_success()
+          return response_data
+
+        retry_after = self._get_retry_after(response)
+      except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        self._stats.record_error(endpoint, response is not None)
+        if attempt > self._max_retries or not _is_retryable_error(error):
+          self._circuit_breaker.record_failure()
+          raise
+
+        self._stats.record_retry(endpoint)
+
+        backoff_delay = _get_backoff_delay(attempt)
+        logging.debug(
+            f'Oura: Request to Oura API failed ({error!r}). '
+            f'Retrying in {backoff_delay:.1f}s.')
+        await asyncio.sleep(backoff_delay)
+        attempt += 1
+        continue
+
+      logging.warning(
+          f'Oura: Rate limited by Oura API. Retrying in {retry_after}s.')
+      self._rate_limiter.pause(retry_after)
+      self._stats.record_retry(endpoint)
+      rate_limited_attempt += 1
+
+  async def _async_get_oura_data_legacy(
+          self, endpoint, start_date, end_date=None):
     """Fetches data for a OuraEndpoint and date for API v1.
 
     Args:
@@ -53,7 +290,7 @@ class OuraApi(object):
     Returns:
       Dictionary containing Oura sleep data.
     """
-    api_url = endpoint.value
+    api_url = self._get_api_url(endpoint)
 
     params = {
         'access_token': self._access_token,
@@ -63,29 +300,30 @@ class OuraApi(object):
     if end_date:
       params['end'] = end_date
 
-    response = requests.get(api_url, params=params)
-    response_data = response.json()
-
-    return response_data
+    return await self._async_request(endpoint, api_url, params)
 
-  def get_oura_data(self, endpoint, start_date, end_date=None):
-    """Fetches data for a OuraEndpoint and date.
+  async def async_get_oura_data_pages(
+          self, endpoint, start_date, end_date=None):
+    """Fetches data for a OuraEndpoint and date, one page at a time.
 
-    TODO: detect whether data was retrieved.
-    TODO: detect whether next_token is present. If yes, fetch and combine.
+    Pages are requested lazily, following the `next_token` of each page, so
+    callers can process a page before the next one is downloaded.
 
     Args:
       start_date: Day for which to fetch data(YYYY-MM-DD).
       end_date: Last day for which to retrieve data(YYYY-MM-DD).
         If same as start_date, leave empty.
 
-    Returns:
-      Dictionary containing Oura sleep data.
+    Yields:
+      Dictionary containing a page of Oura data.
     """
-    api_url = endpoint.value
+    api_url = self._get_api_url(endpoint)
 
-    if _OURA_API_V1 in api_url:
-      return self._get_oura_data_legacy(endpoint, start_date, end_date)
+    if is_legacy_endpoint(endpoint):
+      # API v1 does not paginate its responses.
+      yield await self._async_get_oura_data_legacy(
+          endpoint, start_date, end_date)
+      return
 
     params = {}
     if start_date:
@@ -93,11 +331,45 @@ class OuraApi(object):
     if end_date:
       params['end_date'] = end_date
 
-    headers = {
-        'Authorization': 'Bearer {}'.format(self._access_token)
-    }
+    headers = self._get_headers()
+
+    while True:
+      response_data = await self._async_request(
+          endpoint, api_url, params, headers)
 
-    response = requests.get(api_url, params=params, headers=headers)
-    response_data = response.json()
+      yield response_data
+
+      next_token = (
+          response_data.get('next_token')
+          if isinstance(response_data, dict) else None)
+      if not next_token:
+        return
+
+      params['next_token'] = next_token
+
+  async def async_get_oura_document(self, endpoint, document_id):
+    """Fetches a single document of an endpoint by its Oura id.
+
+    Args:
+      endpoint: OuraEndpoint of API v2.
+      document_id: Oura id of the document.
+
+    Returns:
+      Oura document.
+
+    Raises:
+      aiohttp.ClientError: If the request failed after all its attempts.
+      asyncio.TimeoutError: If the request timed out after all its attempts.
+      circuit_breaker.CircuitOpenError: If calls are stopped.
+      ValueError: If the endpoint belongs to API v1 or the response is not a
+        document.
+    """
+    if is_legacy_endpoint(endpoint):
+      raise ValueError(f'{endpoint.name} documents can not be fetched by id.')
 
-    return response_data
+    api_url = '{}/{}'.format(self._get_api_url(endpoint), document_id)
+    document = await self._async_request(
+        endpoint, api_url, {}, self._get_headers())
+    if not isinstance(document, dict):
+      raise ValueError(f'Unexpected {endpoint.name} document: {document!r}')
+    return document
@@ -0,0 +1,166 @@
+"""Provides an OuraApiStats class with statistics of Oura API requests."""
+
+import collections
+import time
+from .helpers import histogram_helper
+
+# Latest latencies kept per endpoint to compute percentiles.
+_MAX_LATENCY_SAMPLES = 1000
+
+_LATENCY_PERCENTILES = (50, 90, 99)
+
+# Upper bounds of the latency (seconds) and response size (bytes) histograms.
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2)
+
+_HTTP_TOO_MANY_REQUESTS = 429
+
+
+def _get_percentile(sorted_values, percentile):
+  """Gets a percentile of some values, by the nearest-rank method.
+
+  Args:
+    sorted_values: Sorted list of values. It must not be empty.
+    percentile: Percentile to get, from 0 to 100.
+
+  Returns:
+    Value at the percentile.
+  """
+  rank = max(1, -(-len(sorted_values) * percentile // 100))
+  return sorted_values[rank - 1]
+
+
+class OuraApiStats(object):
+  """Statistics of the requests sent to each Oura endpoint.
+
+  Properties:
+    endpoints: map of OuraEndpoints to their raw statistics.
+
+  Methods:
+    as_dict: gets the statistics of every endpoint.
+    get_received_bytes: gets the bytes received from an endpoint.
+    record_error: records a failed request.
+    record_response: records a response.
+    record_retry: records a request sent again after a failure.
+  """
+
+  def __init__(self):
+    """Instantiates a new OuraApiStats class."""
+    # Map of OuraEndpoints to their statistics.
+    self._endpoints = {}
+
+  def _get_endpoint_stats(self, endpoint):
+    """Gets the statistics of an endpoint, creating them if new."""
+    endpoint_stats = self._endpoints.get(endpoint)
+    if endpoint_stats is None:
+      endpoint_stats = self._endpoints[endpoint] = {
+          'requests': 0,
+          'errors': 0,
+          'rate_limited': 0,
+          'retries': 0,
+          'received_bytes': 0,
+          'max_response_bytes': 0,
+          'status_codes': collections.Counter(),
+          'latencies': collections.deque(maxlen=_MAX_LATENCY_SAMPLES),
+          'latency_histogram': histogram_helper.Histogram(_LATENCY_BUCKETS),
+          'size_histogram': histogram_helper.Histogram(_SIZE_BUCKETS),
+          'last_success': None,
+      }
+    return endpoint_stats
+
+  @property
+  def endpoints(self):
+    """Returns the map of OuraEndpoints to their raw statistics.
+
+    Besides the counters, each endpoint holds its `latency_histogram` and
+    `size_histogram` and the `last_success` timestamp (seconds since epoch).
+    """
+    return self._endpoints
+
+  def get_received_bytes(self, endpoint):
+    """Gets the bytes received from an endpoint.
+
+    Args:
+      endpoint: OuraEndpoint.
+
+    Returns:
+      Total size of the responses of the endpoint, in bytes.
+    """
+    return self._get_endpoint_stats(endpoint)['received_bytes']
+
+  def record_response(self, endpoint, status, latency, size):
+    """Records a response.
+
+    Args:
+      endpoint: OuraEndpoint requested.
+      status: HTTP status of the response.
+      latency: Seconds until the whole response was received.
+      size: Size of the response body, in bytes.
+    """
+    endpoint_stats = self._get_endpoint_stats(endpoint)
+    endpoint_stats['requests'] += 1
+    endpoint_stats['status_codes'][status] += 1
+    endpoint_stats['latencies'].append(latency)
+    endpoint_stats['latency_histogram'].observe(latency)
+    endpoint_stats['size_histogram'].observe(size)
+    endpoint_stats['received_bytes'] += size
+    endpoint_stats['max_response_bytes'] = max(
+        endpoint_stats['max_response_bytes'], size)
+    if status == _HTTP_TOO_MANY_REQUESTS:
+      endpoint_stats['rate_limited'] += 1
+    elif 200 <= status < 300:
+      endpoint_stats['last_success'] = time.time()
+
+  def record_error(self, endpoint, is_response_error):
+    """Records a failed request.
+
+    Args:
+      endpoint: OuraEndpoint requested.
+      is_response_error: Whether a response was received, with an error
+        status. Otherwise, the request timed out or could not connect.
+    """
+    endpoint_stats = self._get_endpoint_stats(endpoint)
+    endpoint_stats['errors'] += 1
+    if not is_response_error:
+      endpoint_stats['requests'] += 1
+
+  def record_retry(self, endpoint):
+    """Records a request sent again after a failure.
+
+    Args:
+      endpoint: OuraEndpoint requested.
+    """
+    self._get_endpoint_stats(endpoint)['retries'] += 1
+
+  def as_dict(self):
+    """Gets the statistics of every endpoint.
+
+    Returns:
+      Map of endpoint names to their request, error, rate limited and retry
+      counts, status codes, received bytes and latency percentiles (ms).
+    """
+    endpoints = {}
+    for endpoint, endpoint_stats in self._endpoints.items():
+      latencies = sorted(endpoint_stats['latencies'])
+      responses = sum(endpoint_stats['status_codes'].values())
+      endpoints[endpoint.name] = {
+          'requests': endpoint_stats['requests'],
+          'errors': endpoint_stats['errors'],
+          'rate_limited': endpoint_stats['rate_limited'],
+          'retries': endpoint_stats['retries'],
+          'status_codes': {
+              str(status): count
+              for status, count in endpoint_stats['status_codes'].items()
+          },
+          'received_bytes': endpoint_stats['received_bytes'],
+          'average_response_bytes': (
+              round(endpoint_stats['received_bytes'] / responses)
+              if responses else None),
+          'max_response_bytes': endpoint_stats['max_response_bytes'],
+          'latency_ms': {
+              f'p{percentile}': round(
+                  _get_percentile(latencies, percentile) * 1000, 1)
+              for percentile in _LATENCY_PERCENTILES
+          } if latencies else None,
+      }
+    return endpoints
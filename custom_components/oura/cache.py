@@ -0,0 +1,478 @@
+"""Provides an OuraCache class to persist Oura documents across restarts."""
+
+import collections
+import datetime
+import hashlib
+from homeassistant.helpers import storage
+from . import api
+from . import const as oura_const
+from .helpers import date_helper
+from .helpers import memory_helper
+from .helpers import series_helper
+
+_STORAGE_VERSION = 1
+
+# Seconds to wait before writing changes to disk, to group several writes. It
+# is shorter than the default scan interval, so changes are written between
+# update cycles instead of being postponed by every cycle.
+_SAVE_DELAY = 10
+
+# Endpoints whose documents are heart rate samples. They are cached as a
+# compact HeartRateSeries per day instead of one dictionary per sample.
+_SERIES_ENDPOINT_NAMES = (api.OuraEndpoints.HEART_RATE.name,)
+
+
+def get_token_id(access_token):
+  """Gets a short identifier of an access token which does not reveal it.
+
+  Args:
+    access_token: Personal access token.
+
+  Returns:
+    First 12 characters of the SHA-256 hash of the token.
+  """
+  return hashlib.sha256(access_token.encode()).hexdigest()[:12]
+
+
+def _get_document_day(document):
+  """Gets the day to which an Oura document belongs.
+
+  Args:
+    document: Oura document from any endpoint.
+
+  Returns:
+    Day of the document in YYYY-MM-DD. None if unknown.
+  """
+  day = document.get('day') or document.get('date')
+  if day:
+    return day
+
+  timestamp = document.get('timestamp')
+  if timestamp:
+    return timestamp[:10]
+
+  return None
+
+
+def _get_document_id(document, day):
+  """Gets a unique identifier for an Oura document within its day.
+
+  Args:
+    document: Oura document from any endpoint.
+    day: Day of the document in YYYY-MM-DD.
+
+  Returns:
+    Oura id of the document. Documents without id (e.g. heart rate samples or
+    bedtimes) are identified by their timestamp or their day.
+  """
+  return document.get('id') or document.get('timestamp') or day
+
+
+def _get_day_documents(day, day_data):
+  """Gets the cached documents of a day.
+
+  Args:
+    day: Day in YYYY-MM-DD.
+    day_data: Cached data of the day.
+
+  Returns:
+    List of Oura documents. Samples of series are built as documents.
+  """
+  documents = day_data['documents']
+  if isinstance(documents, series_helper.HeartRateSeries):
+    return documents.get(day, [])
+  return list(documents.values())
+
+
+class OuraCache(object):
+  """Persistent day-indexed store of Oura documents by endpoint.
+
+  Fetched days replace the cached ones, while documents notified by webhooks
+  are upserted by their Oura id. Heart rate samples are kept as a compact
+  series per day. Each endpoint keeps a high-water mark with the last day
+  successfully synced, and only days since then (plus an overlap) are fetched
+  again. Days fetched once they were older than the finality horizon are
+  complete and never fetched again.
+
+  Methods:
+    add_fetched_documents: adds a page of fetched documents to a map of days.
+    async_load: loads the cache from disk.
+    delete_document: drops a cached document deleted in Oura.
+    get_documents: gets all cached documents of a date range.
+    get_missing_date_ranges: gets the date ranges which need to be fetched.
+    get_statistics: gets the hit ratio and size of the cache of each endpoint.
+    iter_complete_documents: yields cached documents of complete days.
+    prune: drops cached days which are no longer required.
+    set_documents: replaces the cached days of a fetched date range.
+    upsert_document: merges a single document changed in Oura.
+  """
+
+  def __init__(self, hass, access_token, finality_days):
+    """Instantiates a new OuraCache class.
+
+    Args:
+      hass: Home-Assistant object.
+      access_token: Personal access token, used to identify the cache file.
+      finality_days: Days after which data is considered complete. It is also
+        the overlap fetched again before the high-water mark.
+    """
+    self._finality_days = finality_days
+
+    self._store = storage.Store(
+        hass, _STORAGE_VERSION,
+        f'{oura_const.DOMAIN}_cache_{get_token_id(access_token)}')
+
+    # Map of endpoint names to their high-water mark and cached days.
+    self._endpoints = None
+
+    # Map of endpoint names to the days served from the cache (hits) and
+    # fetched from Oura (misses).
+    self._hits = collections.Counter()
+    self._misses = collections.Counter()
+
+  def _get_data_to_save(self):
+    """Returns the data to write to disk, with series in JSON form."""
+    endpoints = {}
+    for endpoint_name, endpoint_cache in self._endpoints.items():
+      if endpoint_name not in _SERIES_ENDPOINT_NAMES:
+        endpoints[endpoint_name] = endpoint_cache
+        continue
+
+      endpoints[endpoint_name] = {
+          'high_water_mark': endpoint_cache['high_water_mark'],
+          'days': {
+              day: {
+                  'documents': day_data['documents'].as_dict(),
+                  'complete': day_data['complete'],
+              }
+              for day, day_data in endpoint_cache['days'].items()
+          },
+      }
+    return {'endpoints': endpoints}
+
+  def _create_day_documents(self, endpoint):
+    """Creates the empty documents of a day.
+
+    Args:
+      endpoint: OuraEndpoint.
+
+    Returns:
+      HeartRateSeries for series endpoints. Otherwise, a map of document ids
+      to documents.
+    """
+    if endpoint.name in _SERIES_ENDPOINT_NAMES:
+      return series_helper.HeartRateSeries()
+    return {}
+
+  def _get_endpoint_cache(self, endpoint):
+    """Gets the cached data of an endpoint.
+
+    Args:
+      endpoint: OuraEndpoint.
+
+    Returns:
+      Dictionary with the `high_water_mark` (YYYY-MM-DD) and the `days` map of
+      days (YYYY-MM-DD) to their documents and completeness. Documents are a
+      map of ids to documents, or a HeartRateSeries for series endpoints.
+    """
+    return self._endpoints.setdefault(
+        endpoint.name, {'high_water_mark': None, 'days': {}})
+
+  async def async_load(self):
+    """Loads the cache from disk, if not yet loaded."""
+    if self._endpoints is not None:
+      return
+
+    stored_data = await self._store.async_load()
+    self._endpoints = (stored_data or {}).get('endpoints', {})
+
+    for endpoint_name in _SERIES_ENDPOINT_NAMES:
+      endpoint_cache = self._endpoints.get(endpoint_name)
+      if not endpoint_cache:
+        continue
+
+      # Caches written before series were introduced hold raw samples, which
+      # are dropped so the endpoint is synced again.
+      if any('day_indexes' not in day_data['documents']
+             for day_data in endpoint_cache['days'].values()):
+        del self._endpoints[endpoint_name]
+        continue
+
+      for day_data in endpoint_cache['days'].values():
+        day_data['documents'] = series_helper.HeartRateSeries.from_dict(
+            day_data['documents'])
+
+  def _get_overlap_start_date(self, endpoint_cache):
+    """Gets the first day which must always be fetched for an endpoint.
+
+    Args:
+      endpoint_cache: Cached data of the endpoint.
+
+    Returns:
+      High-water mark minus the overlap (YYYY-MM-DD). None if never synced.
+    """
+    if not endpoint_cache['high_water_mark']:
+      return None
+
+    return date_helper.add_days_to_string_date(
+        endpoint_cache['high_water_mark'], -self._finality_days)
+
+  def _is_day_complete(self, endpoint_cache, day, overlap_start_date):
+    """Checks whether a day is complete and must not be fetched again.
+
+    Args:
+      endpoint_cache: Cached data of the endpoint.
+      day: Day to check (YYYY-MM-DD).
+      overlap_start_date: First day which must always be fetched.
+
+    Returns:
+      True if the day is complete. False, otherwise.
+    """
+    if not overlap_start_date or day >= overlap_start_date:
+      return False
+
+    day_data = endpoint_cache['days'].get(day)
+    return bool(day_data and day_data['complete'])
+
+  def iter_complete_documents(self, endpoint, start_date, end_date):
+    """Yields cached documents of the complete days in a date range.
+
+    Documents are yielded one day at a time, so samples of series are only
+    built as documents for one day at once.
+
+    Args:
+      endpoint: OuraEndpoint.
+      start_date: First day to retrieve (YYYY-MM-DD).
+      end_date: Last day to retrieve (YYYY-MM-DD).
+
+    Yields:
+      List of cached Oura documents of each complete day with documents.
+    """
+    endpoint_cache = self._get_endpoint_cache(endpoint)
+    overlap_start_date = self._get_overlap_start_date(endpoint_cache)
+
+    for day, day_data in sorted(endpoint_cache['days'].items()):
+      if (start_date <= day <= end_date
+              and self._is_day_complete(
+                  endpoint_cache, day, overlap_start_date)):
+        day_documents = _get_day_documents(day, day_data)
+        if day_documents:
+          yield day_documents
+
+  def get_documents(self, endpoint, start_date, end_date):
+    """Gets all cached documents in a date range, complete or not.
+
+    Args:
+      endpoint: OuraEndpoint.
+      start_date: First day to retrieve (YYYY-MM-DD).
+      end_date: Last day to retrieve (YYYY-MM-DD).
+
+    Returns:
+      List of cached Oura documents.
+    """
+    endpoint_days = self._get_endpoint_cache(endpoint)['days']
+
+    documents = []
+    for day, day_data in sorted(endpoint_days.items()):
+      if start_date <= day <= end_date:
+        documents.extend(_get_day_documents(day, day_data))
+    return documents
+
+  def get_missing_date_ranges(self, endpoint, start_date, end_date):
+    """Gets the date ranges which must be fetched from Oura API.
+
+    Days since the high-water mark, plus an overlap of the finality horizon,
+    are always fetched. Older days are only fetched if they are not complete.
+
+    Args:
+      endpoint: OuraEndpoint.
+      start_date: First day required (YYYY-MM-DD).
+      end_date: Last day required (YYYY-MM-DD).
+
+    Returns:
+      List of (start_date, end_date) in YYYY-MM-DD covering all days which
+      are not complete.
+    """
+    endpoint_cache = self._get_endpoint_cache(endpoint)
+    overlap_start_date = self._get_overlap_start_date(endpoint_cache)
+
+    missing_date_ranges = []
+    missing_start_date = None
+    day = start_date
+    while day <= end_date:
+      is_complete = self._is_day_complete(
+          endpoint_cache, day, overlap_start_date)
+
+      if is_complete:
+        self._hits[endpoint.name] += 1
+      else:
+        self._misses[endpoint.name] += 1
+
+      if not is_complete and not missing_start_date:
+        missing_start_date = day
+      elif is_complete and missing_start_date:
+        missing_date_ranges.append(
+            (missing_start_date, date_helper.add_days_to_string_date(day, -1)))
+        missing_start_date = None
+
+      day = date_helper.add_days_to_string_date(day, 1)
+
+    if missing_start_date:
+      missing_date_ranges.append((missing_start_date, end_date))
+
+    return missing_date_ranges
+
+  def delete_document(self, endpoint, document_id):
+    """Drops a cached document deleted in Oura.
+
+    Args:
+      endpoint: OuraEndpoint.
+      document_id: Oura id of the document.
+
+    Returns:
+      True if the document was cached. False, otherwise.
+    """
+    if endpoint.name in _SERIES_ENDPOINT_NAMES:
+      return False
+
+    for day_data in self._get_endpoint_cache(endpoint)['days'].values():
+      if day_data['documents'].pop(document_id, None) is not None:
+        self._store.async_delay_save(self._get_data_to_save, _SAVE_DELAY)
+        return True
+    return False
+
+  def get_statistics(self):
+    """Gets the hit ratio and size of the cache of each endpoint.
+
+    Returns:
+      Map of endpoint names to their hits, misses and hit ratio (in days),
+      high-water mark, number of cached days and documents and approximate
+      memory used.
+    """
+    statistics = {}
+    for endpoint_name, endpoint_cache in (self._endpoints or {}).items():
+      hits = self._hits[endpoint_name]
+      misses = self._misses[endpoint_name]
+      statistics[endpoint_name] = {
+          'hits': hits,
+          'misses': misses,
+          'hit_ratio': (
+              round(hits / (hits + misses), 3) if hits + misses else None),
+          'high_water_mark': endpoint_cache['high_water_mark'],
+          'days': len(endpoint_cache['days']),
+          'complete_days': sum(
+              1 for day_data in endpoint_cache['days'].values()
+              if day_data['complete']),
+          'documents': sum(
+              len(day_data['documents'])
+              for day_data in endpoint_cache['days'].values()),
+          'memory_bytes': memory_helper.get_deep_size(endpoint_cache),
+      }
+    return statistics
+
+  def prune(self, endpoint, start_date):
+    """Drops cached days which are no longer required.
+
+    Args:
+      endpoint: OuraEndpoint.
+      start_date: First day still required (YYYY-MM-DD).
+    """
+    endpoint_days = self._get_endpoint_cache(endpoint)['days']
+    for day in list(endpoint_days.keys()):
+      if day < start_date:
+        del endpoint_days[day]
+
+  def add_fetched_documents(self, endpoint, fetched_days, documents):
+    """Adds a page of fetched documents to a map of days.
+
+    Documents are added in the form they are cached, so pages can be dropped
+    as soon as they are parsed.
+
+    Args:
+      endpoint: OuraEndpoint.
+      fetched_days: Map of days (YYYY-MM-DD) to their documents, updated in
+        place.
+      documents: List of Oura documents of a page.
+    """
+    for document in documents:
+      day = _get_document_day(document)
+      if not day:
+        continue
+
+      day_documents = fetched_days.get(day)
+      if day_documents is None:
+        day_documents = self._create_day_documents(endpoint)
+        fetched_days[day] = day_documents
+
+      if isinstance(day_documents, series_helper.HeartRateSeries):
+        day_documents.append(
+            document.get('timestamp'), document.get('bpm'),
+            document.get('source'))
+      else:
+        day_documents[_get_document_id(document, day)] = document
+
+  def set_documents(self, endpoint, start_date, end_date, fetched_days):
+    """Replaces the cached days of a date range successfully fetched.
+
+    Moves the high-water mark forward and marks the days of the range which
+    are past the finality horizon as complete.
+
+    Args:
+      endpoint: OuraEndpoint.
+      start_date: First day fetched (YYYY-MM-DD).
+      end_date: Last day fetched (YYYY-MM-DD).
+      fetched_days: Map of days (YYYY-MM-DD) to their documents, as built by
+        add_fetched_documents.
+    """
+    endpoint_cache = self._get_endpoint_cache(endpoint)
+    endpoint_days = endpoint_cache['days']
+
+    today = str(datetime.date.today())
+    high_water_mark = min(end_date, today)
+    if (not endpoint_cache['high_water_mark']
+            or endpoint_cache['high_water_mark'] < high_water_mark):
+      endpoint_cache['high_water_mark'] = high_water_mark
+
+    last_complete_date = date_helper.add_days_to_string_date(
+        today, -self._finality_days)
+
+    # Days are rebuilt from the fetched documents only, so documents which
+    # Oura no longer returns are dropped.
+    day = start_date
+    while day <= end_date:
+      day_documents = fetched_days.get(day)
+      if day_documents is None:
+        day_documents = self._create_day_documents(endpoint)
+
+      endpoint_days[day] = {
+          'documents': day_documents,
+          'complete': day <= last_complete_date,
+      }
+      day = date_helper.add_days_to_string_date(day, 1)
+
+    self._store.async_delay_save(self._get_data_to_save, _SAVE_DELAY)
+
+  def upsert_document(self, endpoint, document):
+    """Merges a single document changed in Oura, e.g. notified by a webhook.
+
+    Only days already synced are tracked, so documents of any other day are
+    ignored and will be fetched with their date range.
+
+    Args:
+      endpoint: OuraEndpoint.
+      document: Oura document.
+
+    Returns:
+      True if the document was merged. False, otherwise.
+    """
+    if endpoint.name in _SERIES_ENDPOINT_NAMES:
+      return False
+
+    day = _get_document_day(document)
+    day_data = self._get_endpoint_cache(endpoint)['days'].get(day)
+    if not day_data:
+      return False
+
+    day_data['documents'][_get_document_id(document, day)] = document
+    self._store.async_delay_save(self._get_data_to_save, _SAVE_DELAY)
+    return True
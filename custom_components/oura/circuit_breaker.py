@@ -0,0 +1,74 @@
+"""Provides an OuraCircuitBreaker class to stop calls during Oura outages."""
+
+import logging
+import time
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOL_DOWN = 5 * 60
+
+
+class CircuitOpenError(Exception):
+  """Raised when calls are stopped by an open circuit breaker."""
+
+
+class OuraCircuitBreaker(object):
+  """Stops all the calls of an access token after repeated failures.
+
+  After a number of consecutive failures, the circuit opens and calls are
+  rejected without reaching Oura until the cool-down period is over. Then, the
+  next call is let through: the circuit closes if it succeeds, or opens again
+  if it fails.
+
+  Properties:
+    is_open: whether calls are currently stopped.
+
+  Methods:
+    raise_if_open: raises CircuitOpenError if calls are stopped.
+    record_failure: records a failed call.
+    record_success: records a successful call.
+  """
+
+  def __init__(
+          self,
+          failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+          cool_down=DEFAULT_COOL_DOWN):
+    """Instantiates a new OuraCircuitBreaker class.
+
+    Args:
+      failure_threshold: Consecutive failures after which the circuit opens.
+      cool_down: Seconds during which calls are stopped once open.
+    """
+    self._failure_threshold = failure_threshold
+    self._cool_down = cool_down
+
+    self._failures = 0
+    self._open_until = 0
+
+  @property
+  def is_open(self):
+    """Returns whether calls are currently stopped."""
+    return time.monotonic() < self._open_until
+
+  def raise_if_open(self):
+    """Raises CircuitOpenError if calls are stopped."""
+    if self.is_open:
+      raise CircuitOpenError(
+          'Oura API calls are stopped for {}s after repeated failures.'.format(
+              round(self._open_until - time.monotonic())))
+
+  def record_failure(self):
+    """Records a failed call, opening the circuit if needed."""
+    self._failures += 1
+    if self._failures < self._failure_threshold:
+      return
+
+    if not self.is_open:
+      logging.warning(
+          f'Oura: {self._failures} consecutive failures calling Oura API. '
+          f'Stopping calls for {self._cool_down}s.')
+    self._open_until = time.monotonic() + self._cool_down
+
+  def record_success(self):
+    """Records a successful call, closing the circuit."""
+    self._failures = 0
+    self._open_until = 0
@@ -1,9 +1,70 @@
 """Provides some constant for home assistant common things."""
 
+import datetime
+
+DOMAIN = 'oura'
+
+CONF_ADAPTIVE_POLLING = 'adaptive_polling'
+DEFAULT_ADAPTIVE_POLLING = False
+
 CONF_ATTRIBUTE_STATE = 'attribute_state'
 
 CONF_BACKFILL = 'max_backfill'
 DEFAULT_BACKFILL = 0
 
+CONF_BASE_URL = 'base_url'
+DEFAULT_BASE_URL = 'https://api.ouraring.com'
+
+CONF_CACHE_FINALITY = 'cache_finality_days'
+DEFAULT_CACHE_FINALITY = 2
+
+CONF_CASSETTE = 'cassette'
+DEFAULT_CASSETTE = 'oura_cassette.jsonl.gz'
+
+CONF_CLIENT_ID = 'client_id'
+
+CONF_CLIENT_SECRET = 'client_secret'
+
+CONF_CONNECT_TIMEOUT = 'connect_timeout'
+DEFAULT_CONNECT_TIMEOUT = 10
+
+CONF_MAX_CONCURRENT_REQUESTS = 'max_concurrent_requests'
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+
+CONF_MAX_RETRIES = 'max_retries'
+DEFAULT_MAX_RETRIES = 2
+
+CONF_MAX_SCAN_INTERVAL = 'max_scan_interval'
+DEFAULT_MAX_SCAN_INTERVAL = datetime.timedelta(hours=1)
+
+CONF_METRICS = 'metrics'
+DEFAULT_METRICS = False
+
 CONF_MONITORED_DATES = 'monitored_dates'
 DEFAULT_MONITORED_DATES = ['yesterday']
+
+CONF_ON_DEMAND_VARIABLES = 'on_demand_variables'
+DEFAULT_ON_DEMAND_VARIABLES = []
+
+CONF_PROFILING = 'profiling'
+DEFAULT_PROFILING = False
+
+CONF_READ_TIMEOUT = 'read_timeout'
+DEFAULT_READ_TIMEOUT = 30
+
+CONF_REPLAY_TIMING = 'replay_timing'
+DEFAULT_REPLAY_TIMING = 'original'
+
+CONF_SYNC_DETECTION = 'sync_detection'
+DEFAULT_SYNC_DETECTION = False
+
+CONF_SYNC_DETECTION_INTERVAL = 'sync_detection_interval'
+DEFAULT_SYNC_DETECTION_INTERVAL = datetime.timedelta(minutes=1)
+
+CONF_TRANSPORT = 'transport'
+DEFAULT_TRANSPORT = 'http'
+
+CONF_WEBHOOK = 'webhook'
+DEFAULT_WEBHOOK = False
+
+DEFAULT_SCAN_INTERVAL = datetime.timedelta(seconds=30)
@@ -0,0 +1,722 @@
+"""Provides an OuraDataCoordinator class to share Oura data across sensors."""
+
+import asyncio
+import logging
+import aiohttp
+from homeassistant import const
+from homeassistant import core
+from homeassistant.helpers import event
+from homeassistant.helpers import start
+from . import api
+from . import cache
+from . import circuit_breaker
+from . import const as oura_const
+from . import metrics
+from . import profiler
+from . import sync_detector
+from . import transport
+from . import webhook
+from .helpers import day_index_helper
+
+# Endpoints with daily documents which only appear after the ring syncs.
+_RING_SYNC_ENDPOINTS = (
+    api.OuraEndpoints.ACTIVITY,
+    api.OuraEndpoints.READINESS,
+    api.OuraEndpoints.SLEEP_PERIODS,
+    api.OuraEndpoints.SLEEP_SCORE,
+)
+
+# Settings read by the coordinator, which are shared by every platform using
+# the same access token.
+_COORDINATOR_CONF_KEYS = (
+    const.CONF_SCAN_INTERVAL,
+    oura_const.CONF_ADAPTIVE_POLLING,
+    oura_const.CONF_BASE_URL,
+    oura_const.CONF_CACHE_FINALITY,
+    oura_const.CONF_CASSETTE,
+    oura_const.CONF_CLIENT_ID,
+    oura_const.CONF_CLIENT_SECRET,
+    oura_const.CONF_CONNECT_TIMEOUT,
+    oura_const.CONF_MAX_CONCURRENT_REQUESTS,
+    oura_const.CONF_MAX_RETRIES,
+    oura_const.CONF_MAX_SCAN_INTERVAL,
+    oura_const.CONF_READ_TIMEOUT,
+    oura_const.CONF_REPLAY_TIMING,
+    oura_const.CONF_SYNC_DETECTION,
+    oura_const.CONF_SYNC_DETECTION_INTERVAL,
+    oura_const.CONF_TRANSPORT,
+    oura_const.CONF_WEBHOOK,
+)
+
+
+class OuraDataCoordinator(object):
+  """Fetches Oura data once per update cycle and shares it across sensors.
+
+  There is one coordinator per access token. Each cycle, it works out the union
+  of the date ranges required by all subscribed sensors for each endpoint,
+  fetches every endpoint once, concurrently with the other endpoints, and hands
+  the data to all its sensors. Fetched documents are kept in a persistent
+  cache, so complete days are not fetched again.
+
+  With adaptive polling, cycles happen every scan interval while data is
+  missing or changing, and back off exponentially up to a maximum interval
+  once data is stable. The interval is reset at local midnight.
+
+  With sync detection, daily endpoints are refreshed as soon as the ring syncs,
+  without waiting for the next cycle.
+
+  With webhooks, every document created, updated or deleted in Oura is fetched
+  on its own and merged into the cache and the sensors of its endpoint, without
+  fetching their date ranges again.
+
+  Properties:
+    api: OuraApi used to fetch data.
+    config: platform configuration the coordinator was created with.
+    metrics: OuraSensorMetrics with the update durations of the sensors.
+    profiler: OuraProfiler timing the updates of the sensors.
+    sensors: sensors subscribed to the coordinator.
+    token_id: identifier of the access token which does not reveal it.
+
+  Methods:
+    async_handle_webhook_event: merges a document changed in Oura.
+    async_refresh: fetches data and updates the subscribed sensors.
+    async_schedule_refresh: refreshes data in the background once started.
+    get_diagnostics: gets statistics of the API, cache and sensors.
+    register_sensor: subscribes a sensor to the coordinator.
+    unregister_sensor: unsubscribes a sensor from the coordinator.
+  """
+
+  def __init__(self, hass, config):
+    """Instantiates a new OuraDataCoordinator class.
+
+    Args:
+      hass: Home-Assistant object.
+      config: Platform configuration of the first platform using the token.
+    """
+    self._hass = hass
+    self._config = config
+    access_token = config.get(const.CONF_ACCESS_TOKEN)
+    self._token_id = cache.get_token_id(access_token)
+    self._profiler = profiler.OuraProfiler(
+        config.get(oura_const.CONF_PROFILING, oura_const.DEFAULT_PROFILING))
+    self._metrics = metrics.OuraSensorMetrics(
+        config.get(oura_const.CONF_METRICS, oura_const.DEFAULT_METRICS))
+
+    self._api = api.OuraApi(
+        hass,
+        access_token,
+        config.get(
+            oura_const.CONF_CONNECT_TIMEOUT,
+            oura_const.DEFAULT_CONNECT_TIMEOUT),
+        config.get(
+            oura_const.CONF_READ_TIMEOUT, oura_const.DEFAULT_READ_TIMEOUT),
+        config.get(
+            oura_const.CONF_MAX_RETRIES, oura_const.DEFAULT_MAX_RETRIES),
+        config.get(oura_const.CONF_BASE_URL, oura_const.DEFAULT_BASE_URL),
+        transport.create_transport(
+            hass,
+            config.get(
+                oura_const.CONF_TRANSPORT, oura_const.DEFAULT_TRANSPORT),
+            config.get(oura_const.CONF_CASSETTE, oura_const.DEFAULT_CASSETTE),
+            config.get(
+                oura_const.CONF_REPLAY_TIMING,
+                oura_const.DEFAULT_REPLAY_TIMING)))
+    self._cache = cache.OuraCache(
+        hass,
+        access_token,
+        config.get(
+            oura_const.CONF_CACHE_FINALITY,
+            oura_const.DEFAULT_CACHE_FINALITY))
+    self._update_interval = config.get(
+        const.CONF_SCAN_INTERVAL, oura_const.DEFAULT_SCAN_INTERVAL)
+    self._is_adaptive_polling = config.get(
+        oura_const.CONF_ADAPTIVE_POLLING,
+        oura_const.DEFAULT_ADAPTIVE_POLLING)
+    self._max_update_interval = max(
+        self._update_interval,
+        config.get(
+            oura_const.CONF_MAX_SCAN_INTERVAL,
+            oura_const.DEFAULT_MAX_SCAN_INTERVAL))
+    self._current_update_interval = self._update_interval
+
+    self._sync_detector = None
+    if config.get(
+            oura_const.CONF_SYNC_DETECTION,
+            oura_const.DEFAULT_SYNC_DETECTION):
+      self._sync_detector = sync_detector.OuraSyncDetector(
+          hass,
+          self._api,
+          config.get(
+              oura_const.CONF_SYNC_DETECTION_INTERVAL,
+              oura_const.DEFAULT_SYNC_DETECTION_INTERVAL),
+          self._async_handle_ring_sync)
+
+    self._webhook = None
+    is_webhook_enabled = config.get(
+        oura_const.CONF_WEBHOOK, oura_const.DEFAULT_WEBHOOK)
+    if is_webhook_enabled and not (
+            config.get(oura_const.CONF_CLIENT_ID)
+            and config.get(oura_const.CONF_CLIENT_SECRET)):
+      logging.warning(
+          'Oura: Webhooks require the client_id and client_secret of an Oura '
+          'application. Polling only.')
+    elif is_webhook_enabled:
+      self._webhook = webhook.OuraWebhook(
+          hass,
+          config.get(oura_const.CONF_BASE_URL, oura_const.DEFAULT_BASE_URL),
+          access_token,
+          config.get(oura_const.CONF_CLIENT_ID),
+          config.get(oura_const.CONF_CLIENT_SECRET),
+          lambda: self._get_endpoint_sensors().keys(),
+          self.async_handle_webhook_event)
+
+    self._fetch_semaphore = asyncio.Semaphore(
+        config.get(
+            oura_const.CONF_MAX_CONCURRENT_REQUESTS,
+            oura_const.DEFAULT_MAX_CONCURRENT_REQUESTS))
+
+    self._sensors = []
+    self._refresh_lock = asyncio.Lock()
+    self._unsubscribe_interval = None
+    self._unsubscribe_midnight = None
+
+  @property
+  def api(self):
+    """Returns the OuraApi used by the coordinator."""
+    return self._api
+
+  @property
+  def config(self):
+    """Returns the platform configuration the coordinator was created with."""
+    return self._config
+
+  @property
+  def metrics(self):
+    """Returns the OuraSensorMetrics with the update durations of sensors."""
+    return self._metrics
+
+  @property
+  def profiler(self):
+    """Returns the OuraProfiler timing the updates of the sensors."""
+    return self._profiler
+
+  @property
+  def sensors(self):
+    """Returns the sensors subscribed to the coordinator."""
+    return list(self._sensors)
+
+  @property
+  def token_id(self):
+    """Returns an identifier of the access token which does not reveal it."""
+    return self._token_id
+
+  async def _async_fetch_endpoint_data(self, endpoint, sensors):
+    """Fetches data for an endpoint once and parses it for all its sensors.
+
+    Complete days are read from the cache and only the remaining days are
+    fetched from Oura API. Each page is parsed by every sensor and kept in
+    its cached form as soon as it arrives.
+
+    Args:
+      endpoint: OuraEndpoint to fetch.
+      sensors: List of sensors subscribed to the endpoint.
+
+    Returns:
+      (sensors_data, day_index) with the map of sensors to their parsed data
+      and the DayIndex of the days with data, shared by all the sensors. None
+      if data could not be fetched.
+    """
+    (start_date, end_date) = self._get_union_date_range(sensors)
+    data_param = api.get_data_param(endpoint)
+    sensors_data = {sensor: {} for sensor in sensors}
+    day_index = day_index_helper.DayIndex()
+
+    await self._cache.async_load()
+    self._cache.prune(endpoint, start_date)
+
+    # Complete days are served from the cache, one day at a time.
+    for complete_documents in self._cache.iter_complete_documents(
+            endpoint, start_date, end_date):
+      self._parse_oura_data(
+          sensors, sensors_data, day_index, {data_param: complete_documents})
+
+    missing_date_ranges = self._cache.get_missing_date_ranges(
+        endpoint, start_date, end_date)
+
+    for (fetch_start_date, fetch_end_date) in missing_date_ranges:
+      fetched_days = {}
+      is_data_retrieved = True
+
+      # Sensors for the same endpoint request data in the same format, so any
+      # of them can fetch the data on behalf of the rest.
+      oura_data_pages = sensors[0].get_sensor_data_pages_from_api(
+          fetch_start_date, fetch_end_date)
+
+      received_bytes = self._api.stats.get_received_bytes(endpoint)
+      start_time = self._profiler.start()
+      try:
+        async for oura_data in oura_data_pages:
+          is_page_retrieved = (
+              isinstance(oura_data, dict) and data_param in oura_data)
+          page_documents = (
+              (oura_data.get(data_param) or []) if is_page_retrieved else [])
+          self._profiler.add(
+              endpoint.name, profiler.STAGE_FETCH, start_time,
+              len(page_documents),
+              self._api.stats.get_received_bytes(endpoint) - received_bytes)
+          received_bytes = self._api.stats.get_received_bytes(endpoint)
+
+          self._parse_oura_data(sensors, sensors_data, day_index, oura_data)
+          start_time = self._profiler.start()
+
+          if not is_page_retrieved:
+            is_data_retrieved = False
+            continue
+          self._cache.add_fetched_documents(
+              endpoint, fetched_days, page_documents)
+      except circuit_breaker.CircuitOpenError as error:
+        logging.debug(f'Oura: Skipping fetch for {endpoint.name}: {error}')
+        return None
+      except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+        logging.error(
+            f'Oura: Unable to fetch data for {endpoint.name}: {error!r}')
+        return None
+
+      # Days are only tracked as synced when the data was retrieved, as error
+      # responses would hide the real data.
+      if is_data_retrieved:
+        self._cache.set_documents(
+            endpoint, fetch_start_date, fetch_end_date, fetched_days)
+
+    return (sensors_data, day_index)
+
+  def _get_endpoint_sensors(self, endpoints=None):
+    """Groups subscribed sensors by their API endpoint.
+
+    Args:
+      endpoints: Endpoints to include. All of them if not set.
+
+    Returns:
+      Map of endpoints to the list of sensors subscribed to them.
+    """
+    endpoint_sensors = {}
+    for sensor in self._sensors:
+      if endpoints is None or sensor.api_endpoint in endpoints:
+        endpoint_sensors.setdefault(sensor.api_endpoint, []).append(sensor)
+    return endpoint_sensors
+
+  def _get_union_date_range(self, sensors):
+    """Gets the smallest date range which covers all the sensors.
+
+    Args:
+      sensors: List of sensors.
+
+    Returns:
+      (start_date, end_date) in YYYY-MM-DD
+    """
+    date_ranges = [sensor.monitored_date_range for sensor in sensors]
+    start_date = min(start_date for (start_date, _) in date_ranges)
+    end_date = max(end_date for (_, end_date) in date_ranges)
+    return (start_date, end_date)
+
+  def _parse_oura_data(self, sensors, sensors_data, day_index, oura_data):
+    """Parses a page of Oura data for all the sensors of an endpoint.
+
+    Args:
+      sensors: List of sensors subscribed to the endpoint.
+      sensors_data: Map of sensors to their parsed data, updated in place.
+      day_index: DayIndex of the days with data of the endpoint, updated in
+        place.
+      oura_data: Page of data from Oura API.
+    """
+    for sensor in sensors:
+      start_time = self._profiler.start()
+      page_sensor_data = sensor.parse_sensor_data(oura_data)
+      day_index.add_days(sensor.get_data_days(page_sensor_data))
+      sensors_data[sensor] = sensor.merge_sensor_data(
+          sensors_data[sensor], page_sensor_data)
+      self._profiler.add(
+          sensor.name, profiler.STAGE_PARSE, start_time,
+          len(page_sensor_data) if page_sensor_data else 0)
+
+  def _update_sensors(self, sensors_data, day_index):
+    """Updates sensors from their parsed data.
+
+    Args:
+      sensors_data: Map of sensors to their parsed data.
+      day_index: DayIndex of the days with data, shared by all the sensors.
+
+    Returns:
+      List of sensors whose state or attributes changed.
+    """
+    changed_sensors = []
+    for sensor, sensor_data in sensors_data.items():
+      start_time = self._metrics.start()
+      is_changed = sensor.update_from_sensor_data(sensor_data, day_index)
+      self._metrics.add_update(sensor.name, start_time, is_changed)
+      if is_changed:
+        changed_sensors.append(sensor)
+    return changed_sensors
+
+  @core.callback
+  def _async_write_states(self, changed_sensors):
+    """Writes the states of the sensors whose data changed.
+
+    States are only written when they changed, so unchanged data does not
+    reach the recorder nor the event bus.
+
+    Args:
+      changed_sensors: List of sensors whose state or attributes changed.
+    """
+    for sensor in changed_sensors:
+      # Sensors not yet added to Home-Assistant will have its state written
+      # when they are added.
+      if sensor.hass:
+        sensor.async_write_ha_state()
+        self._metrics.add_state_write(
+            sensor.name, sensor.extra_state_attributes)
+
+  async def _async_refresh_endpoint(self, endpoint, sensors):
+    """Fetches data for an endpoint and updates its sensors.
+
+    Args:
+      endpoint: OuraEndpoint to fetch.
+      sensors: List of sensors subscribed to the endpoint.
+
+    Returns:
+      List of sensors whose state or attributes changed.
+    """
+    async with self._fetch_semaphore:
+      endpoint_data = await self._async_fetch_endpoint_data(endpoint, sensors)
+    self._profiler.commit(endpoint.name)
+
+    try:
+      # Sensors keep their last data if the endpoint could not be fetched.
+      if endpoint_data is None:
+        return []
+
+      (sensors_data, day_index) = endpoint_data
+      return self._update_sensors(sensors_data, day_index)
+    finally:
+      for sensor in sensors:
+        self._profiler.commit(sensor.name)
+
+  async def _async_refresh(self, endpoint_sensors):
+    """Fetches data and updates the subscribed sensors.
+
+    All endpoints are fetched at the same time, up to the maximum number of
+    concurrent requests, so a cycle takes about as long as the slowest one.
+    Errors of an endpoint are logged and do not affect the other endpoints.
+
+    Args:
+      endpoint_sensors: Map of endpoints to the sensors subscribed to them.
+
+    Returns:
+      List of sensors whose state or attributes changed.
+    """
+    endpoints_changed_sensors = await asyncio.gather(*[
+        self._async_refresh_endpoint(endpoint, sensors)
+        for endpoint, sensors in endpoint_sensors.items()
+    ], return_exceptions=True)
+
+    changed_sensors = []
+    for endpoint, endpoint_changed_sensors in zip(
+            endpoint_sensors.keys(), endpoints_changed_sensors):
+      # Cancellations (and other non-errors) are propagated as they are.
+      if (isinstance(endpoint_changed_sensors, BaseException)
+              and not isinstance(endpoint_changed_sensors, Exception)):
+        raise endpoint_changed_sensors
+
+      # A failing endpoint keeps its sensors unchanged without discarding the
+      # data of the rest.
+      if isinstance(endpoint_changed_sensors, Exception):
+        logging.error(
+            f'Oura: Unable to update sensors of {endpoint.name}.',
+            exc_info=endpoint_changed_sensors)
+        continue
+
+      changed_sensors.extend(endpoint_changed_sensors)
+    return changed_sensors
+
+  def _get_next_update_interval(self, changed_sensors):
+    """Gets the time to wait until the next update cycle.
+
+    Args:
+      changed_sensors: List of sensors whose data changed on the last cycle.
+
+    Returns:
+      Scan interval if data is missing or changing, or if adaptive polling is
+      disabled. Otherwise, twice the current interval, up to the maximum.
+    """
+    if (not self._is_adaptive_polling
+            or changed_sensors
+            or any(sensor.is_awaiting_data for sensor in self._sensors)):
+      return self._update_interval
+
+    return min(self._max_update_interval, self._current_update_interval * 2)
+
+  @core.callback
+  def _async_schedule_update_interval(self, update_interval):
+    """Schedules the next update cycle, replacing the scheduled one.
+
+    Args:
+      update_interval: Time to wait until the next update cycle (timedelta).
+    """
+    if self._unsubscribe_interval:
+      self._unsubscribe_interval()
+
+    self._current_update_interval = update_interval
+    self._unsubscribe_interval = event.async_call_later(
+        self._hass, update_interval, self._async_handle_update_interval)
+
+  async def _async_handle_update_interval(self, now):
+    """Refreshes data when the update interval is over.
+
+    Args:
+      now: Time at which the interval was triggered.
+    """
+    self._unsubscribe_interval = None
+    try:
+      await self.async_refresh()
+    except Exception:
+      logging.exception('Oura: Unable to refresh data.')
+    finally:
+      # The next cycle is always scheduled, so an error does not stop polling
+      # until midnight.
+      if not self._unsubscribe_interval and self._sensors:
+        self._async_schedule_update_interval(self._current_update_interval)
+
+  async def _async_handle_ring_sync(self):
+    """Refreshes the daily endpoints right after the ring synced."""
+    await self.async_refresh(_RING_SYNC_ENDPOINTS)
+
+  @core.callback
+  def _async_handle_midnight(self, now):
+    """Resets the update interval at local midnight, as monitored days change.
+
+    Args:
+      now: Time at which midnight was triggered.
+    """
+    self._async_schedule_update_interval(self._update_interval)
+
+  async def async_refresh(self, endpoints=None):
+    """Fetches data and updates the subscribed sensors.
+
+    Args:
+      endpoints: Endpoints to refresh. All of them if not set.
+    """
+    async with self._refresh_lock:
+      endpoint_sensors = self._get_endpoint_sensors(endpoints)
+      if not endpoint_sensors:
+        return
+
+      changed_sensors = await self._async_refresh(endpoint_sensors)
+
+      # Partial refreshes only reschedule the next cycle if data changed.
+      if endpoints is None or changed_sensors:
+        self._async_schedule_update_interval(
+            self._get_next_update_interval(changed_sensors))
+
+      self._async_write_states(changed_sensors)
+      self._profiler.notify_listeners()
+
+  async def _async_merge_webhook_document(
+          self, endpoint, event_type, document_id):
+    """Merges a document changed in Oura into the cache.
+
+    Args:
+      endpoint: OuraEndpoint of the document.
+      event_type: Type of change: create, update or delete.
+      document_id: Oura id of the document.
+
+    Returns:
+      Whether the cache changed.
+    """
+    if event_type == webhook.EVENT_DELETE:
+      return self._cache.delete_document(endpoint, document_id)
+
+    try:
+      document = await self._api.async_get_oura_document(
+          endpoint, document_id)
+    except circuit_breaker.CircuitOpenError as error:
+      logging.debug(f'Oura: Skipping fetch for {endpoint.name}: {error}')
+      return False
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+      logging.warning(
+          f'Oura: Unable to fetch {endpoint.name} document {document_id}: '
+          f'{error!r}')
+      return False
+
+    return self._cache.upsert_document(endpoint, document)
+
+  async def async_handle_webhook_event(
+          self, endpoint, event_type, document_id):
+    """Merges a document changed in Oura into the sensors of its endpoint.
+
+    Only the document is fetched. Sensors are then updated from the cache,
+    which already holds every other document of their date ranges. Documents
+    of days which were never fetched are left for the next cycle.
+
+    Args:
+      endpoint: OuraEndpoint of the document.
+      event_type: Type of change: create, update or delete.
+      document_id: Oura id of the document.
+    """
+    async with self._refresh_lock:
+      sensors = self._get_endpoint_sensors((endpoint,)).get(endpoint)
+      if not sensors:
+        return
+
+      await self._cache.async_load()
+      if not await self._async_merge_webhook_document(
+              endpoint, event_type, document_id):
+        logging.debug(
+            f'Oura: Ignoring {event_type} event of {endpoint.name} document '
+            f'{document_id}.')
+        return
+
+      (start_date, end_date) = self._get_union_date_range(sensors)
+      sensors_data = {sensor: {} for sensor in sensors}
+      day_index = day_index_helper.DayIndex()
+      try:
+        self._parse_oura_data(sensors, sensors_data, day_index, {
+            api.get_data_param(endpoint): self._cache.get_documents(
+                endpoint, start_date, end_date),
+        })
+        changed_sensors = self._update_sensors(sensors_data, day_index)
+      finally:
+        for sensor in sensors:
+          self._profiler.commit(sensor.name)
+
+      self._async_write_states(changed_sensors)
+      self._profiler.notify_listeners()
+
+  @core.callback
+  def async_schedule_refresh(self):
+    """Refreshes data in the background once Home-Assistant has started.
+
+    Home-Assistant does not wait for Oura API, so a slow or unreachable API
+    does not delay its start-up.
+    """
+
+    @core.callback
+    def _async_start_refresh(hass):
+      hass.async_create_background_task(
+          self.async_refresh(), f'{oura_const.DOMAIN}_refresh')
+
+    start.async_at_started(self._hass, _async_start_refresh)
+
+  def get_diagnostics(self):
+    """Gets statistics of the API, cache and sensors of the coordinator.
+
+    Returns:
+      Map with the configuration (including the access token), request
+      statistics by endpoint, cache statistics, last stage timings, sensor
+      statistics and approximate memory used.
+    """
+    cache_statistics = self._cache.get_statistics()
+    sensors_diagnostics = {
+        sensor.name: sensor.get_diagnostics() for sensor in self._sensors
+    }
+
+    return {
+        'config': self._config,
+        'api': self._api.stats.as_dict(),
+        'circuit_breaker_open': self._api.circuit_breaker.is_open,
+        'rate_limiter_queue_depth': self._api.rate_limiter.queue_depth,
+        'cache': cache_statistics,
+        'stages': self._profiler.stages,
+        'sensors': sensors_diagnostics,
+        'memory_bytes': (
+            sum(
+                endpoint_statistics['memory_bytes']
+                for endpoint_statistics in cache_statistics.values())
+            + sum(
+                sensor_diagnostics['memory_bytes']
+                for sensor_diagnostics in sensors_diagnostics.values())),
+    }
+
+  def register_sensor(self, sensor):
+    """Subscribes a sensor to the coordinator.
+
+    Args:
+      sensor: Oura sensor to subscribe.
+    """
+    if sensor in self._sensors:
+      return
+
+    self._sensors.append(sensor)
+
+    if not self._unsubscribe_midnight:
+      self._async_schedule_update_interval(self._update_interval)
+      self._unsubscribe_midnight = event.async_track_time_change(
+          self._hass, self._async_handle_midnight, hour=0, minute=0, second=0)
+
+      if self._sync_detector:
+        self._sync_detector.start()
+
+      if self._webhook:
+        self._webhook.start()
+
+  def unregister_sensor(self, sensor):
+    """Unsubscribes a sensor from the coordinator.
+
+    Args:
+      sensor: Oura sensor to unsubscribe.
+    """
+    if sensor not in self._sensors:
+      return
+
+    self._sensors.remove(sensor)
+
+    if self._sensors:
+      return
+
+    if self._unsubscribe_interval:
+      self._unsubscribe_interval()
+      self._unsubscribe_interval = None
+
+    if self._unsubscribe_midnight:
+      self._unsubscribe_midnight()
+      self._unsubscribe_midnight = None
+
+    if self._sync_detector:
+      self._sync_detector.stop()
+
+    if self._webhook:
+      self._webhook.stop()
+
+
+def get_coordinator(hass, config):
+  """Gets the coordinator for the access token of a config.
+
+  The coordinator is created the first time a token is seen. Later platforms
+  sharing the same token reuse it, together with its settings. A warning is
+  logged when their coordinator settings differ, as they are ignored.
+
+  Args:
+    hass: Home-Assistant object.
+    config: Platform configuration.
+
+  Returns:
+    OuraDataCoordinator for the access token.
+  """
+  access_token = config.get(const.CONF_ACCESS_TOKEN)
+  coordinators = hass.data.setdefault(oura_const.DOMAIN, {})
+
+  if access_token not in coordinators:
+    coordinators[access_token] = OuraDataCoordinator(hass, config)
+    return coordinators[access_token]
+
+  oura_coordinator = coordinators[access_token]
+  ignored_keys = [
+      key for key in _COORDINATOR_CONF_KEYS
+      if config.get(key) != oura_coordinator.config.get(key)
+  ]
+  if ignored_keys:
+    logging.warning(
+        f'Oura: Platforms sharing the access token '
+        f'{oura_coordinator.token_id} use the settings of the first one. '
+        f'Ignoring the different {", ".join(ignored_keys)} of a later '
+        f'platform.')
+  return oura_coordinator
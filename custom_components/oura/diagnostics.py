@@ -0,0 +1,37 @@
+"""Provides diagnostics of the Oura integration, to attach to bug reports."""
+
+import json
+from homeassistant import const
+from homeassistant import core
+from homeassistant.components import diagnostics
+from . import const as oura_const
+
+_TO_REDACT = {
+    const.CONF_ACCESS_TOKEN,
+    oura_const.CONF_CLIENT_ID,
+    oura_const.CONF_CLIENT_SECRET,
+}
+
+
+@core.callback
+def async_get_diagnostics(hass):
+  """Gets the diagnostics of every Oura access token, with tokens redacted.
+
+  Args:
+    hass: Home-Assistant object.
+
+  Returns:
+    JSON-serializable map with the diagnostics of each coordinator: request
+    counts, latency percentiles, errors and response sizes by endpoint, cache
+    hit ratios, stored days and points by sensor and approximate memory used.
+  """
+  coordinators_diagnostics = [
+      oura_coordinator.get_diagnostics()
+      for oura_coordinator in hass.data.get(oura_const.DOMAIN, {}).values()
+  ]
+
+  # Values such as time periods of the configuration are written as text.
+  return json.loads(json.dumps(
+      diagnostics.async_redact_data(
+          {'coordinators': coordinators_diagnostics}, _TO_REDACT),
+      default=str))
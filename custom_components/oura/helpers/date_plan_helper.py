@@ -0,0 +1,219 @@
+"""Provides date plans resolving monitored date names into dates."""
+
+import datetime
+import enum
+import functools
+import logging
+import re
+
+
+class MonitoredDayType(enum.Enum):
+  """Types of days which can be monitored."""
+  UNKNOWN = 0
+  YESTERDAY = 1
+  WEEKDAY = 2
+  DAYS_AGO = 3
+
+
+FULL_WEEKDAY_NAMES = [
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
+    'sunday',
+]
+
+_DIGITS_PATTERN = re.compile(r'\d+')
+
+# Days between a date and its next backfill candidate.
+_BACKFILL_STEPS = {
+    MonitoredDayType.YESTERDAY: 1,
+    MonitoredDayType.WEEKDAY: 7,
+    MonitoredDayType.DAYS_AGO: 1,
+}
+
+# Extra days fetched before the first monitored date, in case data is missing.
+_FETCH_WINDOW_BEFORE = 7
+
+# Extra days fetched after the last monitored date, in case of timezone
+# differences.
+_FETCH_WINDOW_AFTER = 1
+
+
+def get_date_type_by_name(date_name):
+  """Gets the type of date format based in the date name.
+
+  Args:
+    date_name: Date for which to verify type.
+
+  Returns:
+    Date type(MonitoredDayType).
+  """
+  if date_name == 'yesterday':
+    return MonitoredDayType.YESTERDAY
+  elif date_name in FULL_WEEKDAY_NAMES:
+    return MonitoredDayType.WEEKDAY
+  elif 'd_ago' in date_name or 'days_ago' in date_name:
+    return MonitoredDayType.DAYS_AGO
+  else:
+    return MonitoredDayType.UNKNOWN
+
+
+def _get_days_ago(date_name, date_type, today):
+  """Gets how many days ago a date name is.
+
+  Args:
+    date_name: Name of the date. Supported:
+      yesterday, weekday(e.g. monday, tuesday), Xdays_ago(e.g. 3days_ago).
+    date_type: MonitoredDayType of the date name.
+    today: Date of today.
+
+  Returns:
+    Number of days between today and the date. Unknown names are yesterday.
+  """
+  days_ago = None
+  if date_type == MonitoredDayType.YESTERDAY:
+    days_ago = 1
+
+  elif date_type == MonitoredDayType.WEEKDAY:
+    date_index = FULL_WEEKDAY_NAMES.index(date_name)
+    days_ago = (
+        today.weekday() - date_index
+        if today.weekday() > date_index else
+        7 + today.weekday() - date_index
+    )
+
+  elif date_type == MonitoredDayType.DAYS_AGO:
+    digits_match = _DIGITS_PATTERN.match(date_name)
+    if digits_match:
+      days_ago = int(digits_match.group())
+
+  if days_ago is None:
+    logging.info(f'Oura: Unknown day name `{date_name}`, using yesterday.')
+    days_ago = 1
+
+  return days_ago
+
+
+class DatePlan(object):
+  """Monitored dates of a sensor configuration resolved for a given day.
+
+  Properties:
+    backfill_ranges: map of date names to the days usable for backfill.
+    date_range: (start_date, end_date) to fetch from Oura.
+    dates: map of date names to dates.
+    today: date for which the plan was resolved.
+  """
+
+  def __init__(self, monitored_dates, backfill, today):
+    """Instantiates a new DatePlan class.
+
+    Args:
+      monitored_dates: List of monitored date names.
+      backfill: Maximum number of backfill candidates per date.
+      today: Date for which to resolve the plan.
+    """
+    self._today = today
+    self._dates = {}
+    self._backfill_ranges = {}
+
+    for date_name in monitored_dates:
+      date_type = get_date_type_by_name(date_name)
+      date = today - datetime.timedelta(
+          days=_get_days_ago(date_name, date_type, today))
+      self._dates[date_name] = str(date)
+
+    if self._dates:
+      start_date = datetime.date.fromisoformat(min(self._dates.values()))
+      end_date = datetime.date.fromisoformat(max(self._dates.values()))
+    else:
+      start_date = end_date = today
+
+    start_date -= datetime.timedelta(days=_FETCH_WINDOW_BEFORE)
+    end_date += datetime.timedelta(days=_FETCH_WINDOW_AFTER)
+    self._date_range = (str(start_date), str(end_date))
+
+    for date_name, date_value in self._dates.items():
+      backfill_range = self._get_backfill_range(
+          date_name, datetime.date.fromisoformat(date_value), backfill,
+          start_date)
+      if backfill_range:
+        self._backfill_ranges[date_name] = backfill_range
+
+  def _get_backfill_range(self, date_name, date, backfill, start_date):
+    """Gets the days which can be used when a date has no data.
+
+    Backfill candidates are checked one step (a day, or a week for weekdays)
+    at a time, up to the backfill limit, while they are not before the first
+    date fetched.
+
+    Args:
+      date_name: Name of the monitored date.
+      date: Monitored date.
+      backfill: Maximum number of backfill candidates.
+      start_date: First date fetched from Oura.
+
+    Returns:
+      (first_ordinal, last_ordinal, step) of the candidates, as ordinal days.
+      All None if there is no suitable backfill date for the type of date
+      name. None if there are no candidates.
+    """
+    if not backfill or date < start_date:
+      return None
+
+    step = _BACKFILL_STEPS.get(get_date_type_by_name(date_name))
+    if not step:
+      return (None, None, None)
+
+    ordinal = date.toordinal()
+    candidates = min(backfill, (ordinal - start_date.toordinal()) // step + 1)
+    return (ordinal - candidates * step, ordinal - step, step)
+
+  @property
+  def backfill_ranges(self):
+    """Returns the map of date names to the days usable for backfill."""
+    return self._backfill_ranges
+
+  @property
+  def date_range(self):
+    """Returns the (start_date, end_date) to fetch from Oura."""
+    return self._date_range
+
+  @property
+  def dates(self):
+    """Returns the map of date names to dates (YYYY-MM-DD)."""
+    return self._dates
+
+  @property
+  def today(self):
+    """Returns the date for which the plan was resolved."""
+    return self._today
+
+
+@functools.lru_cache(maxsize=32)
+def _get_date_plan(monitored_dates, backfill, today):
+  """Gets the cached date plan of a sensor configuration for a day.
+
+  Args:
+    monitored_dates: Tuple of monitored date names.
+    backfill: Maximum number of backfill candidates per date.
+    today: Date for which to resolve the plan.
+
+  Returns:
+    DatePlan.
+  """
+  return DatePlan(monitored_dates, backfill, today)
+
+
+def get_date_plan(monitored_dates, backfill):
+  """Gets the date plan of a sensor configuration for today.
+
+  Plans are shared by all the sensors with the same configuration and only
+  resolved again when the local date changes.
+
+  Args:
+    monitored_dates: List of monitored date names.
+    backfill: Maximum number of backfill candidates per date.
+
+  Returns:
+    DatePlan. It must not be modified.
+  """
+  return _get_date_plan(
+      tuple(monitored_dates), backfill or 0, datetime.date.today())
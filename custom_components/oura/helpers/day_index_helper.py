@@ -0,0 +1,85 @@
+"""Provides a sorted index of the days with Oura data."""
+
+import bisect
+import datetime
+
+
+class DayIndex(object):
+  """Sorted index of the days with data, as ordinal days.
+
+  Finding the newest day with data before a date is a binary search, instead
+  of checking one day at a time. The index is only built on the first search,
+  and searches by a step (e.g. 7 days, for the same weekday) use a sorted
+  sub-index per remainder, also built on first use. Days can be added page by
+  page, so a single index is shared by all the sensors of an endpoint.
+
+  Methods:
+    add_days: adds days with data.
+    get_newest_ordinal: gets the newest day with data within a range.
+  """
+
+  def __init__(self, days=()):
+    """Instantiates a new DayIndex class.
+
+    Args:
+      days: Iterable of days with data (YYYY-MM-DD).
+    """
+    self._days = set(day for day in days if day)
+
+    # Map of (step, remainder) to the sorted ordinal days with that remainder.
+    self._ordinals = None
+
+  def _get_step_ordinals(self, step, remainder):
+    """Gets the sorted ordinal days with a remainder for a step.
+
+    Args:
+      step: Days between candidate days.
+      remainder: Remainder of the candidate days divided by the step.
+
+    Returns:
+      Sorted list of ordinal days.
+    """
+    if self._ordinals is None:
+      self._ordinals = {
+          (1, 0): sorted(
+              datetime.date.fromisoformat(day).toordinal()
+              for day in self._days),
+      }
+
+    key = (step, remainder % step)
+    if key not in self._ordinals:
+      self._ordinals[key] = [
+          ordinal for ordinal in self._ordinals[(1, 0)]
+          if ordinal % step == key[1]
+      ]
+    return self._ordinals[key]
+
+  def add_days(self, days):
+    """Adds days with data.
+
+    Args:
+      days: Iterable of days with data (YYYY-MM-DD).
+    """
+    new_days = set(day for day in days if day) - self._days
+    if not new_days:
+      return
+
+    self._days.update(new_days)
+    self._ordinals = None
+
+  def get_newest_ordinal(self, first_ordinal, last_ordinal, step=1):
+    """Gets the newest day with data within a range.
+
+    Args:
+      first_ordinal: First ordinal day of the range.
+      last_ordinal: Last ordinal day of the range.
+      step: Days between candidate days, counting back from the last one.
+
+    Returns:
+      Newest ordinal day with data. None if there is none.
+    """
+    ordinals = self._get_step_ordinals(step, last_ordinal)
+    position = bisect.bisect_right(ordinals, last_ordinal)
+    if position and ordinals[position - 1] >= first_ordinal:
+      return ordinals[position - 1]
+    return None
@@ -0,0 +1,57 @@
+"""Provides a Histogram class with cumulative buckets, as in Prometheus."""
+
+import bisect
+
+
+class Histogram(object):
+  """Counts observed values into buckets with fixed upper bounds.
+
+  Properties:
+    buckets: list of (upper_bound, cumulative_count), ending with infinity.
+    count: number of observed values.
+    sum: sum of observed values.
+
+  Methods:
+    observe: adds a value.
+  """
+
+  def __init__(self, upper_bounds):
+    """Instantiates a new Histogram class.
+
+    Args:
+      upper_bounds: Sorted upper bounds of the buckets. A bucket for larger
+        values is always added.
+    """
+    self._upper_bounds = list(upper_bounds)
+    self._counts = [0] * (len(self._upper_bounds) + 1)
+    self._sum = 0
+
+  @property
+  def buckets(self):
+    """Returns the list of (upper_bound, cumulative_count)."""
+    buckets = []
+    cumulative_count = 0
+    for upper_bound, count in zip(
+            self._upper_bounds + [float('inf')], self._counts):
+      cumulative_count += count
+      buckets.append((upper_bound, cumulative_count))
+    return buckets
+
+  @property
+  def count(self):
+    """Returns the number of observed values."""
+    return sum(self._counts)
+
+  @property
+  def sum(self):
+    """Returns the sum of observed values."""
+    return self._sum
+
+  def observe(self, value):
+    """Adds a value.
+
+    Args:
+      value: Observed value.
+    """
+    self._counts[bisect.bisect_left(self._upper_bounds, value)] += 1
+    self._sum += value
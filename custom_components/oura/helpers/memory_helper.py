@@ -0,0 +1,39 @@
+"""Provides helpers to estimate the memory used by Oura data."""
+
+import sys
+
+
+def get_deep_size(value):
+  """Gets the approximate memory used by a value and everything it holds.
+
+  Containers and object attributes are followed, counting every object only
+  once. Shared objects (e.g. interned strings) are counted as well, so it is
+  an upper bound of the memory which would be freed with the value.
+
+  Args:
+    value: Any Python value.
+
+  Returns:
+    Approximate size in bytes.
+  """
+  seen_ids = set()
+  pending_values = [value]
+  size = 0
+
+  while pending_values:
+    current_value = pending_values.pop()
+    if id(current_value) in seen_ids:
+      continue
+    seen_ids.add(id(current_value))
+    size += sys.getsizeof(current_value)
+
+    if isinstance(current_value, dict):
+      pending_values.extend(current_value.keys())
+      pending_values.extend(current_value.values())
+    elif isinstance(current_value, (list, tuple, set, frozenset)):
+      pending_values.extend(current_value)
+    elif (hasattr(current_value, '__dict__')
+          and not isinstance(current_value, type)):
+      pending_values.append(vars(current_value))
+
+  return size
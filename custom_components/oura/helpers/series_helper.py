@@ -0,0 +1,277 @@
+"""Provides compact storage for Oura time series."""
+
+import array
+import datetime
+import statistics
+from . import timestamp_helper
+
+# Functions to aggregate the bpm of the samples within a bucket.
+_AGGREGATIONS = {
+    'last': lambda values: values[-1],
+    'max': max,
+    'mean': lambda values: round(statistics.fmean(values), 1),
+    'min': min,
+}
+
+AGGREGATIONS = sorted(_AGGREGATIONS.keys())
+
+# Largest bpm which fits in the bpm typed array.
+_MAX_BPM = 255
+
+
+class HeartRateSeries(object):
+  """Columnar storage of heart rate samples.
+
+  Samples are held in typed arrays (epoch seconds, bpm and interned source and
+  UTC offset codes) instead of one dictionary per sample. Dictionaries are only
+  built for the days which are requested, optionally downsampled into buckets.
+
+  Properties:
+    days: days (YYYY-MM-DD) with samples.
+
+  Methods:
+    append: adds a valid sample from its Oura timestamp, bpm and source.
+    as_dict: gets the samples in a JSON serializable form.
+    extend: adds all the samples of another series.
+    from_dict: creates a series from its JSON serializable form.
+    get: gets the samples of a day as dictionaries.
+  """
+
+  def __init__(self, resolution=None, aggregation='mean'):
+    """Instantiates a new, empty, HeartRateSeries class.
+
+    Args:
+      resolution: Seconds per bucket when getting samples. None for raw data.
+      aggregation: Aggregation of the bpm within a bucket. One of AGGREGATIONS.
+    """
+    self._resolution = resolution
+    self._aggregate = _AGGREGATIONS[aggregation]
+
+    self._timestamps = array.array('q')
+    self._bpms = array.array('B')
+    self._source_codes = array.array('B')
+    self._offset_codes = array.array('B')
+
+    # Interned values. Codes are the index on these lists.
+    self._sources = []
+    self._offsets = []
+
+    # Map of days (YYYY-MM-DD) to the indexes of their samples.
+    self._day_indexes = {}
+
+  def __contains__(self, day):
+    """Returns whether there are samples for a day (YYYY-MM-DD)."""
+    return day in self._day_indexes
+
+  @property
+  def days(self):
+    """Returns the days (YYYY-MM-DD) with samples."""
+    return self._day_indexes.keys()
+
+  def __len__(self):
+    """Returns the number of samples."""
+    return len(self._timestamps)
+
+  def _get_code(self, values, value):
+    """Gets the interned code of a value, adding it if new.
+
+    Args:
+      values: List of interned values.
+      value: Value to intern.
+
+    Returns:
+      Code of the value.
+    """
+    try:
+      return values.index(value)
+    except ValueError:
+      values.append(value)
+      return len(values) - 1
+
+  def append(self, timestamp, bpm, source):
+    """Adds a sample, unless its bpm is missing or invalid.
+
+    Args:
+      timestamp: Timestamp of the sample in ISO format, as returned by Oura.
+      bpm: Beats per minute.
+      source: Source of the sample (e.g. awake, rest, session).
+
+    Returns:
+      True if the sample was added. False, if it was skipped.
+    """
+    # Samples whose bpm does not fit in the typed array are skipped, so they do
+    # not abort the parsing of the rest.
+    if isinstance(bpm, bool) or not isinstance(bpm, (int, float)):
+      return False
+    bpm = round(bpm)
+    if not 0 <= bpm <= _MAX_BPM:
+      return False
+
+    (epoch_seconds, timezone) = timestamp_helper.get_epoch_and_timezone(
+        timestamp)
+
+    # ISO timestamps start with the day in their own offset.
+    day = timestamp[:10]
+
+    self._day_indexes.setdefault(day, array.array('I')).append(
+        len(self._timestamps))
+    self._timestamps.append(epoch_seconds)
+    self._bpms.append(bpm)
+    self._source_codes.append(self._get_code(self._sources, source))
+    self._offset_codes.append(self._get_code(self._offsets, timezone))
+    return True
+
+  def as_dict(self):
+    """Gets the samples in a JSON serializable form.
+
+    Returns:
+      Dictionary with the sample columns, the interned values and the indexes
+      of each day. UTC offsets are in seconds.
+    """
+    return {
+        'timestamps': self._timestamps.tolist(),
+        'bpms': self._bpms.tolist(),
+        'source_codes': self._source_codes.tolist(),
+        'offset_codes': self._offset_codes.tolist(),
+        'sources': list(self._sources),
+        'offsets': [
+            offset.utcoffset(None).total_seconds() if offset else None
+            for offset in self._offsets
+        ],
+        'day_indexes': {
+            day: indexes.tolist()
+            for day, indexes in self._day_indexes.items()
+        },
+    }
+
+  @classmethod
+  def from_dict(cls, series_dict, resolution=None, aggregation='mean'):
+    """Creates a series from its JSON serializable form.
+
+    Args:
+      series_dict: Dictionary returned by as_dict.
+      resolution: Seconds per bucket when getting samples. None for raw data.
+      aggregation: Aggregation of the bpm within a bucket. One of AGGREGATIONS.
+
+    Returns:
+      HeartRateSeries with the samples of the dictionary.
+    """
+    series = cls(resolution, aggregation)
+    series._timestamps.extend(series_dict['timestamps'])
+    series._bpms.extend(series_dict['bpms'])
+    series._source_codes.extend(series_dict['source_codes'])
+    series._offset_codes.extend(series_dict['offset_codes'])
+    series._sources.extend(series_dict['sources'])
+    series._offsets.extend(
+        datetime.timezone(datetime.timedelta(seconds=offset))
+        if offset is not None else None
+        for offset in series_dict['offsets'])
+    for day, indexes in series_dict['day_indexes'].items():
+      series._day_indexes[day] = array.array('I', indexes)
+    return series
+
+  def extend(self, series):
+    """Adds all the samples of another series.
+
+    Args:
+      series: HeartRateSeries to add.
+    """
+    offset = len(self._timestamps)
+    for day, indexes in series._day_indexes.items():
+      self._day_indexes.setdefault(day, array.array('I')).extend(
+          index + offset for index in indexes)
+
+    self._timestamps.extend(series._timestamps)
+    self._bpms.extend(series._bpms)
+
+    # Codes of the other series are translated to the codes of this one.
+    source_codes = [
+        self._get_code(self._sources, source) for source in series._sources]
+    self._source_codes.extend(
+        source_codes[code] for code in series._source_codes)
+
+    offset_codes = [
+        self._get_code(self._offsets, offset) for offset in series._offsets]
+    self._offset_codes.extend(
+        offset_codes[code] for code in series._offset_codes)
+
+  def _get_sample(self, day, index, timestamp=None, bpm=None):
+    """Gets a sample as a dictionary.
+
+    Args:
+      day: Day of the sample in YYYY-MM-DD.
+      index: Index of the sample.
+      timestamp: Epoch seconds to use instead of the sample ones.
+      bpm: Beats per minute to use instead of the sample ones.
+
+    Returns:
+      Dictionary with day, bpm, source and timestamp.
+    """
+    if timestamp is None:
+      timestamp = self._timestamps[index]
+    if bpm is None:
+      bpm = self._bpms[index]
+
+    return {
+        'day': day,
+        'bpm': bpm,
+        'source': self._sources[self._source_codes[index]],
+        'timestamp': datetime.datetime.fromtimestamp(
+            timestamp, self._offsets[self._offset_codes[index]]).isoformat(),
+    }
+
+  def _get_offset_seconds(self, index):
+    """Gets the UTC offset of a sample.
+
+    Args:
+      index: Index of the sample.
+
+    Returns:
+      Seconds ahead of UTC. Samples without offset use the local one.
+    """
+    timezone = self._offsets[self._offset_codes[index]]
+    sample_time = datetime.datetime.fromtimestamp(
+        self._timestamps[index], timezone).astimezone(timezone)
+    return int(sample_time.utcoffset().total_seconds())
+
+  def get(self, day, default=None):
+    """Gets the samples of a day.
+
+    If there is a resolution, samples are grouped into buckets of that size.
+    Each bucket is reported at its start time, with the aggregated bpm and the
+    source of its last sample.
+
+    Args:
+      day: Day in YYYY-MM-DD.
+      default: Value to return if there are no samples for the day.
+
+    Returns:
+      List of samples as dictionaries with day, bpm, source and timestamp.
+    """
+    indexes = self._day_indexes.get(day)
+    if not indexes:
+      return default
+
+    indexes = sorted(indexes, key=self._timestamps.__getitem__)
+
+    if not self._resolution:
+      return [self._get_sample(day, index) for index in indexes]
+
+    buckets = {}
+    for index in indexes:
+      timestamp = self._timestamps[index]
+      # Buckets start at round times in the offset of the samples, e.g. :00
+      # instead of :30 in +05:30, rather than at round UTC times.
+      offset = self._get_offset_seconds(index)
+      bucket = timestamp - (timestamp + offset) % self._resolution
+      buckets.setdefault(bucket, []).append(index)
+
+    return [
+        self._get_sample(
+            day,
+            bucket_indexes[-1],
+            timestamp=bucket,
+            bpm=self._aggregate(
+                [self._bpms[index] for index in bucket_indexes]))
+        for bucket, bucket_indexes in buckets.items()
+    ]
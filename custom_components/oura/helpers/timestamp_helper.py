@@ -0,0 +1,90 @@
+"""Provides fast parsing of Oura timestamps."""
+
+import datetime
+import re
+
+# Oura timestamps look like 2021-11-01T23:14:37+02:00, sometimes with
+# fractional seconds or a Z suffix. Older Python versions cannot parse those
+# variants with datetime.fromisoformat, so they are normalized first.
+_TIMESTAMP_PATTERN = re.compile(
+    r'(?P<datetime>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})'
+    r'(?:\.(?P<fraction>\d+))?'
+    r'(?P<offset>Z|[+-]\d{2}:?\d{2})?$')
+
+
+def _parse_nonstandard_timestamp(timestamp):
+  """Parses timestamp variants not supported by datetime.fromisoformat.
+
+  Args:
+    timestamp: Timestamp in ISO format.
+
+  Returns:
+    Parsed datetime.
+
+  Raises:
+    ValueError: If the timestamp is not in ISO format.
+  """
+  match = _TIMESTAMP_PATTERN.match(timestamp)
+  if not match:
+    raise ValueError(f'Invalid Oura timestamp: {timestamp}')
+
+  normalized_timestamp = match.group('datetime')
+
+  fraction = match.group('fraction')
+  if fraction:
+    normalized_timestamp += '.' + fraction[:6].ljust(6, '0')
+
+  offset = match.group('offset')
+  if offset == 'Z':
+    normalized_timestamp += '+00:00'
+  elif offset:
+    normalized_timestamp += offset[:3] + ':' + offset[-2:]
+
+  return datetime.datetime.fromisoformat(normalized_timestamp)
+
+
+def parse_timestamp(timestamp):
+  """Parses an Oura timestamp.
+
+  Args:
+    timestamp: Timestamp in ISO format, as returned by Oura.
+
+  Returns:
+    Parsed datetime.
+
+  Raises:
+    ValueError: If the timestamp is not in ISO format.
+  """
+  try:
+    return datetime.datetime.fromisoformat(timestamp)
+  except ValueError:
+    return _parse_nonstandard_timestamp(timestamp)
+
+
+def get_epoch_and_timezone(timestamp):
+  """Gets the epoch seconds and timezone of an Oura timestamp.
+
+  Args:
+    timestamp: Timestamp in ISO format, as returned by Oura.
+
+  Returns:
+    (epoch_seconds, timezone) of the timestamp.
+
+  Raises:
+    ValueError: If the timestamp is not in ISO format.
+  """
+  parsed_timestamp = parse_timestamp(timestamp)
+  return (int(parsed_timestamp.timestamp()), parsed_timestamp.tzinfo)
+
+
+def get_hour(timestamp):
+  """Gets the local time of an Oura timestamp.
+
+  Args:
+    timestamp: Timestamp in ISO format, as returned by Oura.
+
+  Returns:
+    Time of the timestamp in its own offset, in HH:MM.
+  """
+  parsed_timestamp = parse_timestamp(timestamp)
+  return '{:02d}:{:02d}'.format(parsed_timestamp.hour, parsed_timestamp.minute)
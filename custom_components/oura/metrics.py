@@ -0,0 +1,335 @@
+"""Provides Oura metrics in Prometheus text format, through an HTTP view."""
+
+import logging
+import time
+from aiohttp import web
+from homeassistant import core
+from homeassistant.components import http
+from . import const as oura_const
+from .helpers import histogram_helper
+
+METRICS_URL = '/api/oura/metrics'
+
+_METRICS_VIEW_NAME = 'api:oura:metrics'
+
+_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Key of hass.data telling whether the view is registered. Coordinators are
+# kept under DOMAIN, so it can not hold any other value.
+_DATA_METRICS_VIEW = f'{oura_const.DOMAIN}_metrics_view'
+
+# Upper bounds of the update duration histogram, in seconds.
+_UPDATE_DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+def _count_values(value):
+  """Counts the values held by some attributes, following nested containers.
+
+  Args:
+    value: Attributes or any value within them.
+
+  Returns:
+    Number of values which are not dictionaries nor lists.
+  """
+  if isinstance(value, dict):
+    return sum(_count_values(nested_value) for nested_value in value.values())
+  if isinstance(value, (list, tuple)):
+    return sum(_count_values(nested_value) for nested_value in value)
+  return 1
+
+
+class OuraSensorMetrics(object):
+  """Records the update duration and attributes written by each sensor.
+
+  Disabled metrics do not read the clock, so they cost a single check per
+  sensor update.
+
+  Properties:
+    is_enabled: whether updates are recorded.
+    sensors: map of sensor names to their metrics.
+
+  Methods:
+    add_update: adds an update of a sensor.
+    add_state_write: adds a state written by a sensor.
+    enable: starts recording updates.
+    start: gets the start time of an update.
+  """
+
+  def __init__(self, is_enabled=False):
+    """Instantiates a new OuraSensorMetrics class.
+
+    Args:
+      is_enabled: Whether updates are recorded.
+    """
+    self._is_enabled = is_enabled
+    self._sensors = {}
+
+  @property
+  def is_enabled(self):
+    """Returns whether updates are recorded."""
+    return self._is_enabled
+
+  def enable(self):
+    """Starts recording updates, e.g. once any platform enables metrics."""
+    self._is_enabled = True
+
+  @property
+  def sensors(self):
+    """Returns the map of sensor names to their metrics.
+
+    Each sensor holds its `update_duration` histogram, the count of
+    `state_writes` and `attributes_written` and the `last_change` timestamp
+    (seconds since epoch).
+    """
+    return self._sensors
+
+  def _get_sensor_metrics(self, sensor_name):
+    """Gets the metrics of a sensor, creating them if new."""
+    sensor_metrics = self._sensors.get(sensor_name)
+    if sensor_metrics is None:
+      sensor_metrics = self._sensors[sensor_name] = {
+          'update_duration': histogram_helper.Histogram(
+              _UPDATE_DURATION_BUCKETS),
+          'state_writes': 0,
+          'attributes_written': 0,
+          'last_change': None,
+      }
+    return sensor_metrics
+
+  def start(self):
+    """Gets the start time of an update.
+
+    Returns:
+      Current time in seconds. None if metrics are disabled.
+    """
+    if not self._is_enabled:
+      return None
+    return time.perf_counter()
+
+  def add_update(self, sensor_name, start_time, is_changed):
+    """Adds an update of a sensor, which finished now.
+
+    Args:
+      sensor_name: Name of the sensor.
+      start_time: Time at which the update started, as returned by start().
+      is_changed: Whether the state or attributes of the sensor changed.
+    """
+    if start_time is None:
+      return
+
+    sensor_metrics = self._get_sensor_metrics(sensor_name)
+    sensor_metrics['update_duration'].observe(
+        time.perf_counter() - start_time)
+    if is_changed:
+      sensor_metrics['last_change'] = time.time()
+
+  def add_state_write(self, sensor_name, attributes):
+    """Adds a state written by a sensor.
+
+    Args:
+      sensor_name: Name of the sensor.
+      attributes: Attributes written with the state.
+    """
+    if not self._is_enabled:
+      return
+
+    sensor_metrics = self._get_sensor_metrics(sensor_name)
+    sensor_metrics['state_writes'] += 1
+    sensor_metrics['attributes_written'] += _count_values(attributes or {})
+
+
+def _escape_label(label_value):
+  """Escapes a label value for Prometheus text format."""
+  return (str(label_value)
+          .replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+
+
+def _format_value(value):
+  """Formats a sample value for Prometheus text format."""
+  if value == float('inf'):
+    return '+Inf'
+  if isinstance(value, float):
+    return repr(value)
+  return str(value)
+
+
+class _OuraMetricsWriter(object):
+  """Writes metrics in Prometheus text format, grouped by metric family."""
+
+  def __init__(self):
+    """Instantiates a new _OuraMetricsWriter class."""
+    # Map of metric families to their type, help and sample lines.
+    self._families = {}
+
+  def _add_sample(
+          self, family, metric_type, help_text, name, labels, value):
+    """Adds a sample line to a metric family."""
+    family_metrics = self._families.setdefault(
+        family, {'type': metric_type, 'help': help_text, 'samples': []})
+    label_text = ','.join(
+        f'{label}="{_escape_label(label_value)}"'
+        for label, label_value in labels.items())
+    family_metrics['samples'].append(
+        f'{name}{{{label_text}}} {_format_value(value)}')
+
+  def add_counter(self, name, help_text, labels, value):
+    """Adds the value of a counter."""
+    self._add_sample(name, 'counter', help_text, name, labels, value)
+
+  def add_gauge(self, name, help_text, labels, value):
+    """Adds the value of a gauge. None values are skipped."""
+    if value is None:
+      return
+    self._add_sample(name, 'gauge', help_text, name, labels, value)
+
+  def add_histogram(self, name, help_text, labels, histogram):
+    """Adds the buckets, sum and count of a histogram."""
+    for upper_bound, count in histogram.buckets:
+      self._add_sample(
+          name, 'histogram', help_text, f'{name}_bucket',
+          {**labels, 'le': _format_value(upper_bound)}, count)
+    self._add_sample(
+        name, 'histogram', help_text, f'{name}_sum', labels, histogram.sum)
+    self._add_sample(
+        name, 'histogram', help_text, f'{name}_count', labels,
+        histogram.count)
+
+  def to_text(self):
+    """Gets all the metrics in Prometheus text format."""
+    lines = []
+    for family, family_metrics in self._families.items():
+      lines.append(f'# HELP {family} {family_metrics["help"]}')
+      lines.append(f'# TYPE {family} {family_metrics["type"]}')
+      lines.extend(family_metrics['samples'])
+    return '\n'.join(lines) + '\n'
+
+
+@core.callback
+def async_get_metrics_text(hass):
+  """Gets the metrics of every Oura access token in Prometheus text format.
+
+  Args:
+    hass: Home-Assistant object.
+
+  Returns:
+    Text with the request, error and retry counts, status codes, latency and
+    response size histograms by endpoint, and the update duration histograms,
+    state writes and attributes written by sensor.
+  """
+  writer = _OuraMetricsWriter()
+
+  for oura_coordinator in hass.data.get(oura_const.DOMAIN, {}).values():
+    oura_api = oura_coordinator.api
+    token_labels = {'token': oura_coordinator.token_id}
+
+    for endpoint, endpoint_stats in oura_api.stats.endpoints.items():
+      labels = {**token_labels, 'endpoint': endpoint.name}
+      writer.add_counter(
+          'oura_api_requests_total', 'Requests sent to Oura API.',
+          labels, endpoint_stats['requests'])
+      writer.add_counter(
+          'oura_api_errors_total', 'Failed requests to Oura API.',
+          labels, endpoint_stats['errors'])
+      writer.add_counter(
+          'oura_api_retries_total',
+          'Requests sent again to Oura API after a failure.',
+          labels, endpoint_stats['retries'])
+      writer.add_counter(
+          'oura_api_rate_limited_total',
+          'Responses of Oura API asking to slow down.',
+          labels, endpoint_stats['rate_limited'])
+      writer.add_counter(
+          'oura_api_received_bytes_total',
+          'Bytes received from Oura API.',
+          labels, endpoint_stats['received_bytes'])
+      for status, count in sorted(endpoint_stats['status_codes'].items()):
+        writer.add_counter(
+            'oura_api_responses_total', 'Responses of Oura API by status.',
+            {**labels, 'status': status}, count)
+      writer.add_histogram(
+          'oura_api_request_duration_seconds',
+          'Time until the whole response of Oura API was received.',
+          labels, endpoint_stats['latency_histogram'])
+      writer.add_histogram(
+          'oura_api_response_size_bytes',
+          'Size of the responses of Oura API.',
+          labels, endpoint_stats['size_histogram'])
+      writer.add_gauge(
+          'oura_api_last_success_timestamp_seconds',
+          'Time of the last successful response of Oura API.',
+          labels, endpoint_stats['last_success'])
+
+    writer.add_gauge(
+        'oura_api_circuit_breaker_open',
+        'Whether requests to Oura API are paused after repeated failures.',
+        token_labels, int(oura_api.circuit_breaker.is_open))
+    writer.add_gauge(
+        'oura_api_rate_limiter_queue_depth',
+        'Requests to Oura API waiting for the rate limiter.',
+        token_labels, oura_api.rate_limiter.queue_depth)
+
+    sensors_metrics = oura_coordinator.metrics.sensors
+    for sensor_name, sensor_metrics in sensors_metrics.items():
+      labels = {**token_labels, 'sensor': sensor_name}
+      writer.add_histogram(
+          'oura_sensor_update_duration_seconds',
+          'Time spent updating the state and attributes of a sensor.',
+          labels, sensor_metrics['update_duration'])
+      writer.add_counter(
+          'oura_sensor_state_writes_total',
+          'States written by a sensor.',
+          labels, sensor_metrics['state_writes'])
+      writer.add_counter(
+          'oura_sensor_attributes_written_total',
+          'Attribute values written with the states of a sensor.',
+          labels, sensor_metrics['attributes_written'])
+      writer.add_gauge(
+          'oura_sensor_last_change_timestamp_seconds',
+          'Time at which the data of a sensor last changed.',
+          labels, sensor_metrics['last_change'])
+
+  return writer.to_text()
+
+
+class OuraMetricsView(http.HomeAssistantView):
+  """Serves Oura metrics in Prometheus text format.
+
+  Requests require a Home-Assistant access token, like the rest of its API.
+  """
+
+  url = METRICS_URL
+  name = _METRICS_VIEW_NAME
+  requires_auth = True
+
+  async def get(self, request):
+    """Returns the metrics of every Oura access token.
+
+    Args:
+      request: aiohttp request.
+
+    Returns:
+      aiohttp response with the metrics.
+    """
+    hass = request.app[http.KEY_HASS]
+    return web.Response(
+        body=async_get_metrics_text(hass).encode(),
+        headers={'Content-Type': _CONTENT_TYPE})
+
+
+@core.callback
+def async_setup_metrics(hass):
+  """Registers the metrics view, if not yet registered.
+
+  Args:
+    hass: Home-Assistant object.
+  """
+  if hass.data.get(_DATA_METRICS_VIEW):
+    return
+
+  if not hass.http:
+    logging.warning(
+        'Oura: Unable to serve metrics as the HTTP integration is not set up.')
+    return
+
+  hass.http.register_view(OuraMetricsView())
+  hass.data[_DATA_METRICS_VIEW] = True
@@ -0,0 +1,140 @@
+"""Provides an OuraProfiler class to time the stages of sensor updates."""
+
+import logging
+import time
+
+# Stages of sensor updates, in the order they run.
+STAGE_FETCH = 'fetch'
+STAGE_PARSE = 'parse'
+STAGE_MAP = 'map'
+STAGE_STATE = 'state'
+STAGE_FILTER = 'filter'
+
+
+class OuraProfiler(object):
+  """Records the duration and item counts of each stage of sensor updates.
+
+  Stages are recorded for a subject (an endpoint for fetches, a sensor for
+  the rest) while an update runs, possibly several times (e.g. once per page),
+  and committed together once the update is over. Disabled profilers do not
+  read the clock, so they cost a single check per stage.
+
+  Properties:
+    is_enabled: whether stages are recorded.
+    stages: map of subjects to their stages on the last update.
+
+  Methods:
+    add: adds the run of a stage.
+    add_listener: adds a function called after every update cycle.
+    commit: finishes the update of a subject and logs its stages.
+    enable: starts recording stages.
+    notify_listeners: calls the listeners once an update cycle is over.
+    start: gets the start time of a stage.
+  """
+
+  def __init__(self, is_enabled=False):
+    """Instantiates a new OuraProfiler class.
+
+    Args:
+      is_enabled: Whether stages are recorded.
+    """
+    self._is_enabled = is_enabled
+
+    # Map of subjects to their stages, while being updated and once committed.
+    self._pending_stages = {}
+    self._stages = {}
+
+    self._listeners = []
+
+  @property
+  def is_enabled(self):
+    """Returns whether stages are recorded."""
+    return self._is_enabled
+
+  @property
+  def stages(self):
+    """Returns the map of subjects to their stages on the last update.
+
+    Each stage holds its `duration_ms`, `runs`, `items` and `bytes` (only for
+    fetches).
+    """
+    return self._stages
+
+  def enable(self):
+    """Starts recording stages, e.g. once any platform enables profiling."""
+    self._is_enabled = True
+
+  def start(self):
+    """Gets the start time of a stage.
+
+    Returns:
+      Current time in seconds. None if the profiler is disabled.
+    """
+    if not self._is_enabled:
+      return None
+    return time.perf_counter()
+
+  def add(self, subject, stage, start_time, items=0, received_bytes=None):
+    """Adds the run of a stage, which finished now.
+
+    Args:
+      subject: Name of the endpoint or sensor.
+      stage: Name of the stage.
+      start_time: Time at which the stage started, as returned by start().
+      items: Number of items processed by the stage (e.g. days, points).
+      received_bytes: Number of bytes received from Oura, for fetches.
+    """
+    if start_time is None:
+      return
+
+    duration = time.perf_counter() - start_time
+    stage_stats = self._pending_stages.setdefault(subject, {}).setdefault(
+        stage, {'duration_ms': 0, 'runs': 0, 'items': 0})
+    stage_stats['duration_ms'] += duration * 1000
+    stage_stats['runs'] += 1
+    stage_stats['items'] += items or 0
+    if received_bytes is not None:
+      stage_stats['bytes'] = stage_stats.get('bytes', 0) + received_bytes
+
+  def commit(self, subject):
+    """Finishes the update of a subject and logs its stages.
+
+    Args:
+      subject: Name of the endpoint or sensor.
+    """
+    subject_stages = self._pending_stages.pop(subject, None)
+    if not subject_stages:
+      return
+
+    for stage_stats in subject_stages.values():
+      stage_stats['duration_ms'] = round(stage_stats['duration_ms'], 3)
+    self._stages[subject] = subject_stages
+
+    logging.debug(
+        f'Oura ({subject}): ' + ', '.join(
+            f'{stage} {stage_stats["duration_ms"]:.1f} ms '
+            f'({stage_stats["items"]} items'
+            + (f', {stage_stats["bytes"]} bytes' if 'bytes' in stage_stats
+               else '')
+            + ')'
+            for stage, stage_stats in subject_stages.items()))
+
+  def add_listener(self, listener):
+    """Adds a function called after every update cycle.
+
+    Args:
+      listener: Function without arguments.
+
+    Returns:
+      Function removing the listener.
+    """
+    self._listeners.append(listener)
+    return lambda: self._listeners.remove(listener)
+
+  def notify_listeners(self):
+    """Calls the listeners once an update cycle is over."""
+    if not self._is_enabled:
+      return
+
+    for listener in list(self._listeners):
+      listener()
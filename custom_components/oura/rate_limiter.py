@@ -0,0 +1,89 @@
+"""Provides an OuraRateLimiter class to stay within Oura API rate limits."""
+
+import asyncio
+import time
+
+# Oura allows 5000 requests per 5 minutes for each access token.
+DEFAULT_RATE = 5000 / (5 * 60)
+DEFAULT_CAPACITY = 10
+
+
+class OuraRateLimiter(object):
+  """Token bucket shared by all the requests of an access token.
+
+  Requests wait in a FIFO queue until a token is available, so bursts (e.g. at
+  start-up) are smoothed instead of rejected by Oura. The bucket can also be
+  paused, e.g. when Oura asks to retry after some time.
+
+  Properties:
+    queue_depth: number of requests waiting for a token.
+
+  Methods:
+    async_acquire: waits until a request can be sent.
+    pause: stops all requests for some time.
+  """
+
+  def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_CAPACITY):
+    """Instantiates a new OuraRateLimiter class.
+
+    Args:
+      rate: Tokens added to the bucket per second.
+      capacity: Maximum number of tokens in the bucket.
+    """
+    self._rate = rate
+    self._capacity = capacity
+
+    self._tokens = capacity
+    self._last_refill = time.monotonic()
+    self._paused_until = 0
+
+    self._lock = asyncio.Lock()
+    self._queue_depth = 0
+
+  @property
+  def queue_depth(self):
+    """Returns the number of requests waiting for a token."""
+    return self._queue_depth
+
+  def _get_wait_time(self):
+    """Refills the bucket and gets the time to wait for the next token.
+
+    Returns:
+      Seconds to wait. 0 if a token is available.
+    """
+    now = time.monotonic()
+    self._tokens = min(
+        self._capacity,
+        self._tokens + (now - self._last_refill) * self._rate)
+    self._last_refill = now
+
+    if now < self._paused_until:
+      return self._paused_until - now
+
+    if self._tokens < 1:
+      return (1 - self._tokens) / self._rate
+
+    return 0
+
+  async def async_acquire(self):
+    """Waits until a request can be sent and consumes a token."""
+    self._queue_depth += 1
+    try:
+      # The lock keeps waiting requests in order.
+      async with self._lock:
+        wait_time = self._get_wait_time()
+        while wait_time:
+          await asyncio.sleep(wait_time)
+          wait_time = self._get_wait_time()
+
+        self._tokens -= 1
+    finally:
+      self._queue_depth -= 1
+
+  def pause(self, seconds):
+    """Stops all requests for some time.
+
+    Args:
+      seconds: Seconds during which no request can be sent.
+    """
+    self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -3,15 +3,21 @@
 from homeassistant import const
 from homeassistant.helpers import config_validation as cv
 import voluptuous as vol
+from . import const as oura_const
+from . import coordinator
+from . import metrics
 from . import sensor_activity
 from . import sensor_bedtime
 from . import sensor_heart_rate
+from . import sensor_profiler
 from . import sensor_readiness
 from . import sensor_sessions
 from . import sensor_sleep
 from . import sensor_sleep_periods
 from . import sensor_sleep_score
 from . import sensor_workouts
+from . import services
+from . import transport
 
 
 _SENSORS_SCHEMA = {
@@ -32,6 +38,72 @@ _SENSORS_SCHEMA = {
 PLATFORM_SCHEMA = cv.PLATFORM_SCHEMA.extend({
     vol.Required(const.CONF_ACCESS_TOKEN): cv.string,
     vol.Optional(const.CONF_SENSORS): _SENSORS_SCHEMA,
+    vol.Optional(
+        oura_const.CONF_ADAPTIVE_POLLING,
+        default=oura_const.DEFAULT_ADAPTIVE_POLLING
+    ): cv.boolean,
+    vol.Optional(
+        oura_const.CONF_MAX_SCAN_INTERVAL,
+        default=oura_const.DEFAULT_MAX_SCAN_INTERVAL
+    ): cv.time_period,
+    vol.Optional(
+        oura_const.CONF_SYNC_DETECTION,
+        default=oura_const.DEFAULT_SYNC_DETECTION
+    ): cv.boolean,
+    vol.Optional(
+        oura_const.CONF_SYNC_DETECTION_INTERVAL,
+        default=oura_const.DEFAULT_SYNC_DETECTION_INTERVAL
+    ): cv.time_period,
+    vol.Optional(
+        oura_const.CONF_CACHE_FINALITY,
+        default=oura_const.DEFAULT_CACHE_FINALITY
+    ): cv.positive_int,
+    vol.Optional(
+        oura_const.CONF_CONNECT_TIMEOUT,
+        default=oura_const.DEFAULT_CONNECT_TIMEOUT
+    ): cv.positive_int,
+    vol.Optional(
+        oura_const.CONF_READ_TIMEOUT,
+        default=oura_const.DEFAULT_READ_TIMEOUT
+    ): cv.positive_int,
+    vol.Optional(
+        oura_const.CONF_MAX_CONCURRENT_REQUESTS,
+        default=oura_const.DEFAULT_MAX_CONCURRENT_REQUESTS
+    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(
+        oura_const.CONF_MAX_RETRIES,
+        default=oura_const.DEFAULT_MAX_RETRIES
+    ): cv.positive_int,
+    vol.Optional(
+        oura_const.CONF_PROFILING,
+        default=oura_const.DEFAULT_PROFILING
+    ): cv.boolean,
+    vol.Optional(
+        oura_const.CONF_METRICS,
+        default=oura_const.DEFAULT_METRICS
+    ): cv.boolean,
+    vol.Optional(
+        oura_const.CONF_BASE_URL,
+        default=oura_const.DEFAULT_BASE_URL
+    ): cv.url,
+    vol.Optional(
+        oura_const.CONF_TRANSPORT,
+        default=oura_const.DEFAULT_TRANSPORT
+    ): vol.In(transport.MODES),
+    vol.Optional(
+        oura_const.CONF_CASSETTE,
+        default=oura_const.DEFAULT_CASSETTE
+    ): cv.string,
+    vol.Optional(
+        oura_const.CONF_REPLAY_TIMING,
+        default=oura_const.DEFAULT_REPLAY_TIMING
+    ): vol.In(transport.TIMINGS),
+    vol.Optional(
+        oura_const.CONF_WEBHOOK,
+        default=oura_const.DEFAULT_WEBHOOK
+    ): cv.boolean,
+    vol.Optional(oura_const.CONF_CLIENT_ID): cv.string,
+    vol.Optional(oura_const.CONF_CLIENT_SECRET): cv.string,
 })
 
 
@@ -73,4 +145,25 @@ async def async_setup_platform(
   if sensor_workouts.CONF_KEY_NAME in sensors_config:
     sensors.append(sensor_workouts.OuraWorkoutsSensor(config, hass))
 
-  async_add_entities(sensors, True)
+  # Sensors sharing an access token share a coordinator, which fetches each
+  # endpoint once for all of them.
+  oura_coordinator = coordinator.get_coordinator(hass, config)
+  for sensor in sensors:
+    oura_coordinator.register_sensor(sensor)
+
+  # The profiler sensor is updated by the profiler, not by the coordinator.
+  # The profiler is shared by all the platforms with the same token, so it is
+  # enabled if any of them enables profiling.
+  if config.get(oura_const.CONF_PROFILING):
+    oura_coordinator.profiler.enable()
+    sensors.append(sensor_profiler.OuraProfilerSensor(config, hass))
+
+  # Sensors are added with their last known data and refreshed afterwards.
+  async_add_entities(sensors)
+  oura_coordinator.async_schedule_refresh()
+
+  services.async_setup_services(hass)
+
+  if config.get(oura_const.CONF_METRICS):
+    oura_coordinator.metrics.enable()
+    metrics.async_setup_metrics(hass)
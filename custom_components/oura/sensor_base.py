@@ -1,24 +1,32 @@
 """Provides a base OuraSensor class to handle interactions with Oura API."""
 
+import json
 import logging
 from homeassistant import const
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers import entity
-from . import api
+from homeassistant.helpers import restore_state
+from . import coordinator
+from .helpers import memory_helper
 
 SENSOR_NAME = 'oura'
 
 
-class OuraSensor(entity.Entity):
+class OuraSensor(restore_state.RestoreEntity):
   """Representation of an Oura Ring sensor.
 
+  Until the first data is fetched, sensors show the last state and attributes
+  known before Home-Assistant was restarted.
+
   Attributes:
     name: name of the sensor.
     state: state of the sensor.
     extra_state_attributes: attributes of the sensor.
 
   Methods:
+    async_added_to_hass: restores the last known state and attributes.
     async_update: updates sensor data.
+    get_diagnostics: gets statistics of the data held by the sensor.
+    update_from_sensor_data: updates sensor data from parsed Oura data.
   """
 
   def __init__(self, config, hass):
@@ -30,13 +38,21 @@ class OuraSensor(entity.Entity):
     self._hass = hass
     self._name = SENSOR_NAME
 
-    # API config.
-    access_token = config.get(const.CONF_ACCESS_TOKEN)
-    self._api = api.OuraApi(self, access_token)
+    # API config. Data is fetched by the coordinator shared by all the sensors
+    # with the same access token.
+    self._coordinator = coordinator.get_coordinator(hass, config)
+    self._api = self._coordinator.api
+    self._profiler = self._coordinator.profiler
 
     # Attributes.
     self._state = None  # Sleep score.
     self._attributes = {}
+    self._is_data_fetched = False
+    self._fingerprint = None
+
+    # Size of the data parsed on the last update.
+    self._data_days = 0
+    self._data_points = 0
 
   # Sensor properties.
   @property
@@ -44,6 +60,16 @@ class OuraSensor(entity.Entity):
     """Returns the name of the sensor."""
     return self._name
 
+  @property
+  def is_awaiting_data(self):
+    """Returns whether data is expected but not yet available from Oura."""
+    return False
+
+  @property
+  def should_poll(self):
+    """Returns False as updates are pushed by the coordinator."""
+    return False
+
   @property
   def state(self):
     """Returns the state of the sensor."""
@@ -55,9 +81,106 @@ class OuraSensor(entity.Entity):
     return self._attributes
 
   # Sensor methods.
-  def _update(self):
+  def _get_fingerprint(self):
+    """Gets a fingerprint of the state and attributes of the sensor.
+
+    Returns:
+      Hash of the state and attributes, to cheaply detect changes.
+    """
+    return hash(json.dumps(
+        [self._state, self._attributes], sort_keys=True, default=str))
+
+  def _get_data_size(self, sensor_data):
+    """Gets the size of parsed Oura data.
+
+    Args:
+      sensor_data: Map of dates to the data parsed by the sensor, either a
+        document or a list of them.
+
+    Returns:
+      (days, points) in the data.
+    """
+    if not sensor_data:
+      return (0, 0)
+
+    return (
+        len(sensor_data),
+        sum(
+            len(day_data) if isinstance(day_data, list) else 1
+            for day_data in sensor_data.values()),
+    )
+
+  def _get_restorable_attributes(self, attributes):
+    """Gets the attributes of a restored state which the sensor manages.
+
+    Args:
+      attributes: Attributes of the last known state.
+
+    Returns:
+      Attributes set by the sensor itself, without the ones managed by
+      Home-Assistant (e.g. friendly_name). To be implemented by the sensor.
+    """
+    return {}
+
+  def _update(self, sensor_data, day_index=None):
     """To be implemented by the sensor."""
 
+  async def async_added_to_hass(self):
+    """Restores the last known state and attributes of the sensor."""
+    await super(OuraSensor, self).async_added_to_hass()
+
+    # Data fetched in the meantime is never replaced by older data.
+    if self._is_data_fetched:
+      return
+
+    last_state = await self.async_get_last_state()
+    if not last_state or last_state.state in (
+            const.STATE_UNKNOWN, const.STATE_UNAVAILABLE):
+      return
+
+    self._state = last_state.state
+    self._attributes = self._get_restorable_attributes(last_state.attributes)
+
+  async def async_will_remove_from_hass(self):
+    """Unsubscribes the sensor from the coordinator."""
+    self._coordinator.unregister_sensor(self)
+
   async def async_update(self):
-    """Updates the state and attributes of the sensor."""
-    await self._hass.async_add_executor_job(self._update)
+    """Updates the state and attributes of all the token sensors."""
+    await self._coordinator.async_refresh()
+
+  def get_diagnostics(self):
+    """Gets statistics of the data held by the sensor.
+
+    Returns:
+      Map with the days and points parsed on the last update, the number of
+      attributes and the approximate memory used by the state and attributes.
+    """
+    return {
+        'entity_id': self.entity_id,
+        'days': self._data_days,
+        'points': self._data_points,
+        'attributes': len(self._attributes),
+        'memory_bytes': memory_helper.get_deep_size(
+            [self._state, self._attributes]),
+    }
+
+  def update_from_sensor_data(self, sensor_data, day_index=None):
+    """Updates the state and attributes of the sensor from parsed Oura data.
+
+    Args:
+      sensor_data: Oura data parsed by the sensor.
+      day_index: DayIndex of the days with data of the sensor endpoint. If not
+        set, it is built from sensor_data.
+
+    Returns:
+      Whether the state or attributes of the sensor changed.
+    """
+    self._update(sensor_data, day_index)
+    self._is_data_fetched = True
+    (self._data_days, self._data_points) = self._get_data_size(sensor_data)
+
+    fingerprint = self._get_fingerprint()
+    is_changed = fingerprint != self._fingerprint
+    self._fingerprint = fingerprint
+    return is_changed
@@ -1,27 +1,18 @@
 """Provides a base OuraSensor class for dated Oura endpoints."""
 
 import datetime
-import enum
 import logging
-import re
 from homeassistant import const
 from . import const as oura_const
+from . import profiler
 from . import sensor_base
-from .helpers import date_helper
+from .helpers import date_plan_helper
+from .helpers import day_index_helper
+from .helpers import memory_helper
 
 
-class MonitoredDayType(enum.Enum):
-  """Types of days which can be monitored."""
-  UNKNOWN = 0
-  YESTERDAY = 1
-  WEEKDAY = 2
-  DAYS_AGO = 3
-
-
-_FULL_WEEKDAY_NAMES = [
-    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
-    'sunday',
-]
+# Kept for backwards compatibility.
+MonitoredDayType = date_plan_helper.MonitoredDayType
 
 
 class OuraDatedSensor(sensor_base.OuraSensor):
@@ -31,10 +22,16 @@ class OuraDatedSensor(sensor_base.OuraSensor):
     name: name of the sensor.
     state: state of the sensor.
     extra_state_attributes: attributes of the sensor.
+    api_endpoint: Oura API endpoint of the sensor.
+    monitored_date_range: date range required by the sensor.
 
   Methods:
     filter_individual_data_point: Filters a data point from the API.
-    get_sensor_data_from_api: Fetches data from the API.
+    get_data_days: Gets the days with parsed data.
+    get_diagnostics: Gets statistics of the data held by the sensor.
+    get_on_demand_attributes: Gets the variables served on demand.
+    get_sensor_data_pages_from_api: Fetches data pages from the API.
+    merge_sensor_data: Merges parsed data from several API pages.
     parse_individual_data_point: Parses a data point from the API.
     parse_sensor_data: Parses data from the API.
   """
@@ -71,111 +68,142 @@ class OuraDatedSensor(sensor_base.OuraSensor):
         in self._sensor_config.get(oura_const.CONF_MONITORED_DATES)
     ] if self._sensor_config.get(oura_const.CONF_MONITORED_DATES) else []
 
+    # Variables kept out of the attributes, which are only served on demand.
+    self._on_demand_variables = [
+        variable_name.lower()
+        for variable_name
+        in self._sensor_config.get(oura_const.CONF_ON_DEMAND_VARIABLES)
+    ] if self._sensor_config.get(oura_const.CONF_ON_DEMAND_VARIABLES) else []
+    self._on_demand_attributes = {}
+
     # API endpoint for this sensor.
     self._api_endpoint = ''
     # Empty daily sensor data.
     self._empty_sensor = {}
 
+  # Sensor properties.
+  @property
+  def api_endpoint(self):
+    """Returns the Oura API endpoint of the sensor."""
+    return self._api_endpoint
+
+  @property
+  def is_awaiting_data(self):
+    """Returns whether there is no data yet for the first monitored date."""
+    return self._state is None
+
+  @property
+  def monitored_date_range(self):
+    """Returns the (start_date, end_date) required by the sensor."""
+    return self._get_monitored_date_range()
+
   def _filter_monitored_variables(self, sensor_data):
     """Filters the sensor data to only contain monitored variables.
 
+    Variables served on demand are excluded, as they are not exposed as
+    attributes.
+
     Args:
       sensor_data: Map of dates to sensor data.
 
     Returns:
       Same sensor_data map but filtered to only contain monitored variables.
     """
-    data = {}
-    data.update(sensor_data)
+    return self._filter_variables(sensor_data, [
+        variable
+        for variable in self._monitored_variables
+        if variable not in self._on_demand_variables
+    ])
 
-    if not data:
-      return data
+  def _filter_variables(self, sensor_data, variables):
+    """Filters the sensor data to only contain the given variables.
 
-    for date_attributes in list(data.values()):
-      for variable in list(date_attributes.keys()):
-        if variable not in self._monitored_variables:
-          del date_attributes[variable]
-    return data
+    Args:
+      sensor_data: Map of dates to sensor data.
+      variables: List of variables to keep.
+
+    Returns:
+      New sensor_data map only containing the given variables.
+    """
+    return {
+        date_name: {
+            variable: value
+            for variable, value in date_attributes.items()
+            if variable in variables
+        }
+        for date_name, date_attributes in sensor_data.items()
+    }
 
-  def _get_backfill_date(self, date_name, date_value):
-    """Gets the backfill date for a given date and date name.
+  def _get_backfilled_data(
+          self, sensor_data, day_index, date_name, date_value):
+    """Gets the data for a monitored date, backfilling it if missing.
 
     Args:
-      date_name: Date name to backfill.
-      date_value: Last checked value.
+      sensor_data: All parsed sensor data with daily breakdowns.
+      day_index: DayIndex of the days with data of the sensor endpoint.
+      date_name: Name of the monitored date.
+      date_value: Monitored date in YYYY-MM-DD.
 
     Returns:
-      Potential backfill date. None if Unknown.
+      (date_value, daily_data) for the last date checked.
     """
-    date_type = self._get_date_type_by_name(date_name)
-
-    if date_type == MonitoredDayType.YESTERDAY:
-      return date_helper.add_days_to_string_date(date_value, -1)
-    elif date_type == MonitoredDayType.WEEKDAY:
-      return date_helper.add_days_to_string_date(date_value, -7)
-    elif date_type == MonitoredDayType.DAYS_AGO:
-      return date_helper.add_days_to_string_date(date_value, -1)
+    daily_data = sensor_data.get(date_value)
+    backfill_range = self._get_date_plan().backfill_ranges.get(date_name)
+    if daily_data or not backfill_range:
+      return (date_value, daily_data)
+
+    # Use the newest past date with data, within the backfill limit.
+    original_date = date_value
+    (first_ordinal, last_ordinal, step) = backfill_range
+    if not step:
+      date_value = None
     else:
-      return None
+      ordinal = day_index.get_newest_ordinal(first_ordinal, last_ordinal, step)
 
-  def _get_date_by_name(self, date_name):
-    """Translates a date name into YYYY-MM-DD format for the given day.
+      # The index is shared by all the sensors of the endpoint, so days which
+      # only have data for other sensors are skipped.
+      while ordinal and not sensor_data.get(
+              str(datetime.date.fromordinal(ordinal))):
+        ordinal = day_index.get_newest_ordinal(
+            first_ordinal, ordinal - step, step)
+
+      date_value = str(datetime.date.fromordinal(ordinal or first_ordinal))
+      if ordinal:
+        daily_data = sensor_data.get(date_value)
+
+    logging.warning(
+        (
+            f'Oura ({self._name}): No Oura data found for '
+            f'{date_name.title()} ({original_date}). Fetching {date_value} '
+            'instead.'
+        ) if date_value else (
+            f'Oura ({self._name}): Unable to find suitable backfill date. '
+            'No data available.'
+        )
+    )
+
+    return (date_value, daily_data)
+
+  def _get_day_index(self, sensor_data):
+    """Gets an index of the days with sensor data.
 
     Args:
-      date_name: Name of the date to get. Supported:
-        yesterday, weekday(e.g. monday, tuesday), Xdays_ago(e.g. 3days_ago).
+      sensor_data: All parsed sensor data with daily breakdowns.
 
     Returns:
-      Date in YYYY-MM-DD format.
+      DayIndex of the days with data.
     """
-    date_type = self._get_date_type_by_name(date_name)
-    today = datetime.date.today()
-    days_ago = None
-    if date_type == MonitoredDayType.YESTERDAY:
-      days_ago = 1
-
-    elif date_type == MonitoredDayType.WEEKDAY:
-      date_index = _FULL_WEEKDAY_NAMES.index(date_name)
-      days_ago = (
-          today.weekday() - date_index
-          if today.weekday() > date_index else
-          7 + today.weekday() - date_index
-      )
-
-    elif date_type == MonitoredDayType.DAYS_AGO:
-      digits_regex = re.compile(r'\d+')
-      digits_match = digits_regex.match(date_name)
-      if digits_match:
-        try:
-          days_ago = int(digits_match.group())
-        except:
-          days_ago = None
-
-    if days_ago is None:
-      logging.info(
-          f'Oura ({self._name}): ' +
-          'Unknown day name `{date_name}`, using yesterday.')
-      days_ago = 1
-
-    return str(today - datetime.timedelta(days=days_ago))
-
-  def _get_date_type_by_name(self, date_name):
-    """Gets the type of date format based in the date name.
+    return day_index_helper.DayIndex(self.get_data_days(sensor_data))
 
-    Args:
-      date_name: Date for which to verify type.
+  def _get_date_plan(self):
+    """Gets the monitored dates of the sensor resolved for today.
 
     Returns:
-      Date type(MonitoredDayType).
+      DatePlan shared by all sensors with the same monitored dates and
+      backfill.
     """
-    if date_name == 'yesterday':
-      return MonitoredDayType.YESTERDAY
-    elif date_name in _FULL_WEEKDAY_NAMES:
-      return MonitoredDayType.WEEKDAY
-    elif 'd_ago' in date_name or 'days_ago' in date_name:
-      return MonitoredDayType.DAYS_AGO
-    else:
-      return MonitoredDayType.UNKNOWN
+    return date_plan_helper.get_date_plan(
+        self._monitored_dates, self._backfill)
 
   def _get_monitored_date_range(self):
     """Returns tuple containing start and end date based on monitored dates.
@@ -183,23 +211,22 @@ class OuraDatedSensor(sensor_base.OuraSensor):
     Returns:
       (start_date, end_date) in YYYY-MM-DD
     """
-    sensor_dates = self._get_monitored_name_days()
+    return self._get_date_plan().date_range
 
-    today_date = datetime.datetime.today().strftime('%Y-%m-%d')
-    sensor_dates = sensor_dates.values()
-    start_date = (
-        min(sensor_dates) if len(sensor_dates) > 0 else today_date)
-    end_date = (
-        max(sensor_dates) if len(sensor_dates) > 0 else today_date)
+  def _get_restorable_attributes(self, attributes):
+    """Gets the attributes of a restored state which the sensor manages.
 
-    # Add an extra week to retrieve past week in case current week data is
-    # missing.
-    start_date = date_helper.add_days_to_string_date(start_date, -7)
-
-    # Add an extra day to retrieve today's date in case of timezone difference.
-    end_date = date_helper.add_days_to_string_date(end_date, 1)
+    Args:
+      attributes: Attributes of the last known state.
 
-    return (start_date, end_date)
+    Returns:
+      Attributes of the monitored dates.
+    """
+    return {
+        date_name: date_attributes
+        for date_name, date_attributes in attributes.items()
+        if date_name in self._monitored_dates
+    }
 
   def _get_monitored_name_days(self):
     """Gets the date name of all monitored days.
@@ -207,26 +234,27 @@ class OuraDatedSensor(sensor_base.OuraSensor):
     Returns:
       Map of date names to dates (YYYY-MM-DD) for monitored days.
     """
-    return {
-        date_name: self._get_date_by_name(date_name)
-        for date_name in self._monitored_dates
-    }
+    return self._get_date_plan().dates
 
-  def _map_data_to_monitored_days(self, sensor_data, default_attributes=None):
+  def _map_data_to_monitored_days(
+          self, sensor_data, default_attributes=None, day_index=None):
     """Reads sensor data and maps it to the monitored dates, incl. backfill.
 
     Args:
       sensor_data: All parsed sensor data with daily breakdowns.
       default_attributes: Sensor information to use if no data is retrieved.
+      day_index: DayIndex of the days with data of the sensor endpoint. If not
+        set, it is built from sensor_data.
 
     Returns:
       sensor_data mapped to monitored_dates.
     """
     sensor_dates = self._get_monitored_name_days()
-    (start_date, _) = self._get_monitored_date_range()
 
     if not sensor_data:
       sensor_data = {}
+    if day_index is None:
+      day_index = self._get_day_index(sensor_data)
 
     if not default_attributes:
       default_attributes = {}
@@ -237,31 +265,8 @@ class OuraDatedSensor(sensor_base.OuraSensor):
       date_attributes.update(default_attributes)
       date_attributes['day'] = date_value
 
-      daily_data = sensor_data.get(date_value)
-      date_name_title = date_name.title()
-
-      # Check past dates to see if backfill is possible when missing data.
-      backfill = 0
-      original_date = date_value
-      while (not daily_data
-             and backfill < self._backfill
-             and date_value >= start_date):
-        date_value = self._get_backfill_date(date_name, date_value)
-        if not date_value:
-          break
-        daily_data = sensor_data.get(date_value)
-        backfill += 1
-
-      if original_date != date_value:
-        logging.warning(
-            (
-                f'Oura ({self._name}): No Oura data found for '
-                f'{date_name_title} ({original_date}). Fetching {date_value} '
-                'instead.'
-            ) if date_value else (
-                f'Unable to find suitable backfill date. No data available.'
-            )
-        )
+      (_, daily_data) = self._get_backfilled_data(
+          sensor_data, day_index, date_name, date_value)
 
       if daily_data:
         date_attributes.update(daily_data)
@@ -292,24 +297,38 @@ class OuraDatedSensor(sensor_base.OuraSensor):
 
     self._state = first_date_attributes.get(self._main_state_attribute)
 
-  def _update(self):
-    """Fetches new state data for the sensor."""
-    (start_date, end_date) = self._get_monitored_date_range()
-
-    oura_data = self.get_sensor_data_from_api(start_date, end_date)
-    sensor_data = self.parse_sensor_data(oura_data)
+  def _update(self, sensor_data, day_index=None):
+    """Updates the state data for the sensor.
 
+    Args:
+      sensor_data: Map of dates to sensor data, as parsed by the sensor.
+      day_index: DayIndex of the days with data of the sensor endpoint. If not
+        set, it is built from sensor_data.
+    """
     if not sensor_data:
       sensor_data = {}
 
+    start_time = self._profiler.start()
     dated_attributes = self._map_data_to_monitored_days(
-        sensor_data, self._empty_sensor)
+        sensor_data, self._empty_sensor, day_index)
+    self._profiler.add(
+        self.name, profiler.STAGE_MAP, start_time, len(dated_attributes))
 
     # Update state must happen before filtering for monitored variables.
+    start_time = self._profiler.start()
     self._update_state(dated_attributes)
+    self._profiler.add(self.name, profiler.STAGE_STATE, start_time)
+
+    start_time = self._profiler.start()
+    self._on_demand_attributes = self._filter_variables(
+        dated_attributes, self._on_demand_variables)
 
     dated_attributes = self._filter_monitored_variables(dated_attributes)
     self._attributes = dated_attributes
+    self._profiler.add(
+        self.name, profiler.STAGE_FILTER, start_time,
+        sum(len(attributes) for attributes in dated_attributes.values()
+            if isinstance(attributes, dict)))
 
   def filter_individual_data_point(self, data_point):
     """Filters an individual data point.
@@ -324,7 +343,53 @@ class OuraDatedSensor(sensor_base.OuraSensor):
     """
     return True
 
-  def get_sensor_data_from_api(self, start_date, end_date):
+  def get_diagnostics(self):
+    """Gets statistics of the data held by the sensor.
+
+    Returns:
+      Map with the endpoint, the days and points parsed on the last update,
+      the number of attributes and the approximate memory used by the state,
+      attributes and variables served on demand.
+    """
+    diagnostics = super(OuraDatedSensor, self).get_diagnostics()
+    diagnostics['endpoint'] = self._api_endpoint.name
+    diagnostics['memory_bytes'] += memory_helper.get_deep_size(
+        self._on_demand_attributes)
+    return diagnostics
+
+  def get_data_days(self, sensor_data):
+    """Gets the days with parsed data.
+
+    Args:
+      sensor_data: Map of dates to sensor data, as parsed by the sensor.
+
+    Returns:
+      Iterable of days (YYYY-MM-DD) with data.
+    """
+    return [day for day, daily_data in sensor_data.items() if daily_data]
+
+  def get_on_demand_attributes(self, date_names=None, variables=None):
+    """Gets the variables which are served on demand instead of as attributes.
+
+    Args:
+      date_names: Monitored dates to get. All of them if empty.
+      variables: On demand variables to get. All of them if empty.
+
+    Returns:
+      Map of monitored dates to on demand sensor data.
+    """
+    on_demand_attributes = {
+        date_name: date_attributes
+        for date_name, date_attributes in self._on_demand_attributes.items()
+        if not date_names or date_name in date_names
+    }
+
+    if not variables:
+      return on_demand_attributes
+
+    return self._filter_variables(on_demand_attributes, variables)
+
+  def get_sensor_data_pages_from_api(self, start_date, end_date):
     """Fetches data from the API for the sensor.
 
     Args:
@@ -332,9 +397,23 @@ class OuraDatedSensor(sensor_base.OuraSensor):
       end_date: End date in YYYY-MM-DD.
 
     Returns:
-      JSON object with API data.
+      Async iterator of JSON objects with each page of API data.
+    """
+    return self._api.async_get_oura_data_pages(
+        self._api_endpoint, start_date, end_date)
+
+  def merge_sensor_data(self, sensor_data, page_sensor_data):
+    """Merges the parsed data of an API page into previously parsed data.
+
+    Args:
+      sensor_data: Map of dates to sensor data parsed from previous pages.
+      page_sensor_data: Map of dates to sensor data parsed from a new page.
+
+    Returns:
+      Map of dates to sensor data for all pages.
     """
-    return self._api.get_oura_data(self._api_endpoint, start_date, end_date)
+    sensor_data.update(page_sensor_data)
+    return sensor_data
 
   def parse_individual_data_point(self, data_point):
     """Parses the individual day or data point.
@@ -25,48 +25,62 @@ class OuraDatedSeriesSensor(sensor_base_dated.OuraDatedSensor):
       sensor_config: Sub-section of config holding the particular sensor info.
 
     Methods:
+      merge_sensor_data: Merges parsed data from several API pages.
       parse_sensor_data: Parses data from API.
     """
     super(OuraDatedSeriesSensor, self).__init__(config, hass, sensor_config)
     self._sort_key = 'start_datetime'
 
-  def _filter_monitored_variables(self, sensor_data):
-    """Filters the sensor data to only contain monitored variables.
+  @property
+  def is_awaiting_data(self):
+    """Returns False, as days without series data (e.g. workouts) are usual."""
+    return False
+
+  def _filter_variables(self, sensor_data, variables):
+    """Filters the sensor data to only contain the given variables.
+
+    When some variables are served on demand, data points left without any
+    variable are dropped.
 
     Args:
       sensor_data: Map of dates to sensor data.
+      variables: List of variables to keep.
 
     Returns:
-      Same sensor_data map but filtered to only contain monitored variables.
+      New sensor_data map only containing the given variables.
     """
     data = {}
-    data.update(sensor_data)
-
-    if not data:
-      return data
-
-    for date_series in list(data.values()):
+    for date_name, date_series in sensor_data.items():
+      data[date_name] = []
       for daily_data_point in date_series:
-        for variable in list(daily_data_point.keys()):
-          if variable not in self._monitored_variables:
-            del daily_data_point[variable]
+        filtered_data_point = {
+            variable: value
+            for variable, value in daily_data_point.items()
+            if variable in variables
+        }
+        if filtered_data_point or not self._on_demand_variables:
+          data[date_name].append(filtered_data_point)
     return data
 
-  def _map_data_to_monitored_days(self, sensor_data, default_attributes=None):
+  def _map_data_to_monitored_days(
+          self, sensor_data, default_attributes=None, day_index=None):
     """Reads sensor data and maps it to the monitored dates, incl. backfill.
 
     Args:
       sensor_data: All parsed sensor data with daily breakdowns.
       default_attributes: Sensor information to use if no data is retrieved.
+      day_index: DayIndex of the days with data of the sensor endpoint. If not
+        set, it is built from sensor_data.
 
     Returns:
       sensor_data mapped to monitored_dates.
     """
     sensor_dates = self._get_monitored_name_days()
-    (start_date, _) = self._get_monitored_date_range()
 
     if not sensor_data:
       sensor_data = {}
+    if day_index is None:
+      day_index = self._get_day_index(sensor_data)
 
     if not default_attributes:
       default_attributes = {}
@@ -75,31 +89,8 @@ class OuraDatedSeriesSensor(sensor_base_dated.OuraDatedSensor):
     for date_name, date_value in sensor_dates.items():
       date_values = []
 
-      daily_data = sensor_data.get(date_value)
-      date_name_title = date_name.title()
-
-      # Check past dates to see if backfill is possible when missing data.
-      backfill = 0
-      original_date = date_value
-      while (not daily_data
-             and backfill < self._backfill
-             and date_value >= start_date):
-        date_value = self._get_backfill_date(date_name, date_value)
-        if not date_value:
-          break
-        daily_data = sensor_data.get(date_value)
-        backfill += 1
-
-      if original_date != date_value:
-        logging.warning(
-            (
-                f'Oura ({self._name}): No Oura data found for '
-                f'{date_name_title} ({original_date}). Fetching {date_value} '
-                'instead.'
-            ) if date_value else (
-                f'Unable to find suitable backfill date. No data available.'
-            )
-        )
+      (date_value, daily_data) = self._get_backfilled_data(
+          sensor_data, day_index, date_name, date_value)
 
       if not daily_data:
         daily_data = [self._empty_sensor]
@@ -153,6 +144,24 @@ class OuraDatedSeriesSensor(sensor_base_dated.OuraDatedSensor):
 
     self._state = first_series_attribute.get(self._main_state_attribute)
 
+  def merge_sensor_data(self, sensor_data, page_sensor_data):
+    """Merges the parsed data of an API page into previously parsed data.
+
+    Args:
+      sensor_data: Map of dates to sensor series parsed from previous pages.
+      page_sensor_data: Map of dates to sensor series parsed from a new page.
+
+    Returns:
+      Map of dates to sensor series for all pages.
+    """
+    for sensor_date, date_series in page_sensor_data.items():
+      if sensor_date not in sensor_data:
+        sensor_data[sensor_date] = []
+
+      sensor_data[sensor_date].extend(date_series)
+
+    return sensor_data
+
   def parse_sensor_data(self, oura_data, data_param='data', day_param='day'):
     """Parses data from the API.
 
@@ -1,12 +1,14 @@
 """Provides a heart rate sensor."""
 
 import datetime
+import logging
 import voluptuous as vol
 from homeassistant import const
 from homeassistant.helpers import config_validation as cv
 from . import api
 from . import const as oura_const
 from . import sensor_base_dated_series
+from .helpers import series_helper
 
 # Sensor configuration
 CONF_KEY_NAME = 'heart_rate'
@@ -15,6 +17,21 @@ _DEFAULT_NAME = 'oura_heart_rate'
 
 _DEFAULT_ATTRIBUTE_STATE = 'bpm'
 
+CONF_AGGREGATION = 'aggregation'
+_DEFAULT_AGGREGATION = 'mean'
+
+CONF_RESOLUTION = 'resolution'
+_DEFAULT_RESOLUTION = 'raw'
+
+# Seconds per bucket for each supported resolution.
+_RESOLUTIONS = {
+    'raw': None,
+    '5min': 5 * 60,
+    '15min': 15 * 60,
+    '30min': 30 * 60,
+    '1h': 60 * 60,
+}
+
 _DEFAULT_MONITORED_VARIABLES = [
     'day',
     'bpm',
@@ -51,6 +68,21 @@ CONF_SCHEMA = {
         oura_const.CONF_BACKFILL,
         default=oura_const.DEFAULT_BACKFILL
     ): cv.positive_int,
+
+    vol.Optional(
+        oura_const.CONF_ON_DEMAND_VARIABLES,
+        default=oura_const.DEFAULT_ON_DEMAND_VARIABLES
+    ): vol.All(cv.ensure_list, [vol.In(_SUPPORTED_MONITORED_VARIABLES)]),
+
+    vol.Optional(
+        CONF_RESOLUTION,
+        default=_DEFAULT_RESOLUTION
+    ): vol.In(list(_RESOLUTIONS.keys())),
+
+    vol.Optional(
+        CONF_AGGREGATION,
+        default=_DEFAULT_AGGREGATION
+    ): vol.In(series_helper.AGGREGATIONS),
 }
 
 _EMPTY_SENSOR_ATTRIBUTE = {
@@ -80,7 +112,12 @@ class OuraHeartRateSensor(sensor_base_dated_series.OuraDatedSeriesSensor):
     self._empty_sensor = _EMPTY_SENSOR_ATTRIBUTE
     self._sort_key = 'timestamp'
 
-  def get_sensor_data_from_api(self, start_date, end_date):
+    self._resolution = _RESOLUTIONS[
+        self._sensor_config.get(CONF_RESOLUTION, _DEFAULT_RESOLUTION)]
+    self._aggregation = self._sensor_config.get(
+        CONF_AGGREGATION, _DEFAULT_AGGREGATION)
+
+  def get_sensor_data_pages_from_api(self, start_date, end_date):
     """Fetches data from the API for the sensor.
 
     Args:
@@ -88,7 +125,7 @@ class OuraHeartRateSensor(sensor_base_dated_series.OuraDatedSeriesSensor):
       end_date: End date in YYYY-MM-DD.
 
     Returns:
-      JSON object with API data.
+      Async iterator of JSON objects with each page of API data.
     """
     start_date_parsed = datetime.datetime.strptime(start_date, "%Y-%m-%d")
     start_date_parsed = start_date_parsed.replace(
@@ -106,24 +143,122 @@ class OuraHeartRateSensor(sensor_base_dated_series.OuraDatedSeriesSensor):
     )
     end_time = end_date_parsed.isoformat()
 
-    return self._api.get_oura_data(self._api_endpoint, start_time, end_time)
+    return self._api.async_get_oura_data_pages(
+        self._api_endpoint, start_time, end_time)
+
+  def _create_series(self):
+    """Creates an empty series with the sensor resolution and aggregation."""
+    return series_helper.HeartRateSeries(self._resolution, self._aggregation)
+
+  def _map_data_to_monitored_days(
+          self, sensor_data, default_attributes=None, day_index=None):
+    """Reads sensor data and maps it to the monitored dates, incl. backfill.
+
+    Samples are only converted into attributes for the monitored dates.
+
+    Args:
+      sensor_data: HeartRateSeries with all the parsed samples.
+      default_attributes: Sensor information to use if no data is retrieved.
+      day_index: DayIndex of the days with data of the sensor endpoint. If not
+        set, it is built from sensor_data.
+
+    Returns:
+      sensor_data mapped to monitored_dates.
+    """
+    sensor_dates = self._get_monitored_name_days()
+
+    if not sensor_data:
+      sensor_data = self._create_series()
+    if day_index is None:
+      day_index = self._get_day_index(sensor_data)
+
+    if not default_attributes:
+      default_attributes = {}
+
+    dated_attributes_map = {}
+    for date_name, date_value in sensor_dates.items():
+      (date_value, daily_data) = self._get_backfilled_data(
+          sensor_data, day_index, date_name, date_value)
+
+      if not daily_data:
+        empty_attributes = dict()
+        empty_attributes.update(default_attributes)
+        empty_attributes['day'] = date_value
+        daily_data = [empty_attributes]
+
+      dated_attributes_map[date_name] = daily_data
 
-  def parse_individual_data_point(self, data_point):
-    """Parses the individual day or data point.
+    return dated_attributes_map
+
+  def _get_data_size(self, sensor_data):
+    """Gets the size of parsed Oura data.
 
     Args:
-      data_point: Object for an individual day or data point.
+      sensor_data: HeartRateSeries parsed by the sensor.
 
     Returns:
-      Modified data point with right parsed data.
+      (days, samples) in the series.
     """
-    data_point_copy = {}
-    data_point_copy.update(data_point)
+    if not isinstance(sensor_data, series_helper.HeartRateSeries):
+      return (0, 0)
+
+    return (len(sensor_data.days), len(sensor_data))
+
+  def get_data_days(self, sensor_data):
+    """Gets the days with heart rate samples.
+
+    Args:
+      sensor_data: HeartRateSeries with parsed samples.
+
+    Returns:
+      Iterable of days (YYYY-MM-DD) with samples.
+    """
+    if not isinstance(sensor_data, series_helper.HeartRateSeries):
+      return []
+
+    return sensor_data.days
+
+  def merge_sensor_data(self, sensor_data, page_sensor_data):
+    """Merges the parsed data of an API page into previously parsed data.
+
+    Args:
+      sensor_data: HeartRateSeries parsed from previous pages.
+      page_sensor_data: HeartRateSeries parsed from a new page.
+
+    Returns:
+      HeartRateSeries for all pages.
+    """
+    if not isinstance(sensor_data, series_helper.HeartRateSeries):
+      sensor_data = self._create_series()
+
+    if page_sensor_data:
+      sensor_data.extend(page_sensor_data)
+
+    return sensor_data
+
+  def parse_sensor_data(self, oura_data, data_param='data', day_param='day'):
+    """Parses data from the API.
+
+    Args:
+      oura_data: Data from Oura API.
+      data_param: Parameter where data is found. By default: 'data'.
+      day_param: Unused, as the day is derived from the sample timestamp.
+
+    Returns:
+      HeartRateSeries with the samples of the data.
+    """
+    series = self._create_series()
+
+    if not oura_data or data_param not in oura_data:
+      logging.error(
+          f'Oura ({self._name}): Couldn\'t fetch data for Oura ring sensor.')
+      return series
+
+    for data_point in oura_data.get(data_param) or []:
+      timestamp = data_point.get('timestamp')
+      if not timestamp:
+        continue
 
-    timestamp = data_point_copy.get('timestamp')
-    if timestamp:
-      parsed_timestamp = datetime.datetime.fromisoformat(timestamp)
-      day = parsed_timestamp.strftime('%Y-%m-%d')
-      data_point_copy['day'] = day
+      series.append(timestamp, data_point.get('bpm'), data_point.get('source'))
 
-    return data_point_copy
+    return series
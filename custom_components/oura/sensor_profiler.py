@@ -0,0 +1,65 @@
+"""Provides a diagnostic sensor with the timings of sensor updates."""
+
+from homeassistant import const
+from homeassistant.helpers import entity
+from . import coordinator
+
+_DEFAULT_NAME = 'oura_profiler'
+
+_UNIT_OF_MEASUREMENT = 'ms'
+
+
+class OuraProfilerSensor(entity.Entity):
+  """Diagnostic sensor with the stages of the last update of each sensor.
+
+  It is only added when profiling is enabled. Its state is the total time
+  spent on the last update of every endpoint and sensor, and its attributes
+  hold the duration and item counts of each of their stages.
+
+  Attributes:
+    name: name of the sensor.
+    state: state of the sensor.
+    extra_state_attributes: attributes of the sensor.
+  """
+
+  _attr_entity_category = const.EntityCategory.DIAGNOSTIC
+  _attr_should_poll = False
+  _attr_unit_of_measurement = _UNIT_OF_MEASUREMENT
+
+  def __init__(self, config, hass):
+    """Initializes the sensor."""
+    self._name = _DEFAULT_NAME
+    self._profiler = coordinator.get_coordinator(hass, config).profiler
+    self._unsubscribe_profiler = None
+
+  @property
+  def name(self):
+    """Returns the name of the sensor."""
+    return self._name
+
+  @property
+  def state(self):
+    """Returns the total milliseconds spent on the last updates."""
+    if not self._profiler.stages:
+      return None
+
+    return round(sum(
+        stage_stats['duration_ms']
+        for subject_stages in self._profiler.stages.values()
+        for stage_stats in subject_stages.values()), 1)
+
+  @property
+  def extra_state_attributes(self):
+    """Returns the stages of the last update of each endpoint and sensor."""
+    return self._profiler.stages
+
+  async def async_added_to_hass(self):
+    """Writes the state of the sensor after every update cycle."""
+    self._unsubscribe_profiler = self._profiler.add_listener(
+        self.async_write_ha_state)
+
+  async def async_will_remove_from_hass(self):
+    """Stops writing the state of the sensor."""
+    if self._unsubscribe_profiler:
+      self._unsubscribe_profiler()
+      self._unsubscribe_profiler = None
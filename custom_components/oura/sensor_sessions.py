@@ -56,6 +56,11 @@ CONF_SCHEMA = {
         oura_const.CONF_BACKFILL,
         default=oura_const.DEFAULT_BACKFILL
     ): cv.positive_int,
+
+    vol.Optional(
+        oura_const.CONF_ON_DEMAND_VARIABLES,
+        default=oura_const.DEFAULT_ON_DEMAND_VARIABLES
+    ): vol.All(cv.ensure_list, [vol.In(_SUPPORTED_MONITORED_VARIABLES)]),
 }
 
 _EMPTY_SENSOR_ATTRIBUTE = {
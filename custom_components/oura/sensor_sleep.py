@@ -2,13 +2,13 @@
 
 import voluptuous as vol
 
-from dateutil import parser
 from homeassistant import const
 from homeassistant.helpers import config_validation as cv
 from . import api
 from . import const as oura_const
 from . import sensor_base_dated
 from .helpers import date_helper
+from .helpers import timestamp_helper
 
 # Sensor configuration
 CONF_KEY_NAME = 'sleep'
@@ -90,6 +90,11 @@ CONF_SCHEMA = {
         oura_const.CONF_BACKFILL,
         default=oura_const.DEFAULT_BACKFILL
     ): cv.positive_int,
+
+    vol.Optional(
+        oura_const.CONF_ON_DEMAND_VARIABLES,
+        default=oura_const.DEFAULT_ON_DEMAND_VARIABLES
+    ): vol.All(cv.ensure_list, [vol.In(_SUPPORTED_MONITORED_VARIABLES)]),
 }
 
 _EMPTY_SENSOR_ATTRIBUTE = {
@@ -142,15 +147,14 @@ class OuraSleepSensor(sensor_base_dated.OuraDatedSensor):
     data_point_copy = {}
     data_point_copy.update(data_point)
 
-    bedtime_start = parser.parse(data_point_copy.get('bedtime_start'))
-    bedtime_end = parser.parse(data_point_copy.get('bedtime_end'))
-
     # Derived metrics.
     data_point_copy.update({
         # HH:MM at which you went bed.
-        'bedtime_start_hour': bedtime_start.strftime('%H:%M'),
+        'bedtime_start_hour': timestamp_helper.get_hour(
+            data_point_copy.get('bedtime_start')),
         # HH:MM at which you woke up.
-        'bedtime_end_hour': bedtime_end.strftime('%H:%M'),
+        'bedtime_end_hour': timestamp_helper.get_hour(
+            data_point_copy.get('bedtime_end')),
         # Hours in deep sleep.
         'deep_sleep_duration_in_hours': date_helper.seconds_to_hours(
             data_point_copy.get('deep_sleep_duration')),
@@ -0,0 +1,97 @@
+"""Provides Oura services to read sensor data and diagnostics on demand."""
+
+import voluptuous as vol
+from homeassistant import const
+from homeassistant import core
+from homeassistant.helpers import config_validation as cv
+from . import const as oura_const
+from . import diagnostics
+
+SERVICE_GET_DIAGNOSTICS = 'get_diagnostics'
+SERVICE_GET_SENSOR_DATA = 'get_sensor_data'
+
+_GET_DIAGNOSTICS_SCHEMA = vol.Schema({})
+
+_GET_SENSOR_DATA_SCHEMA = vol.Schema({
+    vol.Required(const.ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional(oura_const.CONF_MONITORED_DATES): cv.ensure_list,
+    vol.Optional(const.CONF_MONITORED_VARIABLES): cv.ensure_list,
+})
+
+
+def _get_sensors_by_entity_id(hass):
+  """Gets all the Oura sensors which have been added to Home-Assistant.
+
+  Args:
+    hass: Home-Assistant object.
+
+  Returns:
+    Map of entity ids to Oura sensors.
+  """
+  sensors = {}
+  for oura_coordinator in hass.data.get(oura_const.DOMAIN, {}).values():
+    for sensor in oura_coordinator.sensors:
+      if sensor.entity_id:
+        sensors[sensor.entity_id] = sensor
+  return sensors
+
+
+def async_setup_services(hass):
+  """Registers the Oura services, if not yet registered.
+
+  Args:
+    hass: Home-Assistant object.
+  """
+  if hass.services.has_service(oura_const.DOMAIN, SERVICE_GET_SENSOR_DATA):
+    return
+
+  async def async_get_diagnostics(call):
+    """Returns the diagnostics of the integration, with tokens redacted.
+
+    Args:
+      call: Service call.
+
+    Returns:
+      Diagnostics of every Oura access token.
+    """
+    return diagnostics.async_get_diagnostics(hass)
+
+  async def async_get_sensor_data(call):
+    """Returns the on demand variables of the requested sensors.
+
+    Args:
+      call: Service call.
+
+    Returns:
+      Map of entity ids to their on demand data by monitored date.
+    """
+    sensors = _get_sensors_by_entity_id(hass)
+    date_names = [
+        date_name.lower()
+        for date_name in call.data.get(oura_const.CONF_MONITORED_DATES, [])
+    ]
+    variables = [
+        variable.lower()
+        for variable in call.data.get(const.CONF_MONITORED_VARIABLES, [])
+    ]
+
+    return {
+        entity_id: sensors[entity_id].get_on_demand_attributes(
+            date_names, variables)
+        for entity_id in call.data[const.ATTR_ENTITY_ID]
+        if entity_id in sensors
+    }
+
+  hass.services.async_register(
+      oura_const.DOMAIN,
+      SERVICE_GET_DIAGNOSTICS,
+      async_get_diagnostics,
+      schema=_GET_DIAGNOSTICS_SCHEMA,
+      supports_response=core.SupportsResponse.ONLY)
+
+  hass.services.async_register(
+      oura_const.DOMAIN,
+      SERVICE_GET_SENSOR_DATA,
+      async_get_sensor_data,
+      schema=_GET_SENSOR_DATA_SCHEMA,
+      supports_response=core.SupportsResponse.ONLY)
@@ -0,0 +1,119 @@
+"""Provides an OuraSyncDetector class to detect when the ring syncs."""
+
+import asyncio
+import datetime
+import logging
+import aiohttp
+from homeassistant import core
+from homeassistant.helpers import event
+from . import api
+from . import circuit_breaker
+from .helpers import timestamp_helper
+
+# Heart rate samples are recorded every few minutes, so any sync uploads some
+# samples within this window.
+_SENTINEL_WINDOW = datetime.timedelta(hours=3)
+
+
+class OuraSyncDetector(object):
+  """Detects ring syncs by watching the newest heart rate sample.
+
+  New Oura documents only appear after the ring syncs through the phone app.
+  Heart rate samples are uploaded on every sync, so the detector periodically
+  fetches the last hours of heart rate and reports a sync whenever the newest
+  sample moves forward.
+
+  Methods:
+    start: starts watching for ring syncs.
+    stop: stops watching for ring syncs.
+  """
+
+  def __init__(self, hass, oura_api, interval, async_handle_sync):
+    """Instantiates a new OuraSyncDetector class.
+
+    Args:
+      hass: Home-Assistant object.
+      oura_api: OuraApi used to fetch heart rate.
+      interval: Time between checks (timedelta).
+      async_handle_sync: Coroutine function to call when the ring synced.
+    """
+    self._hass = hass
+    self._api = oura_api
+    self._interval = interval
+    self._async_handle_sync = async_handle_sync
+
+    self._newest_timestamp = None
+    self._unsubscribe_interval = None
+
+  async def _async_get_newest_timestamp(self):
+    """Fetches the timestamp of the newest heart rate sample.
+
+    Returns:
+      Datetime of the newest sample within the sentinel window. None if there
+      are no samples.
+    """
+    # Oura reads timestamps without offset as UTC, so the window is sent in UTC
+    # with an explicit offset.
+    now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+    oura_data_pages = self._api.async_get_oura_data_pages(
+        api.OuraEndpoints.HEART_RATE,
+        (now - _SENTINEL_WINDOW).isoformat(),
+        now.isoformat())
+
+    newest_timestamp = None
+    async for oura_data in oura_data_pages:
+      for data_point in oura_data.get('data') or []:
+        timestamp = timestamp_helper.parse_timestamp(data_point['timestamp'])
+        if not newest_timestamp or timestamp > newest_timestamp:
+          newest_timestamp = timestamp
+    return newest_timestamp
+
+  async def _async_handle_interval(self, now):
+    """Checks whether the ring synced since the last check.
+
+    Args:
+      now: Time at which the interval was triggered.
+    """
+    try:
+      newest_timestamp = await self._async_get_newest_timestamp()
+    except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            circuit_breaker.CircuitOpenError,
+            AttributeError,
+            KeyError,
+            ValueError) as error:
+      logging.debug(f'Oura: Unable to check for ring syncs: {error!r}')
+      return
+
+    if not newest_timestamp:
+      return
+
+    # The first check only sets the baseline.
+    is_synced = (
+        self._newest_timestamp and newest_timestamp > self._newest_timestamp)
+    if not self._newest_timestamp or is_synced:
+      self._newest_timestamp = newest_timestamp
+
+    if is_synced:
+      logging.info(
+          f'Oura: Ring synced data up to {newest_timestamp.isoformat()}.')
+      await self._async_handle_sync()
+
+  @core.callback
+  def start(self):
+    """Starts watching for ring syncs."""
+    if self._unsubscribe_interval:
+      return
+
+    self._unsubscribe_interval = event.async_track_time_interval(
+        self._hass, self._async_handle_interval, self._interval)
+
+  @core.callback
+  def stop(self):
+    """Stops watching for ring syncs."""
+    if not self._unsubscribe_interval:
+      return
+
+    self._unsubscribe_interval()
+    self._unsubscribe_interval = None
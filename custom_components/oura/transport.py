@@ -0,0 +1,422 @@
+"""Provides transports sending the requests of OuraApi.
+
+The HTTP transport talks to Oura API. The recording transport wraps another
+transport and writes every request and response pair to a compressed cassette
+file, which the replay transport serves back without any network or token.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+import aiohttp
+import yarl
+from homeassistant.helpers import aiohttp_client
+from multidict import CIMultiDict
+from multidict import CIMultiDictProxy
+from . import const as oura_const
+
+MODE_HTTP = oura_const.DEFAULT_TRANSPORT
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+MODES = (MODE_HTTP, MODE_RECORD, MODE_REPLAY)
+
+TIMING_ORIGINAL = oura_const.DEFAULT_REPLAY_TIMING
+TIMING_NONE = 'none'
+TIMINGS = (TIMING_ORIGINAL, TIMING_NONE)
+
+# Query parameters which are never written to cassettes.
+_SECRET_PARAMS = ('access_token',)
+
+# Response headers written to cassettes. Others are not used by OuraApi.
+_RECORDED_HEADERS = ('Content-Type', 'Retry-After')
+
+_ERROR_TIMEOUT = 'timeout'
+_ERROR_CLIENT = 'client'
+
+
+class OuraResponse(object):
+  """Response of Oura API, with its body already read.
+
+  Properties:
+    body: raw body of the response.
+    headers: case-insensitive headers of the response.
+    status: HTTP status of the response.
+
+  Methods:
+    json: decodes the body of the response.
+    raise_for_status: raises an error for HTTP error statuses.
+  """
+
+  def __init__(self, url, status, headers, body):
+    """Instantiates a new OuraResponse class.
+
+    Args:
+      url: Requested URL.
+      status: HTTP status.
+      headers: Headers of the response.
+      body: Raw body of the response.
+    """
+    self._url = url
+    self._status = status
+    self._headers = CIMultiDictProxy(CIMultiDict(headers))
+    self._body = body
+
+  @property
+  def body(self):
+    """Returns the raw body of the response."""
+    return self._body
+
+  @property
+  def headers(self):
+    """Returns the case-insensitive headers of the response."""
+    return self._headers
+
+  @property
+  def status(self):
+    """Returns the HTTP status of the response."""
+    return self._status
+
+  def json(self):
+    """Decodes the body of the response.
+
+    Returns:
+      Decoded JSON body.
+
+    Raises:
+      ValueError: If the body is not valid JSON.
+    """
+    return json.loads(self._body)
+
+  def raise_for_status(self):
+    """Raises an error for HTTP error statuses.
+
+    Raises:
+      aiohttp.ClientResponseError: If the status is 400 or above.
+    """
+    if self._status < 400:
+      return
+
+    url = yarl.URL(self._url)
+    request_info = aiohttp.RequestInfo(
+        url, 'GET', CIMultiDictProxy(CIMultiDict()), url)
+    raise aiohttp.ClientResponseError(
+        request_info, (), status=self._status, headers=self._headers)
+
+
+class OuraHttpTransport(object):
+  """Sends requests to Oura API over HTTP.
+
+  Methods:
+    async_get: sends a GET request.
+  """
+
+  def __init__(self, hass):
+    """Instantiates a new OuraHttpTransport class.
+
+    Args:
+      hass: Home-Assistant object.
+    """
+    # Shared Home-Assistant session, which keeps connections alive across
+    # requests instead of opening a new one for every call.
+    self._session = aiohttp_client.async_get_clientsession(hass)
+
+  async def async_get(self, url, params, headers, timeout):
+    """Sends a GET request.
+
+    Args:
+      url: URL to request.
+      params: Query parameters.
+      headers: Request headers.
+      timeout: aiohttp.ClientTimeout of the request.
+
+    Returns:
+      OuraResponse.
+
+    Raises:
+      aiohttp.ClientError: If the request failed.
+      asyncio.TimeoutError: If the request timed out.
+    """
+    async with self._session.get(
+            url, params=params, headers=headers, timeout=timeout) as response:
+      body = await response.read()
+      return OuraResponse(url, response.status, response.headers, body)
+
+
+def _get_interaction_key(url, params):
+  """Gets the key matching a request to its recorded interactions.
+
+  The base URL and secret parameters are left out, so cassettes recorded on
+  Oura API can be replayed with any base URL or token.
+
+  Args:
+    url: Requested URL.
+    params: Query parameters.
+
+  Returns:
+    (path, params) of the request.
+  """
+  return (
+      yarl.URL(url).path,
+      tuple(sorted(
+          (name, str(value)) for name, value in (params or {}).items()
+          if name not in _SECRET_PARAMS)),
+  )
+
+
+def load_cassette(cassette_path):
+  """Loads the interactions of a cassette. It blocks while reading the file.
+
+  Args:
+    cassette_path: Path of the cassette.
+
+  Returns:
+    List of recorded interactions, in the order they were recorded. Each one
+    holds the `path` and `params` of the request and either the `status`,
+    `headers` and `body` of the response or the `error` raised, plus the
+    `elapsed` seconds until it completed.
+  """
+  with gzip.open(cassette_path, 'rt', encoding='utf-8') as cassette_file:
+    return [json.loads(line) for line in cassette_file if line.strip()]
+
+
+class OuraRecordingTransport(object):
+  """Records the requests of another transport to a cassette.
+
+  Interactions are appended to the cassette as soon as they complete, as
+  gzip-compressed JSON lines. Tokens are never recorded.
+
+  Methods:
+    async_get: sends a GET request and records it.
+  """
+
+  def __init__(self, hass, transport, cassette_path):
+    """Instantiates a new OuraRecordingTransport class.
+
+    Args:
+      hass: Home-Assistant object.
+      transport: Transport sending the requests.
+      cassette_path: Path of the cassette to append to.
+    """
+    self._hass = hass
+    self._transport = transport
+    self._cassette_path = cassette_path
+    self._lock = asyncio.Lock()
+
+  def _write_interaction(self, interaction):
+    """Appends an interaction to the cassette. It blocks while writing."""
+    with gzip.open(
+            self._cassette_path, 'at', encoding='utf-8') as cassette_file:
+      cassette_file.write(json.dumps(interaction) + '\n')
+
+  async def _async_record(self, url, params, start_time, **result):
+    """Records an interaction.
+
+    Args:
+      url: Requested URL.
+      params: Query parameters.
+      start_time: Monotonic time at which the request was sent.
+      **result: Response or error of the request.
+    """
+    (path, recorded_params) = _get_interaction_key(url, params)
+    interaction = {
+        'path': path,
+        'params': recorded_params,
+        'elapsed': time.monotonic() - start_time,
+        **result,
+    }
+
+    async with self._lock:
+      try:
+        await self._hass.async_add_executor_job(
+            self._write_interaction, interaction)
+      except OSError as error:
+        logging.warning(f'Oura: Unable to record Oura API response: {error}')
+
+  async def async_get(self, url, params, headers, timeout):
+    """Sends a GET request and records it.
+
+    Args:
+      url: URL to request.
+      params: Query parameters.
+      headers: Request headers. They are not recorded.
+      timeout: aiohttp.ClientTimeout of the request.
+
+    Returns:
+      OuraResponse.
+
+    Raises:
+      aiohttp.ClientError: If the request failed.
+      asyncio.TimeoutError: If the request timed out.
+    """
+    start_time = time.monotonic()
+    try:
+      response = await self._transport.async_get(
+          url, params, headers, timeout)
+    except asyncio.TimeoutError:
+      await self._async_record(url, params, start_time, error=_ERROR_TIMEOUT)
+      raise
+    except aiohttp.ClientError as error:
+      await self._async_record(
+          url, params, start_time, error=_ERROR_CLIENT, message=str(error))
+      raise
+
+    await self._async_record(
+        url,
+        params,
+        start_time,
+        status=response.status,
+        headers={
+            name: response.headers[name] for name in _RECORDED_HEADERS
+            if name in response.headers
+        },
+        body=response.body.decode('utf-8', 'replace'))
+    return response
+
+
+class OuraReplayTransport(object):
+  """Serves the interactions recorded in a cassette.
+
+  Requests are matched by path and parameters, in the order they were
+  recorded. Requests which were never recorded (e.g. for other dates, when
+  replaying on another day) get the interactions of the same path, in order.
+  Interactions are served again once all of them were.
+
+  Methods:
+    async_get: serves the recorded response of a GET request.
+  """
+
+  def __init__(self, hass, cassette_path, timing=TIMING_ORIGINAL):
+    """Instantiates a new OuraReplayTransport class.
+
+    Args:
+      hass: Home-Assistant object.
+      cassette_path: Path of the cassette to replay.
+      timing: TIMING_ORIGINAL to wait as long as the recorded request took.
+        TIMING_NONE to answer straight away.
+    """
+    self._hass = hass
+    self._cassette_path = cassette_path
+    self._timing = timing
+
+    # Maps of keys and paths to their interactions, with the number of times
+    # they were served.
+    self._interactions = None
+    self._lock = asyncio.Lock()
+
+  async def _async_load(self):
+    """Loads the cassette on first use.
+
+    Raises:
+      aiohttp.ClientConnectionError: If the cassette is missing or invalid.
+        It is loaded again on the next request.
+    """
+    async with self._lock:
+      if self._interactions is not None:
+        return
+
+      try:
+        interactions = await self._hass.async_add_executor_job(
+            load_cassette, self._cassette_path)
+
+        loaded_interactions = {}
+        for interaction in interactions:
+          key = (
+              interaction['path'],
+              tuple(tuple(param) for param in interaction['params']))
+          for lookup in (key, interaction['path']):
+            loaded_interactions.setdefault(lookup, [[], 0])[0].append(
+                interaction)
+      except (OSError, EOFError, ValueError, KeyError, TypeError) as error:
+        # Load errors are reported as connection errors, like any other
+        # request which cannot be served, so they do not stop polling.
+        raise aiohttp.ClientConnectionError(
+            f'Unable to load cassette {self._cassette_path}: {error!r}'
+        ) from error
+
+      self._interactions = loaded_interactions
+
+  def _get_interaction(self, url, params):
+    """Gets the next recorded interaction of a request.
+
+    Args:
+      url: Requested URL.
+      params: Query parameters.
+
+    Returns:
+      Recorded interaction. None if the path was never recorded.
+    """
+    key = _get_interaction_key(url, params)
+    served = self._interactions.get(key) or self._interactions.get(key[0])
+    if not served:
+      return None
+
+    (interactions, count) = served
+    served[1] = count + 1
+    return interactions[count % len(interactions)]
+
+  async def async_get(self, url, params, headers, timeout):
+    """Serves the recorded response of a GET request.
+
+    Args:
+      url: URL to request.
+      params: Query parameters.
+      headers: Request headers. They are ignored.
+      timeout: aiohttp.ClientTimeout of the request. It is ignored.
+
+    Returns:
+      OuraResponse.
+
+    Raises:
+      aiohttp.ClientError: If the request failed when recorded or was never
+        recorded, or if the cassette could not be loaded.
+      asyncio.TimeoutError: If the request timed out when recorded.
+    """
+    await self._async_load()
+
+    interaction = self._get_interaction(url, params)
+    if interaction is None:
+      raise aiohttp.ClientConnectionError(
+          f'No recorded response for {yarl.URL(url).path}')
+
+    if self._timing == TIMING_ORIGINAL:
+      await asyncio.sleep(interaction['elapsed'])
+
+    error = interaction.get('error')
+    if error == _ERROR_TIMEOUT:
+      raise asyncio.TimeoutError()
+    if error:
+      raise aiohttp.ClientConnectionError(interaction.get('message'))
+
+    return OuraResponse(
+        url,
+        interaction['status'],
+        interaction['headers'],
+        interaction['body'].encode('utf-8'))
+
+
+def create_transport(
+        hass,
+        mode=MODE_HTTP,
+        cassette=oura_const.DEFAULT_CASSETTE,
+        timing=TIMING_ORIGINAL):
+  """Creates the transport for a transport mode.
+
+  Args:
+    hass: Home-Assistant object.
+    mode: MODE_HTTP, MODE_RECORD or MODE_REPLAY.
+    cassette: Path of the cassette, relative to the configuration folder.
+    timing: Replay timing, TIMING_ORIGINAL or TIMING_NONE.
+
+  Returns:
+    Transport for OuraApi.
+  """
+  if mode == MODE_REPLAY:
+    return OuraReplayTransport(hass, hass.config.path(cassette), timing)
+
+  http_transport = OuraHttpTransport(hass)
+  if mode == MODE_RECORD:
+    return OuraRecordingTransport(
+        hass, http_transport, hass.config.path(cassette))
+  return http_transport
@@ -0,0 +1,373 @@
+"""Provides an OuraWebhook class to receive Oura data changes as they happen.
+
+Oura API v2 notifies a callback URL whenever a document is created, updated or
+deleted, once subscribed to its data type with the client id and secret of an
+Oura application. Subscriptions expire, so they are renewed periodically.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import time
+import aiohttp
+from aiohttp import web
+from homeassistant import core
+from homeassistant.components import webhook
+from homeassistant.helpers import aiohttp_client
+from homeassistant.helpers import event
+from homeassistant.helpers import start
+from . import api
+from . import const as oura_const
+from .helpers import hass_helper
+
+EVENT_CREATE = 'create'
+EVENT_UPDATE = 'update'
+EVENT_DELETE = 'delete'
+EVENT_TYPES = (EVENT_CREATE, EVENT_UPDATE, EVENT_DELETE)
+
+# Oura data types notified by webhooks, by endpoint. Heart rate and bedtime
+# are not notified, so they are only polled.
+ENDPOINT_DATA_TYPES = {
+    api.OuraEndpoints.ACTIVITY: 'daily_activity',
+    api.OuraEndpoints.READINESS: 'daily_readiness',
+    api.OuraEndpoints.SESSIONS: 'session',
+    api.OuraEndpoints.SLEEP_PERIODS: 'sleep',
+    api.OuraEndpoints.SLEEP_SCORE: 'daily_sleep',
+    api.OuraEndpoints.WORKOUTS: 'workout',
+}
+
+_DATA_TYPE_ENDPOINTS = {
+    data_type: endpoint for endpoint, data_type in ENDPOINT_DATA_TYPES.items()
+}
+
+SUBSCRIPTION_PATH = '/v2/webhook/subscription'
+
+# Subscriptions are checked periodically and renewed when they are about to
+# expire.
+_RENEWAL_INTERVAL = datetime.timedelta(hours=12)
+_RENEWAL_MARGIN = datetime.timedelta(days=7)
+
+_REQUEST_TIMEOUT = 30
+
+SIGNATURE_HEADER = 'x-oura-signature'
+TIMESTAMP_HEADER = 'x-oura-timestamp'
+
+# Events signed longer ago (or later) than this are rejected as replays.
+_TIMESTAMP_TOLERANCE = datetime.timedelta(minutes=5)
+
+_HTTP_BAD_REQUEST = 400
+_HTTP_UNAUTHORIZED = 401
+
+
+def get_signature(client_secret, timestamp, body):
+  """Gets the signature of a webhook event, as sent by Oura.
+
+  Args:
+    client_secret: Client secret of the Oura application.
+    timestamp: Value of the timestamp header of the event.
+    body: Raw body of the event.
+
+  Returns:
+    Uppercase hex HMAC-SHA256 of the timestamp and body.
+  """
+  return hmac.new(
+      client_secret.encode(), timestamp.encode() + body,
+      hashlib.sha256).hexdigest().upper()
+
+
+def _parse_event_timestamp(timestamp):
+  """Gets the time at which an event was signed.
+
+  Args:
+    timestamp: Value of the timestamp header of the event, in epoch seconds.
+
+  Returns:
+    Epoch seconds. None if missing or invalid.
+  """
+  try:
+    return float(timestamp)
+  except (TypeError, ValueError):
+    return None
+
+
+def _parse_expiration_time(subscription):
+  """Gets the expiration time of a subscription.
+
+  Args:
+    subscription: Subscription returned by Oura API.
+
+  Returns:
+    Timezone-aware datetime. None if unknown.
+  """
+  try:
+    expiration_time = datetime.datetime.fromisoformat(
+        subscription.get('expiration_time') or '')
+  except ValueError:
+    return None
+
+  if not expiration_time.tzinfo:
+    expiration_time = expiration_time.replace(tzinfo=datetime.timezone.utc)
+  return expiration_time
+
+
+class OuraWebhook(object):
+  """Receives Oura webhook events and manages their subscriptions.
+
+  A Home-Assistant webhook is registered for the access token. Its URL is
+  subscribed to the create, update and delete events of the data types of
+  every endpoint with sensors. Subscriptions of the same URL which are no
+  longer needed are deleted. Each event is handed over with the endpoint and
+  the Oura id of the document.
+
+  Methods:
+    async_sync_subscriptions: creates, renews and deletes subscriptions.
+    start: starts receiving events.
+    stop: stops receiving events.
+  """
+
+  def __init__(
+          self,
+          hass,
+          base_url,
+          access_token,
+          client_id,
+          client_secret,
+          get_endpoints,
+          async_handle_event):
+    """Instantiates a new OuraWebhook class.
+
+    Args:
+      hass: Home-Assistant object.
+      base_url: Base URL of Oura API.
+      access_token: Personal access token, used to identify the webhook.
+      client_id: Client id of the Oura application.
+      client_secret: Client secret of the Oura application.
+      get_endpoints: Function returning the endpoints with sensors.
+      async_handle_event: Coroutine function called with the endpoint, event
+        type and Oura id of the document of each event.
+    """
+    self._hass = hass
+    self._subscription_url = base_url.rstrip('/') + SUBSCRIPTION_PATH
+    self._client_id = client_id
+    self._client_secret = client_secret
+    self._get_endpoints = get_endpoints
+    self._async_handle_event = async_handle_event
+
+    # Webhook ids are not guessable, but stay the same across restarts so the
+    # existing subscriptions keep working.
+    self._webhook_id = hmac.new(
+        client_secret.encode(), f'webhook:{access_token}'.encode(),
+        hashlib.sha256).hexdigest()[:32]
+    self._verification_token = hmac.new(
+        client_secret.encode(), f'verification:{access_token}'.encode(),
+        hashlib.sha256).hexdigest()[:32]
+
+    self._session = aiohttp_client.async_get_clientsession(hass)
+    self._unsubscribe_interval = None
+
+  async def _async_request(self, method, url, json_data=None):
+    """Sends a request to the webhook subscription API of Oura.
+
+    Args:
+      method: HTTP method.
+      url: URL to request.
+      json_data: Body of the request.
+
+    Returns:
+      Decoded JSON response. None if empty.
+
+    Raises:
+      aiohttp.ClientError: If the request failed.
+      asyncio.TimeoutError: If the request timed out.
+    """
+    headers = {
+        'x-client-id': self._client_id,
+        'x-client-secret': self._client_secret,
+    }
+    async with self._session.request(
+            method,
+            url,
+            headers=headers,
+            json=json_data,
+            timeout=aiohttp.ClientTimeout(total=_REQUEST_TIMEOUT)) as response:
+      response.raise_for_status()
+      body = await response.read()
+      return json.loads(body) if body else None
+
+  def _get_callback_url(self):
+    """Gets the URL of the webhook, as reached by Oura.
+
+    Raises:
+      ValueError: If Home-Assistant has no URL.
+    """
+    return (hass_helper.get_url(self._hass)
+            + webhook.async_generate_path(self._webhook_id))
+
+  async def async_sync_subscriptions(self, now=None):
+    """Creates missing subscriptions, renews expiring ones and deletes others.
+
+    Args:
+      now: Time at which the check was triggered, if scheduled.
+    """
+    data_types = {
+        ENDPOINT_DATA_TYPES[endpoint] for endpoint in self._get_endpoints()
+        if endpoint in ENDPOINT_DATA_TYPES
+    }
+    required_subscriptions = {
+        (event_type, data_type)
+        for event_type in EVENT_TYPES for data_type in data_types
+    }
+    renewal_time = (
+        datetime.datetime.now(datetime.timezone.utc) + _RENEWAL_MARGIN)
+
+    try:
+      callback_url = self._get_callback_url()
+      subscriptions = await self._async_request(
+          'GET', self._subscription_url) or []
+
+      existing_subscriptions = set()
+      for subscription in subscriptions:
+        # Other applications or installations may share the client.
+        if subscription.get('callback_url') != callback_url:
+          continue
+
+        subscription_key = (
+            subscription.get('event_type'), subscription.get('data_type'))
+        if (subscription_key not in required_subscriptions
+                or subscription_key in existing_subscriptions):
+          await self._async_request(
+              'DELETE', f'{self._subscription_url}/{subscription["id"]}')
+          continue
+
+        existing_subscriptions.add(subscription_key)
+        expiration_time = _parse_expiration_time(subscription)
+        if not expiration_time or expiration_time < renewal_time:
+          await self._async_request(
+              'PUT', f'{self._subscription_url}/renew/{subscription["id"]}')
+          logging.debug(
+              f'Oura: Renewed webhook subscription to {subscription_key}.')
+
+      for (event_type, data_type) in sorted(
+              required_subscriptions - existing_subscriptions):
+        await self._async_request('POST', self._subscription_url, {
+            'callback_url': callback_url,
+            'verification_token': self._verification_token,
+            'event_type': event_type,
+            'data_type': data_type,
+        })
+        logging.debug(
+            f'Oura: Subscribed to {event_type} events of {data_type}.')
+    except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            KeyError,
+            TypeError,
+            ValueError) as error:
+      logging.warning(
+          f'Oura: Unable to update webhook subscriptions: {error!r}')
+
+  def _is_signature_valid(self, request, body):
+    """Checks the signature and timestamp of an event.
+
+    Args:
+      request: Web request of the event.
+      body: Raw body of the event.
+
+    Returns:
+      True if the event is signed with the client secret within the timestamp
+      tolerance. False if it is unsigned, signed with a different secret or
+      signed too long ago, e.g. a replayed event.
+    """
+    signature = request.headers.get(SIGNATURE_HEADER)
+    timestamp = request.headers.get(TIMESTAMP_HEADER)
+    if not signature or not timestamp:
+      return False
+
+    event_time = _parse_event_timestamp(timestamp)
+    if (event_time is None
+            or abs(time.time() - event_time)
+            > _TIMESTAMP_TOLERANCE.total_seconds()):
+      return False
+
+    expected_signature = get_signature(self._client_secret, timestamp, body)
+    return hmac.compare_digest(signature.upper(), expected_signature)
+
+  async def _async_handle_webhook(self, hass, webhook_id, request):
+    """Answers the verification of subscriptions and receives events.
+
+    Args:
+      hass: Home-Assistant object.
+      webhook_id: Id of the webhook.
+      request: Web request.
+
+    Returns:
+      Web response.
+    """
+    if request.method == 'GET':
+      if request.query.get('verification_token') != self._verification_token:
+        return web.Response(status=_HTTP_UNAUTHORIZED)
+      return web.json_response({'challenge': request.query.get('challenge')})
+
+    body = await request.read()
+    if not self._is_signature_valid(request, body):
+      logging.warning(
+          'Oura: Ignoring webhook event without a valid, recent signature.')
+      return web.Response(status=_HTTP_UNAUTHORIZED)
+
+    try:
+      event_data = json.loads(body)
+      event_type = event_data['event_type']
+      data_type = event_data['data_type']
+      document_id = event_data['object_id']
+    except (KeyError, TypeError, ValueError):
+      return web.Response(status=_HTTP_BAD_REQUEST)
+
+    endpoint = _DATA_TYPE_ENDPOINTS.get(data_type)
+    if not endpoint or event_type not in EVENT_TYPES or not document_id:
+      logging.debug(f'Oura: Ignoring {event_type} event of {data_type}.')
+      return web.Response()
+
+    # Oura expects a quick answer, so the document is fetched afterwards.
+    hass.async_create_background_task(
+        self._async_handle_event(endpoint, event_type, document_id),
+        f'{oura_const.DOMAIN}_webhook_event')
+    return web.Response()
+
+  @core.callback
+  def start(self):
+    """Starts receiving events and keeping subscriptions up to date."""
+    if self._unsubscribe_interval:
+      return
+
+    webhook.async_register(
+        self._hass,
+        oura_const.DOMAIN,
+        'Oura',
+        self._webhook_id,
+        self._async_handle_webhook,
+        allowed_methods=('GET', 'POST'))
+
+    self._unsubscribe_interval = event.async_track_time_interval(
+        self._hass, self.async_sync_subscriptions, _RENEWAL_INTERVAL)
+
+    @core.callback
+    def _async_start_sync(hass):
+      hass.async_create_background_task(
+          self.async_sync_subscriptions(),
+          f'{oura_const.DOMAIN}_webhook_subscriptions')
+
+    # Sensors are all registered by then, so every data type is subscribed.
+    start.async_at_started(self._hass, _async_start_sync)
+
+  @core.callback
+  def stop(self):
+    """Stops receiving events. Subscriptions are kept for the next start."""
+    if not self._unsubscribe_interval:
+      return
+
+    webhook.async_unregister(self._hass, self._webhook_id)
+    self._unsubscribe_interval()
+    self._unsubscribe_interval = None
@@ -0,0 +1,13 @@
+"""Fixtures shared by the tests of the Oura integration."""
+
+import pytest_asyncio
+from homeassistant import core
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+  """Creates a Home-Assistant object which is stopped after the test."""
+  hass = core.HomeAssistant(str(tmp_path))
+  hass.config.internal_url = 'http://localhost:8123'
+  yield hass
+  await hass.async_stop(force=True)
@@ -0,0 +1,47 @@
+"""Tests for the OuraApi class, against a fake Oura API."""
+
+import datetime
+import aiohttp
+import pytest
+from homeassistant import const
+from benchmarks import fake_oura_server
+from custom_components.oura import api
+from custom_components.oura import circuit_breaker
+from custom_components.oura import const as oura_const
+from custom_components.oura import coordinator
+
+_ENDPOINT = api.OuraEndpoints.SLEEP_SCORE
+
+
+async def _async_get_pages(oura_api):
+  """Fetches every page of yesterday."""
+  day = str(datetime.date.today() - datetime.timedelta(days=1))
+  return [
+      page async for page in oura_api.async_get_oura_data_pages(
+          _ENDPOINT, day, day)
+  ]
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_is_retried_and_recorded_as_failure(
+        hass, monkeypatch):
+  monkeypatch.setattr(api, '_get_backoff_delay', lambda attempt: 0)
+
+  async with fake_oura_server.FakeOuraServer(malformed_ratio=1) as server:
+    oura_api = coordinator.get_coordinator(hass, {
+        const.CONF_ACCESS_TOKEN: 'token',
+        oura_const.CONF_BASE_URL: server.base_url,
+    }).api
+
+    with pytest.raises(aiohttp.ClientPayloadError):
+      await _async_get_pages(oura_api)
+
+    endpoint_stats = oura_api.stats.as_dict()[_ENDPOINT.name]
+    assert endpoint_stats['requests'] == oura_const.DEFAULT_MAX_RETRIES + 1
+    assert endpoint_stats['errors'] == oura_const.DEFAULT_MAX_RETRIES + 1
+    assert endpoint_stats['retries'] == oura_const.DEFAULT_MAX_RETRIES
+
+    for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD - 1):
+      with pytest.raises(aiohttp.ClientPayloadError):
+        await _async_get_pages(oura_api)
+    assert oura_api.circuit_breaker.is_open
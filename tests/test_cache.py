@@ -0,0 +1,62 @@
+"""Tests for the OuraCache class."""
+
+import asyncio
+import datetime
+from unittest import mock
+from custom_components.oura import api
+from custom_components.oura import cache
+
+_ENDPOINT = api.OuraEndpoints.SLEEP_PERIODS
+
+
+def _create_cache():
+  """Creates a loaded, empty, cache which is never written to disk."""
+  with mock.patch.object(cache.storage, 'Store') as store:
+    store.return_value.async_load = mock.AsyncMock(return_value=None)
+    oura_cache = cache.OuraCache(None, 'token', 2)
+    asyncio.run(oura_cache.async_load())
+  return oura_cache
+
+
+def _fetch(oura_cache, day, documents):
+  """Stores the documents fetched for a single day."""
+  fetched_days = {}
+  oura_cache.add_fetched_documents(_ENDPOINT, fetched_days, documents)
+  oura_cache.set_documents(_ENDPOINT, day, day, fetched_days)
+
+
+def test_set_documents_drops_documents_missing_on_refetch():
+  oura_cache = _create_cache()
+  day = str(datetime.date.today() - datetime.timedelta(days=10))
+
+  _fetch(oura_cache, day, [{'id': 'a', 'day': day}])
+  _fetch(oura_cache, day, [{'id': 'b', 'day': day}])
+
+  assert oura_cache.get_documents(_ENDPOINT, day, day) == [
+      {'id': 'b', 'day': day}]
+
+
+def test_set_documents_drops_documents_of_days_refetched_empty():
+  oura_cache = _create_cache()
+  day = str(datetime.date.today() - datetime.timedelta(days=10))
+
+  _fetch(oura_cache, day, [{'id': 'a', 'day': day}])
+  _fetch(oura_cache, day, [])
+
+  assert oura_cache.get_documents(_ENDPOINT, day, day) == []
+
+
+def test_upsert_document_merges_by_id():
+  oura_cache = _create_cache()
+  day = str(datetime.date.today() - datetime.timedelta(days=10))
+
+  _fetch(oura_cache, day, [{'id': 'a', 'day': day, 'score': 1}])
+  assert oura_cache.upsert_document(
+      _ENDPOINT, {'id': 'b', 'day': day, 'score': 2})
+  assert oura_cache.upsert_document(
+      _ENDPOINT, {'id': 'a', 'day': day, 'score': 3})
+
+  assert oura_cache.get_documents(_ENDPOINT, day, day) == [
+      {'id': 'a', 'day': day, 'score': 3},
+      {'id': 'b', 'day': day, 'score': 2},
+  ]
@@ -0,0 +1,81 @@
+"""Tests for the OuraDataCoordinator class, against a fake Oura API."""
+
+import voluptuous as vol
+import pytest
+from homeassistant import const
+from benchmarks import fake_oura_server
+from benchmarks import harness
+from custom_components.oura import const as oura_const
+from custom_components.oura import coordinator
+from custom_components.oura import sensor_sleep_score
+
+_ACCESS_TOKEN = 'token'
+
+
+def _create_sensors(hass, base_url):
+  """Creates one sensor of each type, subscribed to their coordinator."""
+  config = {
+      const.CONF_ACCESS_TOKEN: _ACCESS_TOKEN,
+      oura_const.CONF_BASE_URL: base_url,
+      const.CONF_SENSORS: {
+          sensor_name: vol.Schema(sensor_module.CONF_SCHEMA)({})
+          for sensor_name, (sensor_module, _) in harness.SENSORS.items()
+      },
+  }
+
+  sensors = [
+      sensor_class(config, hass)
+      for (_, sensor_class) in harness.SENSORS.values()
+  ]
+  oura_coordinator = coordinator.get_coordinator(hass, config)
+  for sensor in sensors:
+    oura_coordinator.register_sensor(sensor)
+  return (oura_coordinator, sensors)
+
+
+@pytest.mark.asyncio
+async def test_refresh_updates_all_sensors(hass):
+  async with fake_oura_server.FakeOuraServer() as server:
+    (oura_coordinator, sensors) = _create_sensors(hass, server.base_url)
+
+    await oura_coordinator.async_refresh()
+    first_attributes = [sensor.extra_state_attributes for sensor in sensors]
+    await oura_coordinator.async_refresh()
+
+  for sensor, attributes in zip(sensors, first_attributes):
+    assert sensor.extra_state_attributes, sensor.name
+    assert sensor.extra_state_attributes == attributes, sensor.name
+
+
+@pytest.mark.asyncio
+async def test_refresh_updates_other_endpoints_when_one_fails(
+        hass, monkeypatch):
+  def _raise_error(*args, **kwargs):
+    raise RuntimeError('Injected failure.')
+
+  monkeypatch.setattr(
+      sensor_sleep_score.OuraSleepScoreSensor, 'update_from_sensor_data',
+      _raise_error)
+
+  async with fake_oura_server.FakeOuraServer() as server:
+    (oura_coordinator, sensors) = _create_sensors(hass, server.base_url)
+    await oura_coordinator.async_refresh()
+
+  for sensor in sensors:
+    if isinstance(sensor, sensor_sleep_score.OuraSleepScoreSensor):
+      assert not sensor.extra_state_attributes
+    else:
+      assert sensor.extra_state_attributes, sensor.name
+
+
+@pytest.mark.asyncio
+async def test_get_coordinator_warns_of_ignored_settings(hass, caplog):
+  config = {const.CONF_ACCESS_TOKEN: _ACCESS_TOKEN}
+  oura_coordinator = coordinator.get_coordinator(hass, config)
+
+  assert coordinator.get_coordinator(hass, dict(config)) is oura_coordinator
+  assert not caplog.records
+
+  assert coordinator.get_coordinator(hass, dict(
+      config, **{oura_const.CONF_MAX_RETRIES: 5})) is oura_coordinator
+  assert oura_const.CONF_MAX_RETRIES in caplog.text
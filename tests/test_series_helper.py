@@ -0,0 +1,58 @@
+"""Tests for the HeartRateSeries class."""
+
+from custom_components.oura.helpers import series_helper
+
+
+def test_append_skips_invalid_bpm():
+  series = series_helper.HeartRateSeries()
+
+  assert series.append('2023-01-01T10:00:00+00:00', 60, 'rest')
+  assert not series.append('2023-01-01T10:05:00+00:00', None, 'rest')
+  assert not series.append('2023-01-01T10:10:00+00:00', 'high', 'rest')
+  assert not series.append('2023-01-01T10:15:00+00:00', 300, 'rest')
+  assert not series.append('2023-01-01T10:20:00+00:00', -1, 'rest')
+
+  assert series.get('2023-01-01') == [{
+      'day': '2023-01-01',
+      'bpm': 60,
+      'source': 'rest',
+      'timestamp': '2023-01-01T10:00:00+00:00',
+  }]
+
+
+def test_append_rounds_decimal_bpm():
+  series = series_helper.HeartRateSeries()
+
+  assert series.append('2023-01-01T10:00:00+00:00', 60.6, 'rest')
+
+  assert series.get('2023-01-01')[0]['bpm'] == 61
+
+
+def test_from_dict_restores_samples():
+  series = series_helper.HeartRateSeries()
+  series.append('2023-01-01T10:00:00+02:00', 60, 'rest')
+  series.append('2023-01-02T08:00:00+00:00', 70, 'awake')
+
+  restored_series = series_helper.HeartRateSeries.from_dict(series.as_dict())
+
+  assert restored_series.get('2023-01-01') == series.get('2023-01-01')
+  assert restored_series.get('2023-01-02') == series.get('2023-01-02')
+
+
+def test_get_aligns_buckets_to_sample_offset():
+  series = series_helper.HeartRateSeries(resolution=3600)
+  series.append('2023-01-01T10:10:00+05:30', 60, 'rest')
+  series.append('2023-01-01T10:50:00+05:30', 80, 'rest')
+  series.append('2023-01-01T11:10:00+05:30', 70, 'awake')
+
+  assert series.get('2023-01-01') == [{
+      'day': '2023-01-01',
+      'bpm': 70,
+      'source': 'rest',
+      'timestamp': '2023-01-01T10:00:00+05:30',
+  }, {
+      'day': '2023-01-01',
+      'bpm': 70,
+      'source': 'awake',
+      'timestamp': '2023-01-01T11:00:00+05:30',
+  }]
@@ -0,0 +1,152 @@
+"""Tests for the OuraWebhook class, against a fake Oura API."""
+
+import datetime
+import json
+import time
+import voluptuous as vol
+import pytest
+from homeassistant import const
+from benchmarks import fake_oura_server
+from custom_components.oura import api
+from custom_components.oura import const as oura_const
+from custom_components.oura import coordinator
+from custom_components.oura import sensor_sleep_periods
+from custom_components.oura import webhook
+
+_CLIENT_SECRET = 'secret'
+_ENDPOINT = api.OuraEndpoints.SLEEP_PERIODS
+_STALE_AGE = 10 * 60
+
+
+class FakeRequest(object):
+  """Web request of a webhook event, as received by Home-Assistant."""
+
+  def __init__(self, body, headers):
+    """Instantiates a new FakeRequest class.
+
+    Args:
+      body: Raw body of the event.
+      headers: Request headers.
+    """
+    self.method = 'POST'
+    self.query = {}
+    self.headers = headers
+    self._body = body
+
+  async def read(self):
+    """Returns the raw body of the event."""
+    return self._body
+
+
+def _create_request(event_type, document_id, timestamp=None, is_signed=True):
+  """Creates the request of an event of the tested endpoint.
+
+  Args:
+    event_type: Type of change: create, update or delete.
+    document_id: Oura id of the changed document.
+    timestamp: Epoch seconds at which the event is signed. Now, if not set.
+    is_signed: Whether the event is signed with the client secret.
+
+  Returns:
+    FakeRequest.
+  """
+  body = json.dumps({
+      'event_type': event_type,
+      'data_type': webhook.ENDPOINT_DATA_TYPES[_ENDPOINT],
+      'object_id': document_id,
+  }).encode()
+
+  headers = {}
+  if is_signed:
+    timestamp = str(int(timestamp or time.time()))
+    headers[webhook.TIMESTAMP_HEADER] = timestamp
+    headers[webhook.SIGNATURE_HEADER] = webhook.get_signature(
+        _CLIENT_SECRET, timestamp, body)
+  return FakeRequest(body, headers)
+
+
+@pytest.mark.asyncio
+async def test_events_are_merged_only_if_signed_recently(hass, monkeypatch):
+  background_tasks = []
+
+  def _create_background_task(target, name):
+    background_tasks.append(hass.loop.create_task(target, name=name))
+
+  monkeypatch.setattr(
+      hass, 'async_create_background_task', _create_background_task)
+
+  async def _async_post(request):
+    response = await oura_webhook._async_handle_webhook(
+        hass, 'webhook_id', request)
+    while background_tasks:
+      await background_tasks.pop()
+    return response.status
+
+  def _get_cached_documents():
+    return oura_coordinator._cache.get_documents(_ENDPOINT, day, day)
+
+  async with fake_oura_server.FakeOuraServer(
+          client_secret=_CLIENT_SECRET) as server:
+    config = {
+        const.CONF_ACCESS_TOKEN: 'token',
+        oura_const.CONF_BASE_URL: server.base_url,
+        oura_const.CONF_WEBHOOK: True,
+        oura_const.CONF_CLIENT_ID: 'client',
+        oura_const.CONF_CLIENT_SECRET: _CLIENT_SECRET,
+        const.CONF_SENSORS: {
+            sensor_sleep_periods.CONF_KEY_NAME: vol.Schema(
+                sensor_sleep_periods.CONF_SCHEMA)({}),
+        },
+    }
+    oura_coordinator = coordinator.get_coordinator(hass, config)
+    oura_coordinator.register_sensor(
+        sensor_sleep_periods.OuraSleepPeriodsSensor(config, hass))
+    oura_webhook = oura_coordinator._webhook
+    await oura_coordinator.async_refresh()
+
+    day = datetime.date.today() - datetime.timedelta(days=1)
+    document = server.get_document(_ENDPOINT, day)
+    day = str(day)
+    assert _get_cached_documents() == [document]
+
+    # Update.
+    updated_document = dict(document, average_breath=99)
+    await server.async_post_event(
+        _ENDPOINT, webhook.EVENT_UPDATE, updated_document)
+
+    assert await _async_post(_create_request(
+        webhook.EVENT_UPDATE, document['id'], is_signed=False)) == 401
+    assert await _async_post(_create_request(
+        webhook.EVENT_UPDATE, document['id'],
+        timestamp=time.time() - _STALE_AGE)) == 401
+    assert _get_cached_documents() == [document]
+
+    assert await _async_post(_create_request(
+        webhook.EVENT_UPDATE, document['id'])) == 200
+    assert _get_cached_documents() == [updated_document]
+
+    # Create.
+    created_document = dict(document, id='created')
+    await server.async_post_event(
+        _ENDPOINT, webhook.EVENT_CREATE, created_document)
+
+    assert await _async_post(_create_request(
+        webhook.EVENT_CREATE, 'created', is_signed=False)) == 401
+    assert _get_cached_documents() == [updated_document]
+
+    assert await _async_post(_create_request(
+        webhook.EVENT_CREATE, 'created')) == 200
+    assert _get_cached_documents() == [updated_document, created_document]
+
+    # Delete.
+    await server.async_post_event(
+        _ENDPOINT, webhook.EVENT_DELETE, updated_document)
+
+    assert await _async_post(_create_request(
+        webhook.EVENT_DELETE, document['id'],
+        timestamp=time.time() - _STALE_AGE)) == 401
+    assert _get_cached_documents() == [updated_document, created_document]
+
+    assert await _async_post(_create_request(
+        webhook.EVENT_DELETE, document['id'])) == 200
+    assert _get_cached_documents() == [created_document]